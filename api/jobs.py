@@ -0,0 +1,200 @@
+# api/jobs.py
+
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from crawler.enhanced_crawler import EnhancedCrawlerClient
+from crawler.utils import setup_logger
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = {COMPLETED, FAILED, CANCELLED}
+
+# Pages a job keeps in memory by default; older ones are dropped
+MAX_PAGES_KEPT = 1000
+
+
+class CrawlJob:
+    """
+    A crawl submitted through the jobs API, with its progress and results.
+
+    Only the last ``max_pages_kept`` pages are held in memory, so a long crawl does not
+    grow the server; clients polling the results with an offset see every page as long
+    as they keep up.
+    """
+
+    def __init__(self, params: Dict[str, Any], job_id: Optional[str] = None,
+                 max_pages_kept: int = MAX_PAGES_KEPT):
+        self.id = job_id or uuid.uuid4().hex
+        self.params = params
+        self.max_pages_kept = max_pages_kept
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.pages: List[Dict[str, Any]] = []
+        self.pages_dropped = 0
+        self.meta: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        self.pages.append(page)
+        # Trim in chunks so dropping old pages stays cheap per page
+        if len(self.pages) >= 2 * self.max_pages_kept:
+            excess = len(self.pages) - self.max_pages_kept
+            del self.pages[:excess]
+            self.pages_dropped += excess
+
+    def pages_since(self, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Pages from index ``offset`` on, counted over the whole crawl.
+
+        Returns:
+            ``(first, pages)``: the index of the first page returned (later than
+            ``offset`` if those pages were already dropped) and the pages
+        """
+        first = max(offset, self.pages_dropped)
+        return first, self.pages[first - self.pages_dropped:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status and progress, without the page results."""
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "url": self.params.get("url"),
+            "pages_crawled": self.pages_dropped + len(self.pages),
+            "max_pages": self.params.get("max_pages"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": end - self.started_at if self.started_at else 0.0,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """
+    Runs crawl jobs in the background on the shared crawler.
+
+    At most ``max_concurrent_jobs`` crawls run at once; further submissions wait in
+    ``queued`` state, so bursts of requests cannot exhaust browser tabs or sockets.
+    Finished jobs are kept for ``finished_job_ttl`` seconds, and at most
+    ``max_finished_jobs`` of them (oldest dropped first).
+    """
+
+    def __init__(self, crawler: EnhancedCrawlerClient, max_concurrent_jobs: int = 2,
+                 max_finished_jobs: int = 100, finished_job_ttl: float = 3600.0,
+                 max_pages_kept: int = MAX_PAGES_KEPT):
+        self.logger = setup_logger("JobManager")
+        self.crawler = crawler
+        self.max_finished_jobs = max_finished_jobs
+        self.finished_job_ttl = finished_job_ttl
+        self.max_pages_kept = max_pages_kept
+        self._slots = asyncio.Semaphore(max_concurrent_jobs)
+        self._jobs: Dict[str, CrawlJob] = {}
+
+    def submit(self, params: Dict[str, Any]) -> CrawlJob:
+        """Queue a crawl and return its job immediately."""
+        job = CrawlJob(params, max_pages_kept=self.max_pages_kept)
+        if self.crawler.checkpoint_store is not None:
+            # Checkpoint under the job id so the job can be resumed after a restart
+            params.setdefault("options", {})["crawl_id"] = job.id
+        self._start(job)
+        self.logger.info(f"Queued job {job.id} for {params.get('url')}")
+        return job
+
+    def resume(self, job_id: str) -> Optional[CrawlJob]:
+        """
+        Continue a checkpointed crawl, e.g. one interrupted by a server restart.
+
+        Pages gathered before the interruption are available from the resumed job
+        straight away. Returns None if there is no checkpoint for the id.
+        """
+        store = self.crawler.checkpoint_store
+        checkpoint = store.get(job_id) if store is not None else None
+        if checkpoint is None:
+            return None
+        existing = self._jobs.get(job_id)
+        if existing is not None and existing.status not in FINISHED_STATES:
+            return existing
+
+        params = checkpoint["params"]
+        params["options"]["crawl_id"] = job_id
+        job = CrawlJob(params, job_id=job_id, max_pages_kept=self.max_pages_kept)
+        for page in store.results(job_id):
+            job.add_page(page)
+        self._start(job)
+        self.logger.info(f"Resuming job {job.id} with {len(job.pages)} pages already scraped")
+        return job
+
+    def _start(self, job: CrawlJob) -> None:
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        self._prune()
+
+    def get(self, job_id: str) -> Optional[CrawlJob]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[CrawlJob]:
+        self._prune()
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    async def cancel(self, job_id: str, timeout: float = 5.0) -> Optional[CrawlJob]:
+        """Cancel a queued or running job and wait for it to stop. Finished jobs are returned unchanged."""
+        job = self._jobs.get(job_id)
+        if job and job.status not in FINISHED_STATES and job.task:
+            job.task.cancel()
+            await asyncio.wait([job.task], timeout=timeout)
+        return job
+
+    async def shutdown(self) -> None:
+        """Cancel every unfinished job and wait for them to stop."""
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: CrawlJob) -> None:
+        params = job.params
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started_at = time.time()
+                if params["depth"] == 0:
+                    job.add_page(await self.crawler.scrape_page(params["url"], params["instructions"]))
+                    job.meta = {"url": params["url"], "pages_crawled": 1}
+                else:
+                    async for page in self.crawler.scrape_stream(
+                        params["url"], params["instructions"], params["depth"],
+                        params["follow_external_links"], params["max_pages"],
+                        meta=job.meta, **params.get("options", {})
+                    ):
+                        job.add_page(page)
+                job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            self.logger.info(f"Job {job.id} cancelled")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            self.logger.error(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.status in FINISHED_STATES]
+        finished.sort(key=lambda job: job.finished_at or 0)
+        expired_before = time.time() - self.finished_job_ttl
+        for position, job in enumerate(finished):
+            if position < len(finished) - self.max_finished_jobs or (job.finished_at or 0) < expired_before:
+                del self._jobs[job.id]
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 import os
 import sys
 import json
@@ -17,6 +17,12 @@ project_root = current_dir.parent
 sys.path.append(str(project_root))
 
 from crawler.enhanced_crawler import EnhancedCrawlerClient
+from crawler.cache import PageCache
+from crawler.llm_cache import LLMCache
+from crawler.incremental import CrawlStateStore
+from crawler.checkpoint import CheckpointStore
+from crawler.exceptions import ConfigurationError
+from api.jobs import CrawlJob, JobManager
 
 # --- FastAPI App Setup ---
 app = FastAPI(
@@ -35,43 +41,95 @@ else:
 # --- Startup: Pre-initialize Crawler ---
 @app.on_event("startup")
 async def on_startup():
-    crawler = EnhancedCrawlerClient()
+    # Set CRAWLER_CACHE_DIR to reuse fetched pages across crawls
+    cache_dir = os.getenv("CRAWLER_CACHE_DIR")
+    # Set CRAWLER_LLM_CACHE to a SQLite path to reuse relevance/extraction responses
+    llm_cache_path = os.getenv("CRAWLER_LLM_CACHE")
+    # Set CRAWLER_STATE_DB to a SQLite path to allow incremental re-crawls
+    state_db_path = os.getenv("CRAWLER_STATE_DB")
+    # Set CRAWLER_CHECKPOINT_DB to a SQLite path to make background jobs resumable
+    checkpoint_db_path = os.getenv("CRAWLER_CHECKPOINT_DB")
+    # Set CRAWLER_PARSE_EXECUTOR to "process" to parse pages in worker processes
+    parse_executor = os.getenv("CRAWLER_PARSE_EXECUTOR", "thread")
+    crawler = EnhancedCrawlerClient(
+        page_cache=PageCache(cache_dir) if cache_dir else None,
+        llm_cache=LLMCache(llm_cache_path) if llm_cache_path else None,
+        state_store=CrawlStateStore(state_db_path) if state_db_path else None,
+        checkpoint_store=CheckpointStore(checkpoint_db_path) if checkpoint_db_path else None,
+        parse_executor=parse_executor
+    )
     await crawler.initialize_crawler()
     app.state.crawler = crawler
+    # Bound how many background crawl jobs share the browser at once
+    # Finished jobs are dropped after CRAWLER_JOB_TTL seconds; each keeps at most
+    # CRAWLER_JOB_PAGES pages in memory for /api/jobs/{job_id}/results
+    app.state.jobs = JobManager(
+        crawler, max_concurrent_jobs=int(os.getenv("CRAWLER_MAX_JOBS", "2")),
+        finished_job_ttl=float(os.getenv("CRAWLER_JOB_TTL", "3600")),
+        max_pages_kept=int(os.getenv("CRAWLER_JOB_PAGES", "1000"))
+    )
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    await app.state.jobs.shutdown()
     crawler: EnhancedCrawlerClient = app.state.crawler
     await crawler.close()
 
-# --- API Endpoints ---
-@app.post("/api/scrape")
-async def scrape_website(request: Request):
+# --- Request Parsing ---
+# Optional scrape_stream keyword options accepted in request bodies
+CRAWL_OPTIONS = ("concurrency", "per_host_concurrency", "relevance_batch_size", "incremental",
+                 "strategy", "llm_link_scoring", "relevance_prefilter", "skip_near_duplicates",
+                 "seed_from_sitemaps")
+
+async def read_crawl_params(request: Request) -> Dict[str, Any]:
+    """Parse and validate the JSON body shared by the scrape and jobs endpoints."""
     try:
         body = await request.json()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
 
     url = body.get("url")
-    instructions = body.get("instructions", "Extract main content")
-    depth = body.get("depth", 0)
-    follow_external_links = body.get("follow_external_links", False)
-    max_pages = body.get("max_pages", 20)
-
     if not url:
         raise HTTPException(status_code=400, detail="URL is required")
 
+    params = {
+        "url": str(url),
+        "instructions": body.get("instructions", "Extract main content"),
+        "depth": body.get("depth", 0),
+        "follow_external_links": body.get("follow_external_links", False),
+        "max_pages": body.get("max_pages", 20),
+        "options": {key: body[key] for key in CRAWL_OPTIONS if body.get(key) is not None}
+    }
+    # Reject bad options here rather than with a 500 or a failed job once the crawl runs
+    crawler: EnhancedCrawlerClient = app.state.crawler
+    try:
+        crawler.validate_crawl_options(
+            instructions=params["instructions"], depth=params["depth"],
+            follow_external_links=params["follow_external_links"], max_pages=params["max_pages"],
+            **params["options"]
+        )
+    except ConfigurationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return params
+
+# --- API Endpoints ---
+@app.post("/api/scrape")
+async def scrape_website(request: Request):
+    params = await read_crawl_params(request)
     crawler: EnhancedCrawlerClient = app.state.crawler
 
     try:
-        if depth == 0:
-            result_data = await crawler.scrape_page(str(url), instructions)
+        if params["depth"] == 0:
+            result_data = await crawler.scrape_page(params["url"], params["instructions"])
             return {"status": "success", "data": [result_data]}
         else:
             result_data = await crawler.scrape(
-                str(url), instructions, depth, follow_external_links, max_pages
+                params["url"], params["instructions"], params["depth"],
+                params["follow_external_links"], params["max_pages"], **params["options"]
             )
             return {"status": "success", "data": result_data['pages']}
+    except ConfigurationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -80,6 +138,90 @@ async def scrape_website(request: Request):
         import gc
         gc.collect()
 
+@app.post("/api/scrape/stream")
+async def scrape_website_stream(request: Request):
+    """
+    Same parameters as /api/scrape, but results are streamed as NDJSON.
+
+    Each line is one JSON object: ``{"type": "page", "data": {...}}`` per scraped
+    page as soon as it completes, then ``{"type": "done", "meta": {...}}`` (or
+    ``{"type": "error", "detail": "..."}`` if the crawl fails part-way).
+    """
+    params = await read_crawl_params(request)
+    crawler: EnhancedCrawlerClient = app.state.crawler
+
+    async def ndjson_lines():
+        try:
+            if params["depth"] == 0:
+                page = await crawler.scrape_page(params["url"], params["instructions"])
+                yield json.dumps({"type": "page", "data": page}) + "\n"
+                yield json.dumps({"type": "done", "meta": {"url": params["url"], "pages_crawled": 1}}) + "\n"
+                return
+            meta: Dict[str, Any] = {}
+            async for page in crawler.scrape_stream(
+                params["url"], params["instructions"], params["depth"],
+                params["follow_external_links"], params["max_pages"],
+                meta=meta, **params["options"]
+            ):
+                yield json.dumps({"type": "page", "data": page}) + "\n"
+            yield json.dumps({"type": "done", "meta": meta}) + "\n"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield json.dumps({"type": "error", "detail": f"An unexpected error occurred: {e}"}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: Request):
+    """Start a crawl in the background and return its job ID immediately."""
+    params = await read_crawl_params(request)
+    job = app.state.jobs.submit(params)
+    return job.to_dict()
+
+@app.get("/api/jobs")
+async def list_jobs():
+    return {"jobs": [job.to_dict() for job in app.state.jobs.list()]}
+
+def get_job_or_404(job_id: str) -> CrawlJob:
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status and progress of a job."""
+    return get_job_or_404(job_id).to_dict()
+
+@app.get("/api/jobs/{job_id}/results")
+async def job_results(job_id: str, offset: int = 0):
+    """
+    Pages scraped so far; pass ``offset`` to fetch only pages not yet seen.
+
+    Jobs keep their most recent pages only; ``offset`` in the response is the index
+    of the first page returned, which is past the requested one if older pages were
+    dropped in the meantime.
+    """
+    job = get_job_or_404(job_id)
+    first, pages = job.pages_since(offset)
+    return {**job.to_dict(), "meta": job.meta, "offset": first, "data": pages}
+
+@app.post("/api/jobs/{job_id}/resume", status_code=202)
+async def resume_job(job_id: str):
+    """Continue a checkpointed job, e.g. after a server restart."""
+    job = app.state.jobs.resume(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No checkpoint for job {job_id}")
+    return job.to_dict()
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; pages scraped so far stay available."""
+    get_job_or_404(job_id)
+    job = await app.state.jobs.cancel(job_id)
+    return job.to_dict()
+
 @app.post("/api/download")
 async def download_results(request: Request):
     try:
@@ -130,7 +272,8 @@ async def read_root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "version": "0.1.0"}
+    # Parser queue depth shows when page parsing saturates its pool
+    return {"status": "ok", "version": "0.1.0", "parsing": app.state.crawler.parser.stats()}
 
 @app.get("/api/environment")
 async def environment_check():
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark URL canonicalization, which runs on every link the crawler discovers.
+
+Generates the links a docs site exposes (tracking parameters, session ids, reordered
+query strings, trailing slashes, default ports, ``index.html`` variants) and reports
+throughput and the number of distinct frontier keys for the plain fragment-stripping
+``url_key`` and for ``UrlCanonicalizer`` with and without its memo cache.
+
+Usage:
+    python benchmarks/canonicalize_bench.py --pages 5000 --links 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.canonical import UrlCanonicalizer
+from crawler.frontier import url_key
+
+
+def discovered_links(num_pages: int, num_links: int, seed: int = 0):
+    """
+    Links as found on pages: each one points to one of ``num_pages`` real pages,
+    spelled one of the ways real sites spell them. ``?lang=en&v=2`` is a real query,
+    so every page has two canonical URLs.
+    """
+    rng = random.Random(seed)
+    spellings = [
+        lambda p: f"https://docs.example.com/guide/{p}",
+        lambda p: f"https://docs.example.com/guide/{p}/",
+        lambda p: f"https://docs.example.com/guide/{p}/index.html",
+        lambda p: f"https://DOCS.example.com:443/guide/{p}#section-2",
+        lambda p: f"https://docs.example.com/guide/{p}?utm_source=newsletter&utm_medium=email",
+        lambda p: f"https://docs.example.com/guide/{p};jsessionid=A1B2C3D4",
+        lambda p: f"https://docs.example.com/guide/{p}?lang=en&v=2&fbclid=IwAR{rng.randrange(10**6)}",
+        lambda p: f"https://docs.example.com/guide/{p}?v=2&lang=en",
+    ]
+    links = []
+    linked = set()
+    for _ in range(num_links):
+        # Half are navigation links, which repeat on every page, half point anywhere
+        page = int(rng.paretovariate(1.2)) % num_pages if rng.random() < 0.5 else rng.randrange(num_pages)
+        linked.add(page)
+        links.append(rng.choice(spellings)(page))
+    return links, len(linked)
+
+
+def measure(label: str, func, links):
+    start = time.perf_counter()
+    keys = {func(link) for link in links}
+    elapsed = time.perf_counter() - start
+    rate = len(links) / elapsed if elapsed else float("inf")
+    print(f"{label:<32} {len(keys):>9} keys {elapsed:>8.3f}s {rate / 1e3:>9.0f}k links/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=5_000, help="distinct pages on the site")
+    parser.add_argument("--links", type=int, default=200_000, help="links discovered")
+    args = parser.parse_args()
+
+    links, linked = discovered_links(args.pages, args.links)
+    print(f"== {args.links} links to {linked} distinct pages ==")
+    measure("url_key (fragment and port only)", url_key, links)
+    measure("UrlCanonicalizer, no cache", UrlCanonicalizer(cache_size=0).canonicalize, links)
+    measure("UrlCanonicalizer, cached", UrlCanonicalizer().canonicalize, links)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Benchmark the crawl frontier against the original list-based queue.
+
+Simulates link discovery on a site where every page links to ``--fanout`` other
+pages (most of them already known), and reports enqueue throughput and memory
+for the legacy ``list.pop(0)`` + linear-scan queue, the exact seen-set frontier
+and the Bloom-filter frontier.
+
+Usage:
+    python benchmarks/frontier_bench.py --urls 100000 --fanout 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.frontier import CrawlFrontier
+
+
+def discovered_links(num_urls: int, fanout: int, seed: int = 0):
+    """
+    Yield the links found on each crawled page until num_urls distinct URLs are known.
+
+    Each page links to a few brand-new URLs plus already-known ones (navigation,
+    breadcrumbs), so the frontier grows much faster than pages are crawled.
+    """
+    rng = random.Random(seed)
+    known = 1
+    while known < num_urls:
+        new = min(max(fanout // 4, 1), num_urls - known)
+        links = [f"https://docs.example.com/page/{known + j}" for j in range(new)]
+        links += [f"https://docs.example.com/page/{rng.randrange(known)}" for _ in range(fanout - new)]
+        known += new
+        yield links
+
+
+def run_legacy(num_urls: int, fanout: int) -> int:
+    """The original scrape_async bookkeeping: list frontier and linear scans."""
+    visited = set()
+    url_queue = [("https://docs.example.com/page/0", 0)]
+    for links in discovered_links(num_urls, fanout):
+        current_url, _ = url_queue.pop(0) if url_queue else (None, 0)
+        visited.add(current_url)
+        for link in links:
+            if link in visited or any(link == u for u, _ in url_queue):
+                continue
+            url_queue.append((link, 1))
+    return len(visited) + len(url_queue)
+
+
+def run_frontier(num_urls: int, fanout: int, bloom_capacity=None) -> int:
+    frontier = CrawlFrontier(bloom_capacity=bloom_capacity)
+    frontier.add("https://docs.example.com/page/0", 0)
+    for links in discovered_links(num_urls, fanout):
+        if frontier:
+            frontier.pop()
+        for link in links:
+            frontier.add(link, 1)
+    return frontier.seen_count
+
+
+def measure(label: str, func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+    # Second run under tracemalloc, which would otherwise distort the timing
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {count:>10} urls {elapsed:>9.3f}s {peak / 1e6:>9.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=100_000, help="distinct URLs discovered")
+    parser.add_argument("--fanout", type=int, default=20, help="links extracted per page")
+    parser.add_argument("--legacy-limit", type=int, default=10_000,
+                        help="largest size to run the quadratic legacy queue at")
+    args = parser.parse_args()
+
+    for n in sorted({min(args.urls, 1_000), min(args.urls, 10_000), args.urls}):
+        print(f"\n== {n} URLs, fanout {args.fanout} ==")
+        if n <= args.legacy_limit:
+            measure("list + linear scan (legacy)", run_legacy, n, args.fanout)
+        else:
+            print(f"{'list + linear scan (legacy)':<28} skipped (quadratic)")
+        measure("deque + seen set", run_frontier, n, args.fanout)
+        measure("deque + bloom filter", run_frontier, n, args.fanout, n)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,70 @@
 import os
-from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 import json
-import logging
-from openai import OpenAI
+from urllib.parse import urlparse
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from .utils import setup_logger
+from .document import ParsedDocument
+from .exceptions import ConfigurationError
+from .content import build_llm_input, chunk_sections, count_tokens, main_content_sections, section_scores
+from .llm_cache import LLMCache
 from dotenv import load_dotenv
 
+# Model used for every completion made by the processor
+MODEL = "gpt-4o-mini-2024-07-18"
+
+# Bump whenever a prompt template changes so cached responses are not reused
+PROMPT_VERSION = 2
+
+EXTRACTION_SYSTEM = "You are a precise web content extraction assistant."
+
+
+def _merge_data(merged: Any, data: Any) -> Any:
+    """Merge two ``extracted_data`` values: objects key by key, lists without duplicates."""
+    if isinstance(merged, dict) and isinstance(data, dict):
+        result = dict(merged)
+        for key, value in data.items():
+            result[key] = _merge_data(result[key], value) if key in result else value
+        return result
+    if merged in (None, "", [], {}):
+        return data
+    if data in (None, "", [], {}) or data == merged:
+        return merged
+    # Conflicting or list values: keep every distinct value
+    values = merged if isinstance(merged, list) else [merged]
+    for value in data if isinstance(data, list) else [data]:
+        if value not in values:
+            values = values + [value]
+    return values
+
+
 class AiProcessor:
     """
     AI-powered content processor using OpenAI's models to analyze and extract
     information from web content based on user instructions.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_connections: int = 20,
+                 cache: Optional[LLMCache] = None, max_input_tokens: int = 2000,
+                 long_page_mode: str = "pack", map_concurrency: int = 4, max_chunks: int = 8):
         """
         Initialize the AI processor.
         
         Args:
             api_key: OpenAI API key (defaults to environment variable)
+            max_connections: Size of the HTTP connection pool shared by all async calls
+            cache: Optional persistent cache of completion responses
+            max_input_tokens: Token budget for the page content in extraction prompts
+            long_page_mode: What to do with pages whose main content exceeds the budget:
+                ``"pack"`` keeps the sections most relevant to the instructions,
+                ``"map_reduce"`` extracts from every chunk in parallel and merges the results
+            map_concurrency: Chunk extractions in flight at once for one page
+            max_chunks: Most chunks extracted per page; beyond that the chunks most
+                relevant to the instructions are used
         """
         self.logger = setup_logger("AiProcessor")
 
@@ -33,7 +80,138 @@ class AiProcessor:
             self.client = OpenAI(api_key=self.api_key)
         else:
             self.client = None
+
+        # The async client is created on first use and keeps one pooled set of
+        # HTTP connections that every concurrent completion reuses
+        self.max_connections = max_connections
+        self._async_client: Optional[AsyncOpenAI] = None
+
+        self.cache = cache
+        self.max_input_tokens = max_input_tokens
+        if long_page_mode not in ("pack", "map_reduce"):
+            raise ConfigurationError(f"Unknown long_page_mode: {long_page_mode}")
+        self.long_page_mode = long_page_mode
+        self.map_concurrency = max(1, map_concurrency)
+        self.max_chunks = max(1, max_chunks)
+
+    @property
+    def async_client(self) -> Optional[AsyncOpenAI]:
+        """Shared ``AsyncOpenAI`` client, or None when no API key is configured."""
+        if not self.api_key:
+            return None
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=10.0)
+                )
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Close the pooled HTTP connections held by the async client."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def _cache_key(self, system: str, prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
+        """Cache key for a completion, or None when caching is disabled."""
+        if self.cache is None:
+            return None
+        return LLMCache.make_key(
+            model=MODEL,
+            prompt_version=PROMPT_VERSION,
+            system=system,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
+    def _chat_json(self, system: str, prompt: str, temperature: float, max_tokens: int) -> Any:
+        """
+        Run a JSON-mode chat completion and return the decoded response.
+
+        Args:
+            system: System message
+            prompt: User message
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            The parsed JSON response
+        """
+        key = self._cache_key(system, prompt, temperature, max_tokens)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        result = json.loads(response.choices[0].message.content)
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+    async def _chat_json_async(self, system: str, prompt: str, temperature: float, max_tokens: int) -> Any:
+        """
+        Async version of :meth:`_chat_json` built on the pooled ``AsyncOpenAI`` client.
+
+        Cache lookups and writes are SQLite calls, so they run in a thread instead of
+        stalling the event loop.
+        """
+        key = self._cache_key(system, prompt, temperature, max_tokens)
+        if key is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        response = await self.async_client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        result = json.loads(response.choices[0].message.content)
+        if key is not None:
+            await asyncio.to_thread(self.cache.set, key, result)
+        return result
     
+    def _relevance_prompt(self, content: str, title: str, instructions: str) -> str:
+        """Build the user prompt for relevance analysis."""
+        return f"""
+            You are analyzing the relevance of a web page to a user's instructions.
+            
+            Page Title: {title}
+            
+            User Instructions: {instructions}
+            
+            Page Content (excerpt): {content[:2000]}...
+            
+            On a scale of 0.0 to 1.0, how relevant is this content to the user's instructions?
+            Provide your answer in the following JSON format:
+            {{
+                "relevance_score": 0.0 to 1.0,
+                "reasoning": "Brief explanation of why this content is or isn't relevant"
+            }}
+            """
+
     def analyze_relevance(self, 
                          content: str, 
                          title: str, 
@@ -54,49 +232,138 @@ class AiProcessor:
             return self._keyword_relevance(content, title, instructions)
         
         try:
-            # Prepare prompt for relevance analysis
-            prompt = f"""
-            You are analyzing the relevance of a web page to a user's instructions.
+            result = self._chat_json(
+                "You are a content relevance analyzer.",
+                self._relevance_prompt(content, title, instructions),
+                temperature=0.2,
+                max_tokens=150
+            )
+            return (
+                float(result.get("relevance_score", 0.5)), 
+                result.get("reasoning", "No reasoning provided")
+            )
             
-            Page Title: {title}
+        except Exception as e:
+            self.logger.error(f"Error using OpenAI for relevance analysis: {str(e)}")
+            # Fallback to simple keyword matching
+            return self._keyword_relevance(content, title, instructions)
+
+    async def analyze_relevance_async(self, 
+                                      content: str, 
+                                      title: str, 
+                                      instructions: str) -> Tuple[float, str]:
+        """Async version of :meth:`analyze_relevance`."""
+        if not self.async_client:
+            return self._keyword_relevance(content, title, instructions)
+        
+        try:
+            result = await self._chat_json_async(
+                "You are a content relevance analyzer.",
+                self._relevance_prompt(content, title, instructions),
+                temperature=0.2,
+                max_tokens=150
+            )
+            return (
+                float(result.get("relevance_score", 0.5)), 
+                result.get("reasoning", "No reasoning provided")
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error using OpenAI for relevance analysis: {str(e)}")
+            return self._keyword_relevance(content, title, instructions)
+    
+    def _batch_relevance_prompt(self, pages: List[Tuple[str, str]], instructions: str) -> str:
+        """Build the user prompt that scores several pages in one request."""
+        page_blocks = []
+        for i, (title, content) in enumerate(pages):
+            page_blocks.append(f"[Page {i}]\nTitle: {title}\nContent (excerpt): {content[:1000]}...")
+        pages_text = "\n\n".join(page_blocks)
+        return f"""
+            You are analyzing the relevance of several web pages to a user's instructions.
             
             User Instructions: {instructions}
             
-            Page Content (excerpt): {content[:2000]}...
+            {pages_text}
             
-            On a scale of 0.0 to 1.0, how relevant is this content to the user's instructions?
-            Provide your answer in the following JSON format:
+            For each page, rate on a scale of 0.0 to 1.0 how relevant it is to the user's instructions.
+            Provide your answer in the following JSON format, with one entry per page:
             {{
-                "relevance_score": 0.0 to 1.0,
-                "reasoning": "Brief explanation of why this content is or isn't relevant"
+                "results": [
+                    {{"id": 0, "relevance_score": 0.0 to 1.0, "reasoning": "Brief explanation"}}
+                ]
             }}
             """
+
+    def _parse_batch_relevance(self, result: Any, pages: List[Tuple[str, str]],
+                               instructions: str) -> List[Tuple[float, str]]:
+        """Map a batch response back onto the input pages, falling back to keywords for gaps."""
+        scored = {}
+        entries = result.get("results", []) if isinstance(result, dict) else []
+        for entry in entries:
+            try:
+                scored[int(entry["id"])] = (
+                    float(entry.get("relevance_score", 0.5)),
+                    entry.get("reasoning", "No reasoning provided")
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return [
+            scored.get(i) or self._keyword_relevance(content, title, instructions)
+            for i, (title, content) in enumerate(pages)
+        ]
+
+    def analyze_relevance_batch(self, 
+                                pages: List[Tuple[str, str]], 
+                                instructions: str) -> List[Tuple[float, str]]:
+        """
+        Score several pages against the same instructions with a single completion.
+        
+        Args:
+            pages: List of (title, content excerpt) pairs
+            instructions: User instructions
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=[
-                    {"role": "system", "content": "You are a content relevance analyzer."},
-                    {"role": "user", "content": prompt}
-                ],
+        Returns:
+            List of (relevance_score, reason) tuples in the same order as ``pages``
+        """
+        if not pages:
+            return []
+        if not self.client:
+            return [self._keyword_relevance(content, title, instructions) for title, content in pages]
+        
+        try:
+            result = self._chat_json(
+                "You are a content relevance analyzer.",
+                self._batch_relevance_prompt(pages, instructions),
                 temperature=0.2,
-                max_tokens=150,
-                response_format={"type": "json_object"}
+                max_tokens=80 * len(pages) + 50
             )
+            return self._parse_batch_relevance(result, pages, instructions)
             
-            # Extract and parse the response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-            
-            return (
-                float(result.get("relevance_score", 0.5)), 
-                result.get("reasoning", "No reasoning provided")
+        except Exception as e:
+            self.logger.error(f"Error using OpenAI for batch relevance analysis: {str(e)}")
+            return [self._keyword_relevance(content, title, instructions) for title, content in pages]
+
+    async def analyze_relevance_batch_async(self, 
+                                            pages: List[Tuple[str, str]], 
+                                            instructions: str) -> List[Tuple[float, str]]:
+        """Async version of :meth:`analyze_relevance_batch`."""
+        if not pages:
+            return []
+        if not self.async_client:
+            return [self._keyword_relevance(content, title, instructions) for title, content in pages]
+        
+        try:
+            result = await self._chat_json_async(
+                "You are a content relevance analyzer.",
+                self._batch_relevance_prompt(pages, instructions),
+                temperature=0.2,
+                max_tokens=80 * len(pages) + 50
             )
+            return self._parse_batch_relevance(result, pages, instructions)
             
         except Exception as e:
-            self.logger.error(f"Error using OpenAI for relevance analysis: {str(e)}")
-            # Fallback to simple keyword matching
-            return self._keyword_relevance(content, title, instructions)
+            self.logger.error(f"Error using OpenAI for batch relevance analysis: {str(e)}")
+            return [self._keyword_relevance(content, title, instructions) for title, content in pages]
     
     def _keyword_relevance(self, content: str, title: str, instructions: str) -> Tuple[float, str]:
         """
@@ -148,9 +415,56 @@ class AiProcessor:
             reason = "Low keyword match"
             
         return (score, reason)
+
+    def _as_document(self, document: Union[ParsedDocument, str], url: str) -> ParsedDocument:
+        """Accept either a ParsedDocument or raw HTML, parsing the latter."""
+        if isinstance(document, ParsedDocument):
+            return document
+        return ParsedDocument.from_html(document, url=url)
+
+    def _extraction_input(self, document: ParsedDocument, url: str, instructions: str) -> str:
+        """
+        Main content only, with the sections that best match the instructions packed
+        into the token budget.
+
+        Tokenizing is CPU-bound (and tiktoken may download its encoding on first use),
+        so the async path runs this in a worker thread.
+        """
+        llm_input = build_llm_input(document, instructions, max_tokens=self.max_input_tokens, model=MODEL)
+        self.logger.debug(
+            f"Extraction input for {url}: {llm_input['tokens']} of {llm_input['page_tokens']} page tokens, "
+            f"{llm_input['sections_used']}/{llm_input['sections']} sections"
+        )
+        return llm_input["text"]
+
+    def _extraction_prompt(self, document: ParsedDocument, title: str, url: str, instructions: str,
+                           content: Optional[str] = None, part: Optional[Tuple[int, int]] = None) -> str:
+        """Build the user prompt for structured content extraction (of one chunk, with ``part``)."""
+        text_content = content if content is not None else self._extraction_input(document, url, instructions)
+        content_label = f"Page Content (part {part[0]} of {part[1]})" if part else "Page Content"
+            
+        return f"""
+            You are extracting specific information from a web page based on user instructions.
+            
+            URL: {url}
+            Page Title: {title}
+            User Instructions: "{instructions}"
+            
+            {content_label}:
+            {text_content}
+            
+            Based on the user's instructions, extract the most relevant information from this page.
+            Format your response as JSON with these fields:
+            1. "summary": A short summary of the page relevant to the instructions (2-3 sentences)
+            2. "key_points": List of key points relevant to the instructions (up to 5 points)
+            3. "relevance_score": Number from 0-1 indicating relevance to instructions
+            4. "extracted_data": Any specific data mentioned in the instructions (object format)
+            
+            Only include information explicitly found on the page.
+            """
     
     def extract_structured_content(self, 
-                                  html_content: str, 
+                                  document: Union[ParsedDocument, str], 
                                   title: str, 
                                   url: str, 
                                   instructions: str) -> Dict[str, Any]:
@@ -158,7 +472,7 @@ class AiProcessor:
         Use AI to extract structured content based on user instructions.
         
         Args:
-            html_content: Raw HTML content
+            document: The parsed page (raw HTML is accepted and parsed on the fly)
             title: Page title
             url: Page URL
             instructions: User instructions
@@ -166,60 +480,86 @@ class AiProcessor:
         Returns:
             Structured data based on instructions
         """
+        document = self._as_document(document, url)
         if not self.client:
             # Return basic extraction if no API key
-            return self._basic_extraction(html_content, title, url)
+            return self._basic_extraction(document, title, url)
         
         try:
-            # Clean HTML to plain text (simplified for example)
-            import re
-            from bs4 import BeautifulSoup
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            text_content = soup.get_text(separator='\n', strip=True)
-            
-            # Truncate if too long
-            if len(text_content) > 8000:
-                text_content = text_content[:8000] + "..."
-                
-            # Prepare prompt for content extraction
-            prompt = f"""
-            You are extracting specific information from a web page based on user instructions.
-            
-            URL: {url}
-            Page Title: {title}
-            User Instructions: "{instructions}"
-            
-            Page Content:
-            {text_content}
-            
-            Based on the user's instructions, extract the most relevant information from this page.
-            Format your response as JSON with these fields:
-            1. "summary": A short summary of the page relevant to the instructions (2-3 sentences)
-            2. "key_points": List of key points relevant to the instructions (up to 5 points)
-            3. "relevance_score": Number from 0-1 indicating relevance to instructions
-            4. "extracted_data": Any specific data mentioned in the instructions (object format)
+            chunks = self._extraction_chunks(document, instructions)
+            if chunks is not None:
+                prompts = [
+                    self._extraction_prompt(document, title, url, instructions, content=chunk, part=(i + 1, len(chunks)))
+                    for i, chunk in enumerate(chunks)
+                ]
+                with ThreadPoolExecutor(max_workers=self.map_concurrency) as pool:
+                    futures = [pool.submit(self._chat_json, EXTRACTION_SYSTEM, prompt, 0.2, 1000)
+                               for prompt in prompts]
+                    partials = [self._future_result(future, url) for future in futures]
+                result = self._merge_extractions(partials, len(chunks))
+            else:
+                result = self._chat_json(
+                    EXTRACTION_SYSTEM,
+                    self._extraction_prompt(document, title, url, instructions),
+                    temperature=0.2,
+                    max_tokens=1000
+                )
             
-            Only include information explicitly found on the page.
-            """
+            # Add metadata to result
+            result["source_url"] = url
+            result["source_title"] = title
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18", 
-                messages=[
-                    {"role": "system", "content": "You are a precise web content extraction assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=1000,
-                response_format={"type": "json_object"}
-            )
+            return result
             
-            # Extract the response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
+        except Exception as e:
+            self.logger.error(f"Error using OpenAI for content extraction: {str(e)}")
+            # Fallback to basic extraction
+            return self._basic_extraction(document, title, url)
+
+    async def extract_structured_content_async(self, 
+                                               document: Union[ParsedDocument, str], 
+                                               title: str, 
+                                               url: str, 
+                                               instructions: str) -> Dict[str, Any]:
+        """Async version of :meth:`extract_structured_content`."""
+        document = self._as_document(document, url)
+        if not self.async_client:
+            return self._basic_extraction(document, title, url)
+        
+        try:
+            chunks = await asyncio.to_thread(self._extraction_chunks, document, instructions)
+            if chunks is not None:
+                semaphore = asyncio.Semaphore(self.map_concurrency)
+
+                async def extract_chunk(index: int, chunk: str) -> Any:
+                    async with semaphore:
+                        return await self._chat_json_async(
+                            EXTRACTION_SYSTEM,
+                            self._extraction_prompt(document, title, url, instructions,
+                                                    content=chunk, part=(index + 1, len(chunks))),
+                            temperature=0.2,
+                            max_tokens=1000
+                        )
+
+                outcomes = await asyncio.gather(
+                    *(extract_chunk(i, chunk) for i, chunk in enumerate(chunks)), return_exceptions=True
+                )
+                partials = []
+                for outcome in outcomes:
+                    if isinstance(outcome, Exception):
+                        self.logger.error(f"Chunk extraction failed for {url}: {outcome}")
+                        outcome = None
+                    partials.append(outcome)
+                result = self._merge_extractions(partials, len(chunks))
+            else:
+                content = await asyncio.to_thread(self._extraction_input, document, url, instructions)
+                result = await self._chat_json_async(
+                    EXTRACTION_SYSTEM,
+                    self._extraction_prompt(document, title, url, instructions, content=content),
+                    temperature=0.2,
+                    max_tokens=1000
+                )
             
-            # Add metadata to result
             result["source_url"] = url
             result["source_title"] = title
             
@@ -227,46 +567,114 @@ class AiProcessor:
             
         except Exception as e:
             self.logger.error(f"Error using OpenAI for content extraction: {str(e)}")
-            # Fallback to basic extraction
-            return self._basic_extraction(html_content, title, url)
+            return self._basic_extraction(document, title, url)
     
-    def _basic_extraction(self, html_content: str, title: str, url: str) -> Dict[str, Any]:
+    def _extraction_chunks(self, document: ParsedDocument, instructions: str) -> Optional[List[str]]:
+        """
+        Split a long page's main content for map-reduce extraction.
+
+        Chunks are packed from whole sections on measured token counts, so none
+        exceeds ``max_input_tokens``. Tokenizing is CPU-bound, so the async path runs
+        this in a worker thread.
+
+        Returns:
+            The chunks, or None when one prompt covers the page (or map-reduce is off)
+        """
+        if self.long_page_mode != "map_reduce":
+            return None
+        sections = main_content_sections(document)
+        if count_tokens("\n\n".join(sections), MODEL) <= self.max_input_tokens:
+            return None
+
+        chunks = chunk_sections(sections, self.max_input_tokens, MODEL)
+        if len(chunks) > self.max_chunks:
+            scores = section_scores(chunks, instructions)
+            best = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))[:self.max_chunks]
+            self.logger.info(f"Extracting the {self.max_chunks} most relevant of {len(chunks)} chunks")
+            chunks = [chunks[i] for i in sorted(best)]
+        return chunks
+
+    def _future_result(self, future, url: str) -> Any:
+        """Result of a chunk extraction, or None if it failed."""
+        try:
+            return future.result()
+        except Exception as e:
+            self.logger.error(f"Chunk extraction failed for {url}: {str(e)}")
+            return None
+
+    def _merge_extractions(self, partials: List[Any], chunk_count: int) -> Dict[str, Any]:
+        """
+        Merge per-chunk extractions without another LLM call.
+
+        The summaries of the two most relevant chunks are kept in page order, key points
+        are deduplicated (most relevant chunks first) and ``extracted_data`` objects are
+        merged key by key.
+
+        Raises:
+            ValueError: If no chunk produced a result
+        """
+        results = [(i, partial) for i, partial in enumerate(partials) if isinstance(partial, dict)]
+        if not results:
+            raise ValueError("every chunk extraction failed")
+
+        def relevance(item) -> float:
+            try:
+                return float(item[1].get("relevance_score", 0) or 0)
+            except (TypeError, ValueError):
+                return 0.0
+
+        ranked = sorted(results, key=relevance, reverse=True)
+        summaries = []
+        for _, partial in sorted(ranked[:2], key=lambda item: item[0]):
+            summary = str(partial.get("summary") or "").strip()
+            if summary and summary not in summaries:
+                summaries.append(summary)
+
+        key_points = []
+        seen_points = set()
+        for _, partial in ranked:
+            points = partial.get("key_points") or []
+            for point in points if isinstance(points, list) else [points]:
+                normalized = " ".join(str(point).lower().split())
+                if normalized and normalized not in seen_points:
+                    seen_points.add(normalized)
+                    key_points.append(point)
+
+        extracted_data: Dict[str, Any] = {}
+        for _, partial in ranked:
+            data = partial.get("extracted_data")
+            if isinstance(data, dict):
+                extracted_data = _merge_data(extracted_data, data)
+
+        return {
+            "summary": " ".join(summaries),
+            "key_points": key_points[:10],
+            "relevance_score": relevance(ranked[0]),
+            "extracted_data": extracted_data,
+            "chunks": chunk_count,
+            "chunks_extracted": len(results)
+        }
+
+    def _basic_extraction(self, document: ParsedDocument, title: str, url: str) -> Dict[str, Any]:
         """
         Basic content extraction as a fallback.
         
         Args:
-            html_content: Raw HTML content
+            document: The parsed page
             title: Page title
             url: Page URL
             
         Returns:
             Basic extracted content
         """
-        from bs4 import BeautifulSoup
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract paragraphs
-        paragraphs = []
-        for p in soup.find_all('p'):
-            if p.text and len(p.text.strip()) > 50:  # Only substantial paragraphs
-                paragraphs.append(p.text.strip())
-        
-        # Extract headings
-        headings = []
-        for h in soup.find_all(['h1', 'h2', 'h3']):
-            if h.text and len(h.text.strip()) > 0:
-                headings.append(h.text.strip())
+        # Substantial paragraphs, headings and list items were collected while parsing
+        paragraphs = document.paragraphs
+        headings = document.headings
+        list_items = document.list_items
         
         # Create a simple summary
         summary = f"Page titled '{title}' with {len(paragraphs)} paragraphs and {len(headings)} headings."
         
-        # Extract any lists
-        list_items = []
-        for li in soup.find_all('li'):
-            if li.text and len(li.text.strip()) > 10:
-                list_items.append(li.text.strip())
-        
         return {
             "source_url": url,
             "source_title": title,
@@ -276,6 +684,31 @@ class AiProcessor:
             "paragraphs": paragraphs[:10],  # First 10 paragraphs
             "list_items": list_items[:20]  # First 20 list items
         }
+
+    def _search_queries_prompt(self, instructions: str, base_url: str, depth: int) -> str:
+        """Build the user prompt for search query generation."""
+        return f"""
+            You are helping generate effective site-specific search queries based on user instructions.
+            
+            User Instructions: "{instructions}"
+            Base Website URL: {base_url}
+            Crawl Depth: {depth}
+            
+            Generate 3-5 specific search queries that would be effective for finding pages on this website
+            that match the user's instructions. Format them as Google search queries including site: operator.
+            
+            Format your response as a JSON array of strings.
+            """
+
+    def _parse_search_queries(self, result: Any, instructions: str, base_url: str) -> List[str]:
+        """Normalize the model's search query response into a list of strings."""
+        if isinstance(result, list):
+            return result
+        elif isinstance(result, dict) and "queries" in result:
+            return result["queries"]
+        else:
+            # Fallback if response format is unexpected
+            return [f"site:{base_url} {instructions}"]
     
     def generate_search_queries(self, instructions: str, base_url: str, depth: int) -> List[str]:
         """
@@ -294,49 +727,79 @@ class AiProcessor:
             return [f"site:{base_url} {instructions}"]
         
         try:
-            # Prepare prompt for query generation
-            prompt = f"""
-            You are helping generate effective site-specific search queries based on user instructions.
-            
-            User Instructions: "{instructions}"
-            Base Website URL: {base_url}
-            Crawl Depth: {depth}
-            
-            Generate 3-5 specific search queries that would be effective for finding pages on this website
-            that match the user's instructions. Format them as Google search queries including site: operator.
-            
-            Format your response as a JSON array of strings.
-            """
-            
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=[
-                    {"role": "system", "content": "You are a search query optimization assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+            result = self._chat_json(
+                "You are a search query optimization assistant.",
+                self._search_queries_prompt(instructions, base_url, depth),
                 temperature=0.7,  # Higher temperature for more variety
-                max_tokens=200,
-                response_format={"type": "json_object"}
+                max_tokens=200
             )
-            
-            # Extract and parse the response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-            
-            if isinstance(result, list):
-                return result
-            elif isinstance(result, dict) and "queries" in result:
-                return result["queries"]
-            else:
-                # Fallback if response format is unexpected
-                return [f"site:{base_url} {instructions}"]
+            return self._parse_search_queries(result, instructions, base_url)
             
         except Exception as e:
             self.logger.error(f"Error using OpenAI for query generation: {str(e)}")
             # Fallback to basic query
             return [f"site:{base_url} {instructions}"]
 
+    async def generate_search_queries_async(self, instructions: str, base_url: str, depth: int) -> List[str]:
+        """Async version of :meth:`generate_search_queries`."""
+        if not self.async_client:
+            return [f"site:{base_url} {instructions}"]
+        
+        try:
+            result = await self._chat_json_async(
+                "You are a search query optimization assistant.",
+                self._search_queries_prompt(instructions, base_url, depth),
+                temperature=0.7,
+                max_tokens=200
+            )
+            return self._parse_search_queries(result, instructions, base_url)
+            
+        except Exception as e:
+            self.logger.error(f"Error using OpenAI for query generation: {str(e)}")
+            return [f"site:{base_url} {instructions}"]
+
+    def _dynamic_content_diff(self, before_html: str, after_html: str) -> Tuple[str, str, float]:
+        """
+        Extract comparable text from HTML before and after JavaScript execution.
+
+        Returns:
+            Tuple of (before_text, after_text, text_diff_percent)
+        """
+        before_text = ParsedDocument.from_html(before_html).text
+        after_text = ParsedDocument.from_html(after_html).text
+        
+        # For very large pages, truncate text for comparison
+        before_text = before_text[:10000]
+        after_text = after_text[:10000]
+        
+        # Calculate basic text length difference
+        len_before = len(before_text)
+        len_after = len(after_text)
+        text_diff_percent = ((len_after - len_before) / len_before * 100) if len_before > 0 else 0
+        return before_text, after_text, text_diff_percent
+
+    def _dynamic_content_prompt(self, before_text: str, after_text: str, instructions: str) -> str:
+        """Build the user prompt for dynamic content analysis."""
+        return f"""
+            You are analyzing the difference between a webpage before and after JavaScript execution.
+            
+            User Instructions: "{instructions}"
+            
+            Text content BEFORE JavaScript (excerpt):
+            {before_text[:2000]}...
+            
+            Text content AFTER JavaScript (excerpt):
+            {after_text[:2000]}...
+            
+            Analyze what significant content was added dynamically. 
+            Focus on content that might be relevant to the user's instructions.
+            
+            Format your response as JSON with these fields:
+            1. "has_dynamic_content": boolean, true if significant content was added
+            2. "relevance_to_instructions": 0-1 score indicating relevance of dynamic content to instructions
+            3. "dynamic_content_summary": Brief summary of key dynamic content added (1-2 sentences)
+            4. "wait_for_selectors": Array of likely CSS selectors for important dynamically loaded content
+            """
 
     def analyze_dynamic_content(self, 
                             before_html: str, 
@@ -356,25 +819,10 @@ class AiProcessor:
         """
         if not self.client:
             return {"has_dynamic_content": False, "explanation": "No API key available for AI analysis"}
-            
+
+        text_diff_percent = 0
         try:
-            # Use BeautifulSoup to get text content
-            from bs4 import BeautifulSoup
-            
-            before_soup = BeautifulSoup(before_html, 'html.parser')
-            after_soup = BeautifulSoup(after_html, 'html.parser')
-            
-            before_text = before_soup.get_text(separator='\n', strip=True)
-            after_text = after_soup.get_text(separator='\n', strip=True)
-            
-            # For very large pages, truncate text for comparison
-            before_text = before_text[:10000]
-            after_text = after_text[:10000]
-            
-            # Calculate basic text length difference
-            len_before = len(before_text)
-            len_after = len(after_text)
-            text_diff_percent = ((len_after - len_before) / len_before * 100) if len_before > 0 else 0
+            before_text, after_text, text_diff_percent = self._dynamic_content_diff(before_html, after_html)
             
             # If minimal difference, no need for AI analysis
             if abs(text_diff_percent) < 5:
@@ -384,64 +832,121 @@ class AiProcessor:
                     "text_diff_percent": text_diff_percent
                 }
             
-            # Prepare prompt for deeper AI analysis
-            prompt = f"""
-            You are analyzing the difference between a webpage before and after JavaScript execution.
-            
-            User Instructions: "{instructions}"
-            
-            Text content BEFORE JavaScript (excerpt):
-            {before_text[:2000]}...
+            result = self._chat_json(
+                "You analyze dynamic web content differences.",
+                self._dynamic_content_prompt(before_text, after_text, instructions),
+                temperature=0.2,
+                max_tokens=400
+            )
             
-            Text content AFTER JavaScript (excerpt):
-            {after_text[:2000]}...
+            # Add basic stats to the result
+            result["text_diff_percent"] = text_diff_percent
+            result["before_length"] = len(before_text)
+            result["after_length"] = len(after_text)
             
-            Analyze what significant content was added dynamically. 
-            Focus on content that might be relevant to the user's instructions.
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"Error analyzing dynamic content: {str(e)}")
+            return {
+                "has_dynamic_content": text_diff_percent > 10,
+                "explanation": f"Error during analysis: {str(e)}",
+                "text_diff_percent": text_diff_percent
+            }
+
+    async def analyze_dynamic_content_async(self, 
+                                            before_html: str, 
+                                            after_html: str, 
+                                            instructions: str) -> Dict[str, Any]:
+        """Async version of :meth:`analyze_dynamic_content`."""
+        if not self.async_client:
+            return {"has_dynamic_content": False, "explanation": "No API key available for AI analysis"}
+
+        text_diff_percent = 0
+        try:
+            before_text, after_text, text_diff_percent = self._dynamic_content_diff(before_html, after_html)
             
-            Format your response as JSON with these fields:
-            1. "has_dynamic_content": boolean, true if significant content was added
-            2. "relevance_to_instructions": 0-1 score indicating relevance of dynamic content to instructions
-            3. "dynamic_content_summary": Brief summary of key dynamic content added (1-2 sentences)
-            4. "wait_for_selectors": Array of likely CSS selectors for important dynamically loaded content
-            """
+            if abs(text_diff_percent) < 5:
+                return {
+                    "has_dynamic_content": False,
+                    "explanation": f"Minimal content difference ({text_diff_percent:.1f}%)",
+                    "text_diff_percent": text_diff_percent
+                }
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=[
-                    {"role": "system", "content": "You analyze dynamic web content differences."},
-                    {"role": "user", "content": prompt}
-                ],
+            result = await self._chat_json_async(
+                "You analyze dynamic web content differences.",
+                self._dynamic_content_prompt(before_text, after_text, instructions),
                 temperature=0.2,
-                max_tokens=400,
-                response_format={"type": "json_object"}
+                max_tokens=400
             )
             
-            # Extract the response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-            
-            # Add basic stats to the result
             result["text_diff_percent"] = text_diff_percent
-            result["before_length"] = len_before
-            result["after_length"] = len_after
+            result["before_length"] = len(before_text)
+            result["after_length"] = len(after_text)
             
             return result
         
         except Exception as e:
             self.logger.error(f"Error analyzing dynamic content: {str(e)}")
             return {
-                "has_dynamic_content": text_diff_percent > 10 if 'text_diff_percent' in locals() else False,
+                "has_dynamic_content": text_diff_percent > 10,
                 "explanation": f"Error during analysis: {str(e)}",
-                "text_diff_percent": text_diff_percent if 'text_diff_percent' in locals() else 0
+                "text_diff_percent": text_diff_percent
             }
 
+    def _prioritize_links_prompt(self, links: List[str], page_title: str, current_url: str,
+                                 instructions: str, anchors: Optional[Dict[str, str]] = None) -> str:
+        """Build the user prompt for link prioritization."""
+        # Extract link texts and paths for analysis
+        link_info = []
+        for link in links:
+            path = urlparse(link).path
+            # Convert path to readable text (e.g. '/products/details' -> 'products details')
+            link_text = ' '.join([part for part in path.split('/') if part])
+            info = {"url": link, "text": link_text}
+            if anchors and anchors.get(link):
+                info["anchor"] = anchors[link]
+            link_info.append(info)
+        
+        return f"""
+            You are prioritizing which links to follow when crawling a website based on user instructions.
+            
+            Current page: "{page_title}" at {current_url}
+            
+            User instructions: "{instructions}"
+            
+            Links to prioritize:
+            {json.dumps(link_info, indent=2)}
+            
+            Based on the user instructions and link information, rank each link's relevance from 0.0 to 1.0.
+            Higher scores mean more likely to contain relevant information.
+            
+            Format your response as a JSON object with the URL as key and relevance score as value.
+            Example: {{"https://example.com/page1": 0.8, "https://example.com/page2": 0.3}}
+            """
+
+    def _parse_prioritized_links(self, result: Dict[str, Any], links: List[str]) -> List[Tuple[str, float]]:
+        """Turn the model's URL -> score mapping into a sorted list covering every link."""
+        # Convert to list of tuples and add any missing links with default score
+        prioritized_links = [(url, score) for url, score in result.items()]
+        
+        # Sort by score in descending order
+        prioritized_links.sort(key=lambda x: x[1], reverse=True)
+        
+        # Add any links that weren't in the first 20 with a default score
+        scored_urls = [url for url, _ in prioritized_links]
+        for link in links:
+            if link not in scored_urls:
+                prioritized_links.append((link, 0.1))  # Low default priority
+        
+        return prioritized_links
+
     def prioritize_links(self, 
                         links: List[str], 
                         page_title: str, 
                         current_url: str,
-                        instructions: str) -> List[Tuple[str, float]]:
+                        instructions: str,
+                        anchors: Optional[Dict[str, str]] = None) -> List[Tuple[str, float]]:
         """
         Prioritize links based on relevance to instructions.
         
@@ -450,6 +955,7 @@ class AiProcessor:
             page_title: Title of the current page
             current_url: URL of the current page
             instructions: User instructions
+            anchors: Optional link URL -> anchor text, shown to the model
             
         Returns:
             List of (url, score) tuples sorted by relevance
@@ -459,64 +965,37 @@ class AiProcessor:
         
         try:
             # Limit to 20 links for API efficiency
-            links_to_analyze = links[:20]
-            
-            # Extract link texts and paths for analysis
-            link_info = []
-            for link in links_to_analyze:
-                path = urlparse(link).path
-                # Convert path to readable text (e.g. '/products/details' -> 'products details')
-                link_text = ' '.join([part for part in path.split('/') if part])
-                link_info.append({"url": link, "text": link_text})
-            
-            # Prepare prompt for link prioritization
-            prompt = f"""
-            You are prioritizing which links to follow when crawling a website based on user instructions.
-            
-            Current page: "{page_title}" at {current_url}
-            
-            User instructions: "{instructions}"
-            
-            Links to prioritize:
-            {json.dumps(link_info, indent=2)}
-            
-            Based on the user instructions and link information, rank each link's relevance from 0.0 to 1.0.
-            Higher scores mean more likely to contain relevant information.
-            
-            Format your response as a JSON object with the URL as key and relevance score as value.
-            Example: {{"https://example.com/page1": 0.8, "https://example.com/page2": 0.3}}
-            """
-            
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=[
-                    {"role": "system", "content": "You prioritize links based on relevance to instructions."},
-                    {"role": "user", "content": prompt}
-                ],
+            result = self._chat_json(
+                "You prioritize links based on relevance to instructions.",
+                self._prioritize_links_prompt(links[:20], page_title, current_url, instructions, anchors),
                 temperature=0.3,
-                max_tokens=400,
-                response_format={"type": "json_object"}
+                max_tokens=400
             )
-            
-            # Extract the response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-            
-            # Convert to list of tuples and add any missing links with default score
-            prioritized_links = [(url, score) for url, score in result.items()]
-            
-            # Sort by score in descending order
-            prioritized_links.sort(key=lambda x: x[1], reverse=True)
-            
-            # Add any links that weren't in the first 20 with a default score
-            scored_urls = [url for url, _ in prioritized_links]
-            for link in links:
-                if link not in scored_urls:
-                    prioritized_links.append((link, 0.1))  # Low default priority
-            
-            return prioritized_links
+            return self._parse_prioritized_links(result, links)
+        
+        except Exception as e:
+            self.logger.error(f"Error prioritizing links: {str(e)}")
+            return [(link, 0.5) for link in links]  # Default equal priority
+
+    async def prioritize_links_async(self, 
+                                     links: List[str], 
+                                     page_title: str, 
+                                     current_url: str,
+                                     instructions: str,
+                                     anchors: Optional[Dict[str, str]] = None) -> List[Tuple[str, float]]:
+        """Async version of :meth:`prioritize_links`."""
+        if not self.async_client or not links:
+            return [(link, 0.5) for link in links]
+        
+        try:
+            result = await self._chat_json_async(
+                "You prioritize links based on relevance to instructions.",
+                self._prioritize_links_prompt(links[:20], page_title, current_url, instructions, anchors),
+                temperature=0.3,
+                max_tokens=400
+            )
+            return self._parse_prioritized_links(result, links)
         
         except Exception as e:
             self.logger.error(f"Error prioritizing links: {str(e)}")
-            return [(link, 0.5) for link in links]  # Default equal priority
\ No newline at end of file
+            return [(link, 0.5) for link in links]
@@ -0,0 +1,88 @@
+# crawler/batching.py
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import setup_logger
+
+
+class RelevanceBatcher:
+    """
+    Collects relevance requests from concurrent crawl workers into micro-batches.
+
+    Each call to :meth:`score` waits until either ``max_batch_size`` pages are pending
+    or ``max_wait`` seconds have passed since the first pending page, then the whole
+    batch is scored with one ``analyze_relevance_batch_async`` request and every
+    caller gets its own result.
+    """
+
+    def __init__(self, ai_processor, instructions: str, max_batch_size: int = 10, max_wait: float = 0.5):
+        """
+        Args:
+            ai_processor: The AiProcessor used to score batches
+            instructions: User instructions every page is scored against
+            max_batch_size: Flush as soon as this many pages are pending
+            max_wait: Flush a partial batch after this many seconds
+        """
+        self.logger = setup_logger("RelevanceBatcher")
+        self.ai_processor = ai_processor
+        self.instructions = instructions
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches_sent = 0
+        self.pages_scored = 0
+
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def score(self, title: str, content: str) -> Tuple[float, str]:
+        """
+        Queue one page for scoring and wait for its batch to complete.
+
+        Returns:
+            Tuple of (relevance_score, reason)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((title, content, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything pending as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        pages = [(title, content) for title, content, _ in batch]
+        try:
+            results = await self.ai_processor.analyze_relevance_batch_async(pages, self.instructions)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.pages_scored += len(batch)
+        self.logger.info(f"Scored {len(batch)} pages in one relevance request")
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of batch requests sent and pages scored through them."""
+        return {"batches_sent": self.batches_sent, "pages_scored": self.pages_scored}
@@ -0,0 +1,248 @@
+# crawler/browser_pool.py
+
+import asyncio
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+
+from .utils import setup_logger
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil ships with crawl4ai but is optional here
+    psutil = None
+
+# Error fragments that mean the tab or the whole browser is gone
+BROKEN_BROWSER_MARKERS = (
+    "target closed",
+    "target page, context or browser has been closed",
+    "browser has been closed",
+    "page crashed",
+    "browser closed",
+    "connection closed",
+)
+
+
+class BrowserPool:
+    """
+    A bounded pool of reusable browser tabs on one ``AsyncWebCrawler``.
+
+    Each slot is a crawl4ai session: a tab (and its context) that stays open between
+    pages, so fetching a page does not pay for creating and tearing down a tab.
+    Callers check a slot out for one page and check it back in. A tab is closed and
+    replaced after ``max_uses`` pages or as soon as it looks broken, and the whole
+    browser is restarted once it has served ``recycle_after`` pages or its processes
+    exceed ``max_memory_mb``. Restarts wait for in-flight pages to finish, so
+    long-running servers keep a stable footprint.
+    """
+
+    def __init__(self,
+                 browser_config: BrowserConfig,
+                 size: int = 8,
+                 max_uses: int = 50,
+                 recycle_after: Optional[int] = 2000,
+                 max_memory_mb: Optional[float] = None):
+        """
+        Args:
+            browser_config: Configuration used to launch the browser
+            size: Maximum number of tabs open at the same time
+            max_uses: Pages served by one tab before it is replaced
+            recycle_after: Pages served by the browser before it is restarted
+            max_memory_mb: Restart the browser when its processes use more than this
+                (requires psutil)
+        """
+        self.logger = setup_logger("BrowserPool")
+        self.browser_config = browser_config
+        self.size = size
+        self.max_uses = max_uses
+        self.recycle_after = recycle_after
+        self.max_memory_mb = max_memory_mb
+
+        self._crawler: Optional[AsyncWebCrawler] = None
+        self._free: Optional[asyncio.Queue] = None
+        self._uses: Dict[str, int] = {}
+        self._open_sessions = set()
+        self._active = 0
+        self._pages_since_restart = 0
+        self._accepting: Optional[asyncio.Event] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self.restarts = 0
+        self.sessions_replaced = 0
+
+    @property
+    def started(self) -> bool:
+        return self._crawler is not None
+
+    def _create_crawler(self) -> AsyncWebCrawler:
+        return AsyncWebCrawler(config=self.browser_config)
+
+    async def start(self) -> None:
+        """Launch the browser and create the slots. Safe to call more than once."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._crawler is not None:
+                return
+            crawler = self._create_crawler()
+            await crawler.start()
+            self._crawler = crawler
+            # The queue and event outlive restarts: callers may already be waiting on them
+            if self._free is None:
+                self._free = asyncio.Queue()
+                self._accepting = asyncio.Event()
+            while not self._free.empty():
+                self._free.get_nowait()
+            self._uses = {}
+            for _ in range(self.size):
+                self._free.put_nowait(self._new_session_id())
+            self._pages_since_restart = 0
+            self._accepting.set()
+            self.logger.info(f"Browser pool started with {self.size} slots")
+
+    async def close(self) -> None:
+        """Close every tab and the browser."""
+        if self._crawler is None:
+            return
+        crawler, self._crawler = self._crawler, None
+        for session_id in list(self._open_sessions):
+            await self._kill_session(crawler, session_id)
+        try:
+            await crawler.close()
+        except Exception as e:
+            self.logger.warning(f"Error while closing browser: {e}")
+        self.logger.info("Browser pool closed")
+
+    async def restart(self, browser_config: Optional[BrowserConfig] = None) -> None:
+        """
+        Replace the browser (optionally with a new configuration) once idle.
+
+        The old browser is always closed before the new one starts.
+        """
+        if browser_config is not None:
+            self.browser_config = browser_config
+        if self._crawler is None:
+            await self.start()
+            return
+        self._accepting.clear()
+        if self._active == 0:
+            await self._restart_now()
+
+    async def run(self, url: str, config: CrawlerRunConfig) -> Any:
+        """
+        Fetch a URL in a pooled tab.
+
+        Args:
+            url: The URL to fetch
+            config: Run configuration; the slot's session id is filled in
+
+        Returns:
+            The crawl4ai result
+        """
+        session_id = await self.acquire()
+        healthy = True
+        try:
+            result = await self._crawler.arun(url=url, config=config.clone(session_id=session_id))
+            if not result.success and self._looks_broken(result.error_message):
+                healthy = False
+            return result
+        except Exception as e:
+            healthy = not self._looks_broken(str(e))
+            raise
+        finally:
+            await self.release(session_id, healthy=healthy)
+
+    async def acquire(self) -> str:
+        """Check out a slot, waiting if all are busy or a restart is pending."""
+        await self.start()
+        while True:
+            await self._accepting.wait()
+            session_id = await self._free.get()
+            if self._accepting.is_set():
+                break
+            # A restart began while we waited; hand the slot back and wait again
+            self._free.put_nowait(session_id)
+        self._active += 1
+        self._open_sessions.add(session_id)
+        return session_id
+
+    async def release(self, session_id: str, healthy: bool = True) -> None:
+        """Check a slot back in, replacing its tab when worn out or broken."""
+        self._active -= 1
+        self._pages_since_restart += 1
+        self._uses[session_id] = self._uses.get(session_id, 0) + 1
+
+        if not healthy or self._uses[session_id] >= self.max_uses:
+            await self._kill_session(self._crawler, session_id)
+            self._uses.pop(session_id, None)
+            self.sessions_replaced += 1
+            session_id = self._new_session_id()
+        self._free.put_nowait(session_id)
+
+        if self._accepting.is_set() and self._needs_recycle():
+            self._accepting.clear()
+        if not self._accepting.is_set() and self._active == 0:
+            await self._restart_now()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage counters."""
+        return {
+            "size": self.size,
+            "active": self._active,
+            "pages_since_restart": self._pages_since_restart,
+            "restarts": self.restarts,
+            "sessions_replaced": self.sessions_replaced,
+            "memory_mb": self._browser_memory_mb()
+        }
+
+    def _new_session_id(self) -> str:
+        session_id = f"pool_{uuid.uuid4().hex}"
+        self._uses[session_id] = 0
+        return session_id
+
+    def _needs_recycle(self) -> bool:
+        if self.recycle_after and self._pages_since_restart >= self.recycle_after:
+            self.logger.info(f"Recycling browser after {self._pages_since_restart} pages")
+            return True
+        if self.max_memory_mb:
+            memory_mb = self._browser_memory_mb()
+            if memory_mb is not None and memory_mb > self.max_memory_mb:
+                self.logger.info(f"Recycling browser using {memory_mb:.0f} MB")
+                return True
+        return False
+
+    def _browser_memory_mb(self) -> Optional[float]:
+        """Resident memory of the browser processes spawned by this process."""
+        if psutil is None:
+            return None
+        try:
+            children = psutil.Process(os.getpid()).children(recursive=True)
+            return sum(child.memory_info().rss for child in children) / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def _looks_broken(self, message: Optional[str]) -> bool:
+        message = (message or "").lower()
+        return any(marker in message for marker in BROKEN_BROWSER_MARKERS)
+
+    async def _kill_session(self, crawler: Optional[AsyncWebCrawler], session_id: str) -> None:
+        self._open_sessions.discard(session_id)
+        if crawler is None:
+            return
+        try:
+            await crawler.crawler_strategy.kill_session(session_id)
+        except Exception as e:
+            self.logger.warning(f"Error while closing tab {session_id}: {e}")
+
+    async def _restart_now(self) -> None:
+        old, self._crawler = self._crawler, None
+        self._open_sessions.clear()
+        if old is not None:
+            try:
+                await old.close()
+            except Exception as e:
+                self.logger.warning(f"Error while closing browser: {e}")
+        await self.start()
+        self.restarts += 1
+        self.logger.info("Browser restarted")
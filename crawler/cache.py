@@ -0,0 +1,233 @@
+# crawler/cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .frontier import url_key
+from .utils import setup_logger
+
+
+class CachedPage:
+    """A cached page body together with the validators it was served with."""
+
+    def __init__(self, url: str, html: str, content_hash: str, etag: Optional[str],
+                 last_modified: Optional[str], fetched_at: float):
+        # The URL the body was served from, after redirects
+        self.url = url
+        self.html = html
+        self.content_hash = content_hash
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        """Seconds since the page was fetched or last revalidated."""
+        return time.time() - self.fetched_at
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class PageCache:
+    """
+    Persistent, content-addressed cache of fetched HTML.
+
+    Bodies are stored once per distinct content hash under ``<cache_dir>/blobs`` and an
+    SQLite index maps each normalized URL to its body, ETag, Last-Modified and
+    timestamps. Entries younger than ``ttl`` are served as-is; older entries can be
+    revalidated with a conditional request (``revalidate=True``) before the crawler
+    falls back to a full browser render. Entries older than ``max_age`` are dropped,
+    and the least recently used entries are evicted once the stored bodies exceed
+    ``max_size_bytes``.
+
+    Every method blocks on disk and SQLite; the async crawler calls them through
+    ``asyncio.to_thread``.
+    """
+
+    def __init__(self,
+                 cache_dir: str = ".crawler_cache",
+                 ttl: float = 3600,
+                 max_age: float = 30 * 24 * 3600,
+                 max_size_bytes: int = 512 * 1024 * 1024,
+                 revalidate: bool = True):
+        """
+        Args:
+            cache_dir: Directory holding the index and the HTML bodies
+            ttl: Seconds an entry is served without revalidation
+            max_age: Seconds after which an entry is evicted outright
+            max_size_bytes: Upper bound on the total size of stored bodies
+            revalidate: Revalidate stale entries with a conditional request instead
+                of re-rendering them
+        """
+        self.logger = setup_logger("PageCache")
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_size_bytes = max_size_bytes
+        self.revalidate = revalidate
+
+        self._blob_dir = os.path.join(cache_dir, "blobs")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_fetched ON pages (fetched_at)")
+        self._conn.commit()
+        # Running total of the stored body sizes, so puts need not sum the index
+        self._total_size = self._stored_size()
+
+    def _stored_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self._blob_dir, content_hash[:2], f"{content_hash}.html")
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Look up a URL, fresh or stale.
+
+        Returns:
+            The cached page, or None if the URL is not cached (or its body is missing)
+        """
+        key = url_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content_hash, etag, last_modified, fetched_at FROM pages WHERE url_key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[4] > self.max_age:
+                self._delete_keys([key])
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url_key = ?", (time.time(), key))
+            self._conn.commit()
+        try:
+            with open(self._blob_path(row[1]), "r", encoding="utf-8") as f:
+                html = f.read()
+        except OSError:
+            return None
+        return CachedPage(row[0], html, row[1], row[2], row[3], row[4])
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """True if the entry can be served without revalidation."""
+        return page.age() < self.ttl
+
+    def put(self, url: str, html: str, headers: Optional[Dict[str, str]] = None,
+            final_url: Optional[str] = None) -> None:
+        """
+        Store a freshly fetched page.
+
+        Args:
+            url: The page URL
+            html: The page body
+            headers: Response headers; ETag and Last-Modified are kept for revalidation
+            final_url: URL the body was served from after redirects (defaults to ``url``);
+                returned as the entry's ``url`` so relative links resolve the same way
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        key = url_key(url)
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM pages WHERE url_key = ?", (key,)).fetchone()
+            if replaced:
+                self._total_size -= replaced[0]
+            self._total_size += len(data)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, final_url or url, content_hash, len(data),
+                 headers.get("etag"), headers.get("last-modified"), now, now)
+            )
+            self._conn.commit()
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as just revalidated, restarting its TTL."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url_key = ?",
+                (now, now, url_key(url))
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT url_key FROM pages WHERE fetched_at < ?", (time.time() - self.max_age,)
+        )]
+        if expired:
+            self._delete_keys(expired)
+
+        if self._total_size <= self.max_size_bytes:
+            return
+        # Other processes may share the cache directory; count exactly before evicting
+        self._total_size = total = self._stored_size()
+        if total <= self.max_size_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT url_key, size FROM pages ORDER BY accessed_at"):
+            if total <= self.max_size_bytes:
+                break
+            victims.append(key)
+            total -= size
+        self._delete_keys(victims)
+        self.logger.info(f"Evicted {len(victims)} cached pages to stay under {self.max_size_bytes} bytes")
+
+    def _delete_keys(self, keys) -> None:
+        """Remove index rows and any bodies no longer referenced. Caller holds the lock."""
+        hashes = set()
+        for key in keys:
+            row = self._conn.execute("SELECT content_hash, size FROM pages WHERE url_key = ?", (key,)).fetchone()
+            if row:
+                hashes.add(row[0])
+                self._total_size -= row[1]
+            self._conn.execute("DELETE FROM pages WHERE url_key = ?", (key,))
+        for content_hash in hashes:
+            still_used = self._conn.execute(
+                "SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            if not still_used:
+                try:
+                    os.remove(self._blob_path(content_hash))
+                except OSError:
+                    pass
+        self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every cached page."""
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT url_key FROM pages")]
+            self._delete_keys(keys)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
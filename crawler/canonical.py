@@ -0,0 +1,226 @@
+# crawler/canonical.py
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+from .exceptions import ConfigurationError
+from .frontier import DEFAULT_PORTS
+
+# Query parameters that identify the visitor or the campaign, never the content
+TRACKING_PARAMS = frozenset({
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'utm_id',
+    'utm_name', 'utm_reader', 'utm_social', 'utm_brand', 'gclid', 'gclsrc', 'dclid',
+    'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'twclid', 'ttclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'hsctatracking', 'mkt_tok',
+    'oly_anon_id', 'oly_enc_id', 'vero_id', 'ref_src', 'ref_url', 'spm', 'scm',
+    'sessionid', 'session_id', 'sid', 'jsessionid', 'phpsessid', 'aspsessionid', 'cfid', 'cftoken'
+})
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'hmb_')
+
+# Directory index documents served at the same address as the directory
+INDEX_PAGES = frozenset({
+    'index.html', 'index.htm', 'index.php', 'index.asp', 'index.aspx', 'index.shtml',
+    'default.asp', 'default.aspx', 'default.htm', 'default.html'
+})
+
+# Session ids some servers put in the path (/page;jsessionid=ABC)
+SESSION_PATH_PARAM = re.compile(r";(?:jsessionid|phpsessid|sid|sessionid)=[^/?#]*", re.IGNORECASE)
+
+
+class SiteRule:
+    """
+    Canonicalization overrides for one site.
+
+    Rules are keyed by host in :class:`UrlCanonicalizer`; a rule for ``example.com``
+    also applies to its subdomains unless they have a rule of their own.
+    """
+
+    def __init__(self, strip_params: Iterable[str] = (), keep_params: Optional[Iterable[str]] = None,
+                 strip_trailing_slash: Optional[bool] = None, strip_index_pages: Optional[bool] = None,
+                 lowercase_path: bool = False, host: Optional[str] = None,
+                 path_rewrites: Iterable[Tuple[str, str]] = ()):
+        """
+        Args:
+            strip_params: Extra query parameters to drop on this site
+            keep_params: Only keep these query parameters (drops everything else)
+            strip_trailing_slash: Override the canonicalizer's trailing-slash setting
+            strip_index_pages: Override the canonicalizer's index-page setting
+            lowercase_path: Treat paths as case-insensitive (IIS and similar servers)
+            host: Rewrite the host, e.g. ``"example.com"`` for a ``www.`` alias
+            path_rewrites: ``(pattern, replacement)`` regex substitutions applied to
+                the path, e.g. ``(r"^/docs/v[0-9.]+/", "/docs/latest/")``
+        """
+        self.strip_params = frozenset(p.lower() for p in strip_params)
+        self.keep_params = frozenset(p.lower() for p in keep_params) if keep_params is not None else None
+        self.strip_trailing_slash = strip_trailing_slash
+        self.strip_index_pages = strip_index_pages
+        self.lowercase_path = lowercase_path
+        self.host = host.lower() if host else None
+        try:
+            self.path_rewrites = [(re.compile(pattern), replacement) for pattern, replacement in path_rewrites]
+        except re.error as e:
+            raise ConfigurationError(f"Invalid path rewrite pattern: {e}")
+
+
+class UrlCanonicalizer:
+    """
+    Maps the many spellings of a page's URL to one canonical URL.
+
+    Scheme and host are lowercased, default ports, fragments and path session ids are
+    dropped, ``index.html``-style documents are removed (trailing slashes too, if
+    enabled), and query parameters are filtered against a tracking-parameter denylist and sorted by name
+    (repeated parameters keep their relative order). Per-site :class:`SiteRule` s add
+    to or override these defaults. Pages can also declare their canonical URL with
+    ``<link rel="canonical">``, see :meth:`declared_canonical`.
+
+    Canonical URLs are dedup keys only: the crawler still fetches links as written and
+    resolves relative links against the URL a page was served from, since ``/docs/``
+    and ``/docs`` resolve ``guide.html`` differently. Runs on every discovered link, so
+    results are memoized in a bounded cache.
+    """
+
+    def __init__(self, strip_params: Iterable[str] = TRACKING_PARAMS,
+                 strip_prefixes: Iterable[str] = TRACKING_PREFIXES,
+                 sort_query: bool = True, strip_trailing_slash: bool = False,
+                 strip_index_pages: bool = True, honor_rel_canonical: bool = True,
+                 rules: Optional[Dict[str, Union[SiteRule, Dict[str, Any]]]] = None,
+                 cache_size: int = 100000):
+        """
+        Args:
+            strip_params: Query parameters dropped everywhere (case-insensitive)
+            strip_prefixes: Query parameter prefixes dropped everywhere
+            sort_query: Sort query parameters by name
+            strip_trailing_slash: Treat ``/docs/`` and ``/docs`` as the same page (off by
+                default: many servers serve different pages, or only one of them)
+            strip_index_pages: Treat ``/docs/index.html`` and ``/docs/`` as the same page
+            honor_rel_canonical: Use the canonical URL pages declare for themselves
+            rules: Per-host :class:`SiteRule` s (or their keyword arguments)
+            cache_size: Canonicalized URLs memoized (0 disables the cache)
+        """
+        self.strip_params = frozenset(p.lower() for p in strip_params)
+        self.strip_prefixes = tuple(p.lower() for p in strip_prefixes)
+        self.sort_query = sort_query
+        self.strip_trailing_slash = strip_trailing_slash
+        self.strip_index_pages = strip_index_pages
+        self.honor_rel_canonical = honor_rel_canonical
+        self.rules: Dict[str, SiteRule] = {}
+        for host, rule in (rules or {}).items():
+            self.rules[host.lower().lstrip('.')] = rule if isinstance(rule, SiteRule) else SiteRule(**rule)
+        self.cache_size = cache_size
+        self._cache: Dict[str, str] = {}
+
+    def __call__(self, url: str) -> str:
+        return self.canonicalize(url)
+
+    def rule_for(self, host: str) -> Optional[SiteRule]:
+        """The rule for a host or its closest parent domain, if any."""
+        if not self.rules:
+            return None
+        while host:
+            rule = self.rules.get(host)
+            if rule is not None:
+                return rule
+            host = host.partition('.')[2]
+        return None
+
+    def canonicalize(self, url: str) -> str:
+        """
+        Canonical form of an absolute URL.
+
+        Args:
+            url: An absolute URL
+
+        Returns:
+            The canonical URL (the input unchanged if it cannot be parsed)
+        """
+        cached = self._cache.get(url)
+        if cached is not None:
+            return cached
+        canonical = self._canonicalize(url)
+        if self.cache_size:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[url] = canonical
+        return canonical
+
+    def _canonicalize(self, url: str) -> str:
+        try:
+            parts = urlsplit(url.strip())
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').rstrip('.')
+        rule = self.rule_for(host)
+        if rule is not None and rule.host:
+            host = rule.host
+        if ':' in host:
+            host = f"[{host}]"  # IPv6 literal
+        netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+        if parts.username or parts.password:
+            netloc = f"{parts.netloc.rsplit('@', 1)[0]}@{netloc}"
+
+        path = parts.path or '/'
+        if ';' in path:
+            path = SESSION_PATH_PARAM.sub('', path)
+        if rule is not None:
+            if rule.lowercase_path:
+                path = path.lower()
+            for pattern, replacement in rule.path_rewrites:
+                path = pattern.sub(replacement, path)
+
+        strip_index = self.strip_index_pages if rule is None or rule.strip_index_pages is None else rule.strip_index_pages
+        if strip_index:
+            directory, _, last = path.rpartition('/')
+            if last.lower() in INDEX_PAGES:
+                path = f"{directory}/"
+        strip_slash = (self.strip_trailing_slash if rule is None or rule.strip_trailing_slash is None
+                       else rule.strip_trailing_slash)
+        if strip_slash and len(path) > 1 and path.endswith('/'):
+            path = path.rstrip('/') or '/'
+
+        query = self._canonical_query(parts.query, rule) if parts.query else ''
+        return urlunsplit((scheme, netloc, path, query, ''))
+
+    def _canonical_query(self, query: str, rule: Optional[SiteRule]) -> str:
+        # Parameters are compared by decoded, lowercased name but kept byte-for-byte
+        kept: List[Tuple[str, str]] = []
+        for param in query.split('&'):
+            if not param:
+                continue
+            name = unquote(param.partition('=')[0]).lower()
+            if name in self.strip_params or name.startswith(self.strip_prefixes):
+                continue
+            if rule is not None:
+                if name in rule.strip_params:
+                    continue
+                if rule.keep_params is not None and name not in rule.keep_params:
+                    continue
+            kept.append((name, param))
+        if self.sort_query:
+            kept.sort(key=lambda item: item[0])
+        return '&'.join(param for _, param in kept)
+
+    def declared_canonical(self, url: str, declared: Optional[str]) -> Optional[str]:
+        """
+        The canonical URL a page declared with ``<link rel="canonical">``, if usable.
+
+        Declarations pointing to another host are ignored, since a misconfigured page
+        could otherwise redirect the crawl off the site.
+
+        Args:
+            url: The URL the page was fetched from
+            declared: The absolute URL of its rel=canonical link
+
+        Returns:
+            The canonicalized declared URL when it differs from the page's own
+            canonical URL, otherwise None
+        """
+        if not self.honor_rel_canonical or not declared:
+            return None
+        canonical = self.canonicalize(declared)
+        own = self.canonicalize(url)
+        if canonical == own or urlsplit(canonical).netloc != urlsplit(own).netloc:
+            return None
+        return canonical
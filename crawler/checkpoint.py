@@ -0,0 +1,191 @@
+# crawler/checkpoint.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .utils import setup_logger
+
+# Frontier entry states
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+# Done without a fetch (reused from an earlier crawl); not counted against max_pages
+REUSED = "reused"
+
+
+class CheckpointStore:
+    """
+    SQLite checkpoints of running crawls, so a crawl can resume after the process dies.
+
+    Each crawl keeps its parameters, every URL ever added to its frontier (in discovery
+    order, with its depth and whether it is pending, being fetched or done) and every
+    page result. Writes are collected in an open transaction and committed by
+    :meth:`flush`, which the crawler calls every few seconds. A crash therefore loses at
+    most one checkpoint interval of work.
+
+    The store is blocking; the crawler calls it from a single writer thread so the
+    event loop never waits on SQLite and writes land in the order they were made.
+    """
+
+    def __init__(self, path: str = ".crawler_cache/checkpoints.sqlite"):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self.logger = setup_logger("CheckpointStore")
+        self.path = path
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawls (
+                crawl_id TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS frontier (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                UNIQUE (crawl_id, url)
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                page TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_crawl ON results (crawl_id, seq);
+        """)
+        self._conn.commit()
+
+    def create(self, params: Dict[str, Any], crawl_id: Optional[str] = None) -> str:
+        """Register a new crawl and return its id."""
+        crawl_id = crawl_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawls VALUES (?, ?, ?, ?, ?)",
+                (crawl_id, json.dumps(params, ensure_ascii=False), "running", now, now)
+            )
+            self._conn.commit()
+        return crawl_id
+
+    def get(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a crawl.
+
+        Returns:
+            ``{"crawl_id", "params", "status", "created_at", "updated_at", "pages"}``
+            or None if the crawl is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT params, status, created_at, updated_at FROM crawls WHERE crawl_id = ?", (crawl_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            pages = self._conn.execute(
+                "SELECT COUNT(*) FROM results WHERE crawl_id = ?", (crawl_id,)
+            ).fetchone()[0]
+        return {
+            "crawl_id": crawl_id,
+            "params": json.loads(row[0]),
+            "status": row[1],
+            "created_at": row[2],
+            "updated_at": row[3],
+            "pages": pages
+        }
+
+    def set_status(self, crawl_id: str, status: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE crawls SET status = ?, updated_at = ? WHERE crawl_id = ?",
+                (status, time.time(), crawl_id)
+            )
+            self._conn.commit()
+
+    def add_url(self, crawl_id: str, url: str, depth: int) -> None:
+        """Record a URL added to the frontier."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO frontier (crawl_id, url, depth, state) VALUES (?, ?, ?, ?)",
+                (crawl_id, url, depth, PENDING)
+            )
+
+    def add_urls(self, crawl_id: str, entries: List[Tuple[str, int]]) -> None:
+        """Record several (url, depth) frontier additions at once."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (crawl_id, url, depth, state) VALUES (?, ?, ?, ?)",
+                [(crawl_id, url, depth, PENDING) for url, depth in entries]
+            )
+
+    def claim(self, crawl_id: str, url: str) -> None:
+        """Record that a URL is being fetched."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE frontier SET state = ? WHERE crawl_id = ? AND url = ?", (CLAIMED, crawl_id, url)
+            )
+
+    def save_result(self, crawl_id: str, url: str, page: Dict[str, Any], state: str = DONE) -> None:
+        """Record a page result and mark its URL done (or ``REUSED``)."""
+        data = json.dumps(page, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO results (crawl_id, url, page) VALUES (?, ?, ?)", (crawl_id, url, data)
+            )
+            self._conn.execute(
+                "UPDATE frontier SET state = ? WHERE crawl_id = ? AND url = ?", (state, crawl_id, url)
+            )
+
+    def flush(self) -> None:
+        """Commit everything recorded since the last checkpoint."""
+        with self._lock:
+            self._conn.commit()
+
+    def load_frontier(self, crawl_id: str) -> List[Tuple[str, int, str]]:
+        """Every (url, depth, state) of a crawl's frontier, in discovery order."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT url, depth, state FROM frontier WHERE crawl_id = ? ORDER BY seq", (crawl_id,)
+            ).fetchall()
+
+    def results(self, crawl_id: str, batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Iterate over a crawl's page results in completion order, a batch at a time."""
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, page FROM results WHERE crawl_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (crawl_id, last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for seq, page in rows:
+                yield json.loads(page)
+            last_seq = rows[-1][0]
+
+    def delete(self, crawl_id: str) -> None:
+        """Forget a crawl and everything recorded for it."""
+        with self._lock:
+            for table in ("results", "frontier", "crawls"):
+                self._conn.execute(f"DELETE FROM {table} WHERE crawl_id = ?", (crawl_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,231 @@
+# crawler/content.py
+
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from .document import ParsedDocument
+from .link_scoring import stem, tokenize
+from .utils import chunk_text, setup_logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = setup_logger("ContentBuilder")
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# Blocks whose text is mostly link text are menus, tag clouds or "related" lists
+MAX_LINK_DENSITY = 0.5
+
+# Short blocks outside lists and tables are mostly buttons, bylines and labels
+MIN_BLOCK_CHARS = 25
+SHORT_BLOCK_TAGS = {'li', 'td', 'th', 'dd', 'dt', 'pre'}
+
+# Without tiktoken, token counts are estimated from the text length
+CHARS_PER_TOKEN = 4
+
+# Never pack a truncated section smaller than this
+MIN_SECTION_TOKENS = 64
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: Optional[str]):
+    """The tiktoken encoding for a model, or None when tiktoken cannot be used."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails offline
+        logger.warning(f"tiktoken unavailable ({e}); estimating token counts")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens ``text`` takes in ``model``'s prompt (estimated without tiktoken)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, preferring a line or word boundary."""
+    encoding = _encoding(model)
+    if encoding is None:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        cut = encoding.decode(tokens[:max_tokens])
+    if len(cut) >= len(text):
+        return text
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + " ..."
+
+
+def split_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> List[str]:
+    """Split ``text`` into consecutive pieces of at most ``max_tokens`` tokens each."""
+    encoding = _encoding(model)
+    if encoding is None:
+        # Cutting at a boundary only shortens a piece, so estimates stay within budget
+        return chunk_text(text, chunk_size=max_tokens * CHARS_PER_TOKEN)
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[start:start + max_tokens]) for start in range(0, len(tokens), max_tokens)]
+
+
+def chunk_sections(sections: List[str], max_tokens: int, model: Optional[str] = None) -> List[str]:
+    """
+    Pack sections, in page order, into chunks of at most ``max_tokens`` measured tokens.
+
+    Sections are kept whole where they fit; a section longer than the budget is split
+    into chunks of its own.
+    """
+    separator = count_tokens("\n\n", model)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for section in sections:
+        tokens = count_tokens(section, model)
+        pieces = [(section, tokens)] if tokens <= max_tokens else [
+            (piece, count_tokens(piece, model)) for piece in split_to_tokens(section, max_tokens, model)
+        ]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + separator + piece_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current_tokens += piece_tokens + (separator if current else 0)
+            current.append(piece)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def main_content_blocks(document: ParsedDocument) -> List[Tuple[str, str]]:
+    """
+    Readability-style main-content detection over the document's text blocks.
+
+    Drops blocks inside page chrome (nav, header, footer, sidebars, cookie banners,
+    ...), blocks that are mostly link text and short label-like blocks. If that leaves
+    almost nothing (pages built entirely from divs named "content-nav", say), only
+    link-heavy blocks are dropped.
+
+    Returns:
+        ``(tag, text)`` pairs in page order
+    """
+    if not document.blocks:
+        return [("p", document.text)] if document.text else []
+
+    def keep(block, strict: bool) -> bool:
+        tag, text, link_chars, chrome = block
+        heading = tag in HEADING_TAGS
+        if link_chars / len(text) > MAX_LINK_DENSITY and not heading:
+            return False
+        if not strict:
+            return True
+        if chrome:
+            return False
+        return heading or len(text) >= MIN_BLOCK_CHARS or tag in SHORT_BLOCK_TAGS
+
+    kept = [block for block in document.blocks if keep(block, strict=True)]
+    total_chars = sum(len(block[1]) for block in document.blocks)
+    if sum(len(block[1]) for block in kept) < 0.1 * total_chars:
+        kept = [block for block in document.blocks if keep(block, strict=False)]
+    return [(tag, text) for tag, text, _, _ in kept]
+
+
+def main_content_sections(document: ParsedDocument) -> List[str]:
+    """The page's main content grouped into sections, each starting at a heading."""
+    return _sections(main_content_blocks(document))
+
+
+def _sections(blocks: List[Tuple[str, str]]) -> List[str]:
+    """Group blocks into sections, each starting at a heading."""
+    sections: List[List[str]] = []
+    for tag, text in blocks:
+        if tag in HEADING_TAGS:
+            sections.append([f"{'#' * int(tag[1])} {text}"])
+        else:
+            if not sections:
+                sections.append([])
+            sections[-1].append(f"- {text}" if tag == 'li' else text)
+    return ["\n".join(lines) for lines in sections if lines]
+
+
+def section_scores(sections: List[str], instructions: Optional[str]) -> List[float]:
+    """How well each section covers the instruction keywords (0-1), with a small lead bonus."""
+    keywords = {stem(token) for token in tokenize(instructions or "")}
+    scores = []
+    for position, section in enumerate(sections):
+        score = 0.0
+        if keywords:
+            counts = Counter(stem(token) for token in tokenize(section))
+            # Every keyword counts, and repeats of one keyword saturate quickly
+            score = sum(1 - 0.5 ** counts[keyword] for keyword in keywords) / len(keywords)
+        if position == 0:
+            score += 0.1  # The lead usually says what the page is about
+        scores.append(score)
+    return scores
+
+
+def build_llm_input(document: ParsedDocument, instructions: Optional[str] = None,
+                    max_tokens: int = 2000, model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Page text for an LLM prompt: main content only, packed into a token budget.
+
+    When the main content fits it is returned whole. Otherwise sections (split at
+    headings) are picked best first by how well they match the instructions until the
+    budget is spent, and joined in page order with ``[...]`` where sections were left
+    out.
+
+    Args:
+        document: The parsed page
+        instructions: User instructions used to rank sections
+        max_tokens: Token budget for the returned text
+        model: Model whose tokenizer counts the tokens
+
+    Returns:
+        ``{"text", "tokens", "page_tokens", "sections", "sections_used", "truncated"}``
+    """
+    sections = main_content_sections(document)
+    counts = [count_tokens(section, model) for section in sections]
+    page_tokens = count_tokens(document.text, model)
+    if sum(counts) <= max_tokens:
+        text = "\n\n".join(sections)
+        return {"text": text, "tokens": sum(counts), "page_tokens": page_tokens,
+                "sections": len(sections), "sections_used": len(sections), "truncated": False}
+
+    scores = section_scores(sections, instructions)
+    chosen: Dict[int, str] = {}
+    remaining = max_tokens
+    for index in sorted(range(len(sections)), key=lambda i: (-scores[i], i)):
+        if counts[index] <= remaining:
+            chosen[index] = sections[index]
+            remaining -= counts[index]
+        elif remaining >= MIN_SECTION_TOKENS:
+            chosen[index] = truncate_to_tokens(sections[index], remaining, model)
+            remaining = 0
+        if not remaining:
+            break
+
+    parts = []
+    previous = -1
+    for index in sorted(chosen):
+        if index != previous + 1:
+            parts.append("[...]")
+        parts.append(chosen[index])
+        previous = index
+    if previous != len(sections) - 1:
+        parts.append("[...]")
+    text = "\n\n".join(parts)
+    return {"text": text, "tokens": count_tokens(text, model), "page_tokens": page_tokens,
+            "sections": len(sections), "sections_used": len(chosen), "truncated": True}
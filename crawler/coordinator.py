@@ -0,0 +1,551 @@
+# crawler/coordinator.py
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from .exceptions import ConfigurationError
+from .frontier import url_key
+from .utils import setup_logger
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+class Lease:
+    """
+    A URL handed to one worker until ``expires_at``; the token proves ownership.
+
+    ``start_domain`` is set by backends crawling several sites at once, and replaces
+    the domain of the crawl's start URL when deciding which external links to follow.
+    """
+
+    def __init__(self, url: str, depth: int, token: str, expires_at: float,
+                 start_domain: Optional[str] = None):
+        self.url = url
+        self.depth = depth
+        self.token = token
+        self.expires_at = expires_at
+        self.start_domain = start_domain
+
+
+class CrawlCoordinator:
+    """
+    Shared frontier, seen set and results for crawls run by several workers or machines.
+
+    Workers lease URLs instead of popping them. A lease that is not completed before it
+    expires (its worker crashed or hung) goes back to the queue and is handed to
+    another worker. Completing with a stale lease is ignored, so every URL yields
+    exactly one result. ``max_pages`` counts completed pages plus live leases.
+
+    Backends implement the methods below; :class:`SQLiteCoordinator` runs on one box
+    (tests, several processes) and :class:`RedisCoordinator` across machines.
+
+    URLs are deduplicated under ``key_func``. When it is left unset, the first client
+    to use the coordinator sets it to its URL canonicalizer; every worker of a crawl
+    must key URLs the same way.
+    """
+
+    key_func: Optional[Callable[[str], str]] = None
+
+    def dedup_key(self, url: str) -> str:
+        """The key under which a URL is deduplicated."""
+        return (self.key_func or url_key)(url)
+
+    def create(self, crawl_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Register a crawl and seed its start URL, unless it already exists.
+
+        Returns:
+            The crawl's parameters; those of the first caller win
+        """
+        raise NotImplementedError
+
+    def params(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        """A crawl's parameters, or None if the crawl is unknown."""
+        raise NotImplementedError
+
+    def add(self, crawl_id: str, url: str, depth: int) -> bool:
+        """Queue a URL unless an equivalent URL was queued before. Returns True if queued."""
+        raise NotImplementedError
+
+    def add_links(self, crawl_id: str, lease: Lease, links: List[str]) -> None:
+        """Queue the links found on a leased page, one level deeper."""
+        for link in links:
+            self.add(crawl_id, link, lease.depth + 1)
+
+    def mark_seen(self, crawl_id: str, urls: List[str]) -> None:
+        """
+        Record URLs as seen without queueing them, e.g. the redirect target or declared
+        canonical URL of a page already fetched, so no worker fetches that page again.
+
+        The default does nothing; backends with a seen set record the URLs in it.
+        """
+
+    def lease(self, crawl_id: str, lease_seconds: float, max_pages: int) -> Optional[Lease]:
+        """Lease the oldest queued URL, or return None if nothing can be leased now."""
+        raise NotImplementedError
+
+    def complete(self, crawl_id: str, lease: Lease, page: Dict[str, Any]) -> bool:
+        """Store a leased URL's result. Returns False if the lease had already expired."""
+        raise NotImplementedError
+
+    def active(self, crawl_id: str, max_pages: int) -> bool:
+        """True while URLs are leased, or queued URLs remain within the page budget."""
+        raise NotImplementedError
+
+    def results(self, crawl_id: str) -> Iterator[Dict[str, Any]]:
+        """Iterate over a crawl's page results in completion order."""
+        raise NotImplementedError
+
+    def stats(self, crawl_id: str) -> Dict[str, int]:
+        """Queued, leased and completed counts."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteCoordinator(CrawlCoordinator):
+    """Coordinator backed by one SQLite file; workers in several processes may share it."""
+
+    def __init__(self, path: str = ".crawler_cache/coordinator.sqlite", batch_size: int = 100,
+                 key_func: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            path: SQLite database file shared by the workers
+            batch_size: Rows read per query when iterating over results
+            key_func: Function mapping URLs to dedup keys, e.g. a UrlCanonicalizer
+        """
+        self.logger = setup_logger("SQLiteCoordinator")
+        self.path = path
+        self.batch_size = batch_size
+        self.key_func = key_func
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawls (
+                crawl_id TEXT PRIMARY KEY,
+                params TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_id TEXT NOT NULL,
+                url_key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                lease_token TEXT,
+                lease_expires REAL,
+                UNIQUE (crawl_id, url_key)
+            );
+            CREATE INDEX IF NOT EXISTS urls_state ON urls (crawl_id, state, seq);
+            CREATE TABLE IF NOT EXISTS results (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                page TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_crawl ON results (crawl_id, seq);
+        """)
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn, self._lock)
+
+    def create(self, crawl_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._transaction():
+            row = self._conn.execute("SELECT params FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            self._conn.execute("INSERT INTO crawls VALUES (?, ?)", (crawl_id, json.dumps(params)))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO urls (crawl_id, url_key, url, depth, state) VALUES (?, ?, ?, 0, 'queued')",
+                (crawl_id, self.dedup_key(params["url"]), params["url"])
+            )
+        return params
+
+    def params(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT params FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, crawl_id: str, url: str, depth: int) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO urls (crawl_id, url_key, url, depth, state) VALUES (?, ?, ?, ?, 'queued')",
+                (crawl_id, self.dedup_key(url), url, depth)
+            )
+        return cursor.rowcount == 1
+
+    def mark_seen(self, crawl_id: str, urls: List[str]) -> None:
+        # The 'seen' state is never leased and counts neither as queued nor as done
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO urls (crawl_id, url_key, url, depth, state) VALUES (?, ?, ?, 0, 'seen')",
+                [(crawl_id, self.dedup_key(url), url) for url in urls]
+            )
+
+    def lease(self, crawl_id: str, lease_seconds: float, max_pages: int) -> Optional[Lease]:
+        now = time.time()
+        with self._transaction():
+            requeued = self._conn.execute(
+                "UPDATE urls SET state = 'queued', lease_token = NULL, lease_expires = NULL "
+                "WHERE crawl_id = ? AND state = 'leased' AND lease_expires < ?", (crawl_id, now)
+            ).rowcount
+            if requeued:
+                self.logger.warning(f"Requeued {requeued} URLs whose leases expired")
+            used = self._conn.execute(
+                "SELECT COUNT(*) FROM urls WHERE crawl_id = ? AND state IN ('leased', 'done')", (crawl_id,)
+            ).fetchone()[0]
+            if used >= max_pages:
+                return None
+            row = self._conn.execute(
+                "SELECT seq, url, depth FROM urls WHERE crawl_id = ? AND state = 'queued' ORDER BY seq LIMIT 1",
+                (crawl_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            self._conn.execute(
+                "UPDATE urls SET state = 'leased', lease_token = ?, lease_expires = ? WHERE seq = ?",
+                (token, now + lease_seconds, row[0])
+            )
+        return Lease(row[1], row[2], token, now + lease_seconds)
+
+    def complete(self, crawl_id: str, lease: Lease, page: Dict[str, Any]) -> bool:
+        with self._transaction():
+            updated = self._conn.execute(
+                "UPDATE urls SET state = 'done', lease_token = NULL, lease_expires = NULL "
+                "WHERE crawl_id = ? AND url_key = ? AND lease_token = ?",
+                (crawl_id, self.dedup_key(lease.url), lease.token)
+            ).rowcount
+            if not updated:
+                return False
+            self._conn.execute(
+                "INSERT INTO results (crawl_id, url, page) VALUES (?, ?, ?)",
+                (crawl_id, lease.url, json.dumps(page, ensure_ascii=False))
+            )
+        return True
+
+    def active(self, crawl_id: str, max_pages: int) -> bool:
+        counts = self.stats(crawl_id)
+        if counts["leased"]:
+            return True
+        return counts["queued"] > 0 and counts["done"] < max_pages
+
+    def results(self, crawl_id: str) -> Iterator[Dict[str, Any]]:
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, page FROM results WHERE crawl_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (crawl_id, last_seq, self.batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for _, page in rows:
+                yield json.loads(page)
+            last_seq = rows[-1][0]
+
+    def stats(self, crawl_id: str) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM urls WHERE crawl_id = ? GROUP BY state", (crawl_id,)
+            ).fetchall())
+        return {state: counts.get(state, 0) for state in ("queued", "leased", "done")}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _ImmediateTransaction:
+    """Holds the thread lock and an immediate (write-locked) SQLite transaction."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+# Atomic Redis operations, so concurrent workers never double-queue or double-lease a URL
+_REDIS_CREATE = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX') then
+    redis.call('SADD', KEYS[2], ARGV[2])
+    redis.call('RPUSH', KEYS[3], ARGV[3])
+    return ARGV[1]
+end
+return redis.call('GET', KEYS[1])
+"""
+
+_REDIS_ADD = """
+if redis.call('SADD', KEYS[1], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_REDIS_LEASE = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, member in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], member)
+    local item = cjson.decode(member)
+    redis.call('LPUSH', KEYS[1], cjson.encode({url = item.url, depth = item.depth}))
+end
+local used = tonumber(redis.call('GET', KEYS[3]) or '0') + redis.call('ZCARD', KEYS[2])
+if used >= tonumber(ARGV[3]) then
+    return false
+end
+local raw = redis.call('LPOP', KEYS[1])
+if not raw then
+    return false
+end
+local item = cjson.decode(raw)
+local member = cjson.encode({url = item.url, depth = item.depth, token = ARGV[4]})
+redis.call('ZADD', KEYS[2], ARGV[2], member)
+return member
+"""
+
+_REDIS_COMPLETE = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('RPUSH', KEYS[2], ARGV[2])
+redis.call('INCR', KEYS[3])
+return 1
+"""
+
+
+class RedisCoordinator(CrawlCoordinator):
+    """
+    Coordinator backed by Redis (or any server speaking its protocol and Lua scripting).
+
+    Per crawl it keeps a seen set, a queue list, a sorted set of leases scored by
+    expiry, a results list and a completed counter. Requires the ``redis`` package.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "crawler",
+                 client: Optional[Any] = None, batch_size: int = 100,
+                 key_func: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            url: Redis connection URL (ignored when ``client`` is given)
+            prefix: Prefix for every key written
+            client: An existing ``redis.Redis`` client
+            batch_size: Results read per request when iterating
+            key_func: Function mapping URLs to dedup keys, e.g. a UrlCanonicalizer
+        """
+        if client is None:
+            if redis is None:
+                raise ConfigurationError("RedisCoordinator requires the 'redis' package (pip install crawler[redis])")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.logger = setup_logger("RedisCoordinator")
+        self.client = client
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.key_func = key_func
+        self._create = client.register_script(_REDIS_CREATE)
+        self._add = client.register_script(_REDIS_ADD)
+        self._lease = client.register_script(_REDIS_LEASE)
+        self._complete = client.register_script(_REDIS_COMPLETE)
+
+    def _key(self, crawl_id: str, name: str) -> str:
+        # The hash tag keeps one crawl's keys in the same Redis Cluster slot
+        return f"{self.prefix}:{{{crawl_id}}}:{name}"
+
+    @staticmethod
+    def _text(value: Any) -> Any:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def create(self, crawl_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        stored = self._create(
+            keys=[self._key(crawl_id, "params"), self._key(crawl_id, "seen"), self._key(crawl_id, "queue")],
+            args=[json.dumps(params), self.dedup_key(params["url"]), json.dumps({"url": params["url"], "depth": 0})]
+        )
+        return json.loads(self._text(stored))
+
+    def params(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        stored = self.client.get(self._key(crawl_id, "params"))
+        return json.loads(self._text(stored)) if stored else None
+
+    def add(self, crawl_id: str, url: str, depth: int) -> bool:
+        return bool(self._add(
+            keys=[self._key(crawl_id, "seen"), self._key(crawl_id, "queue")],
+            args=[self.dedup_key(url), json.dumps({"url": url, "depth": depth})]
+        ))
+
+    def mark_seen(self, crawl_id: str, urls: List[str]) -> None:
+        if urls:
+            self.client.sadd(self._key(crawl_id, "seen"), *(self.dedup_key(url) for url in urls))
+
+    def lease(self, crawl_id: str, lease_seconds: float, max_pages: int) -> Optional[Lease]:
+        now = time.time()
+        member = self._lease(
+            keys=[self._key(crawl_id, "queue"), self._key(crawl_id, "leases"), self._key(crawl_id, "done")],
+            args=[now, now + lease_seconds, max_pages, uuid.uuid4().hex]
+        )
+        if not member:
+            return None
+        member = self._text(member)
+        item = json.loads(member)
+        return Lease(item["url"], int(item["depth"]), member, now + lease_seconds)
+
+    def complete(self, crawl_id: str, lease: Lease, page: Dict[str, Any]) -> bool:
+        return bool(self._complete(
+            keys=[self._key(crawl_id, "leases"), self._key(crawl_id, "results"), self._key(crawl_id, "done")],
+            args=[lease.token, json.dumps(page, ensure_ascii=False)]
+        ))
+
+    def active(self, crawl_id: str, max_pages: int) -> bool:
+        counts = self.stats(crawl_id)
+        if counts["leased"]:
+            return True
+        return counts["queued"] > 0 and counts["done"] < max_pages
+
+    def results(self, crawl_id: str) -> Iterator[Dict[str, Any]]:
+        key = self._key(crawl_id, "results")
+        start = 0
+        while True:
+            batch = self.client.lrange(key, start, start + self.batch_size - 1)
+            if not batch:
+                return
+            for page in batch:
+                yield json.loads(self._text(page))
+            start += len(batch)
+
+    def stats(self, crawl_id: str) -> Dict[str, int]:
+        pipe = self.client.pipeline()
+        pipe.llen(self._key(crawl_id, "queue"))
+        pipe.zcard(self._key(crawl_id, "leases"))
+        pipe.get(self._key(crawl_id, "done"))
+        queued, leased, done = pipe.execute()
+        return {"queued": int(queued), "leased": int(leased), "done": int(done or 0)}
+
+    def close(self) -> None:
+        self.client.close()
+
+
+async def consume(client, coordinator: CrawlCoordinator, crawl_id: str, concurrency: int = 1,
+                  lease_seconds: float = 300.0, poll_interval: float = 1.0,
+                  relevance_batcher=None, per_host_concurrency: Optional[int] = None,
+                  prefilter=None, duplicates=None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Work on a coordinated crawl as one worker among many, yielding the pages it completes.
+
+    Coordinator calls block (SQLite, or a round trip to Redis), so they run in a
+    thread and the event loop keeps serving the other pages meanwhile.
+
+    Args:
+        client: The EnhancedCrawlerClient fetching pages
+        coordinator: Backend shared with the other workers
+        crawl_id: Crawl created with :meth:`CrawlCoordinator.create`
+        concurrency: Pages leased and fetched at the same time by this worker
+        lease_seconds: How long a URL stays leased before other workers may retry it
+        poll_interval: Seconds to wait when nothing can be leased but the crawl is active
+        relevance_batcher: Optional batcher shared by this worker's pages
+        per_host_concurrency: Maximum number of this worker's in-flight pages per host
+            (defaults to ``concurrency``)
+        prefilter: Optional RelevancePrefilter, learning from this worker's pages
+        duplicates: Optional NearDuplicateIndex of this worker's pages
+    """
+    params = await asyncio.to_thread(coordinator.params, crawl_id)
+    if params is None:
+        raise ConfigurationError(f"Unknown coordinated crawl: {crawl_id}")
+    if coordinator.key_func is None:
+        coordinator.key_func = client.canonicalizer
+    start_domain = urlparse(params["url"]).netloc
+    per_host_concurrency = per_host_concurrency or concurrency
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    completed: asyncio.Queue = asyncio.Queue()
+    crawl_done = object()
+
+    def host_limit(url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host_concurrency)
+        return host_limits[host]
+
+    async def worker():
+        while True:
+            lease = await asyncio.to_thread(coordinator.lease, crawl_id, lease_seconds, params["max_pages"])
+            if lease is None:
+                if not await asyncio.to_thread(coordinator.active, crawl_id, params["max_pages"]):
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+
+            try:
+                async with host_limit(lease.url):
+                    page = await client.scrape_page(
+                        lease.url, params["instructions"], relevance_batcher=relevance_batcher,
+                        prefilter=prefilter, duplicates=duplicates
+                    )
+            except Exception as e:
+                client.logger.error(f"Error processing {lease.url}: {str(e)}")
+                page = {"url": lease.url, "error": str(e)}
+            # Queue the links while still holding the lease, so the crawl never looks finished early
+            if lease.depth < params["depth"] and "error" not in page:
+                current_domain = urlparse(lease.url).netloc
+                lease_domain = lease.start_domain or start_domain
+                links = []
+                for link in page.get("links", []):
+                    link_domain = urlparse(link).netloc
+                    if link_domain == current_domain or (
+                            params["follow_external_links"] and link_domain == lease_domain):
+                        links.append(link)
+                await asyncio.to_thread(coordinator.add_links, crawl_id, lease, links)
+            # A redirect target or a declared canonical URL is this same page;
+            # no worker should fetch it again
+            aliases = [page[alias] for alias in ("final_url", "canonical_url") if page.get(alias)]
+            if aliases:
+                await asyncio.to_thread(coordinator.mark_seen, crawl_id, aliases)
+            if await asyncio.to_thread(coordinator.complete, crawl_id, lease, page):
+                completed.put_nowait(page)
+            else:
+                client.logger.warning(f"Lease on {lease.url} expired before it completed; result dropped")
+
+    async def run_workers():
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            completed.put_nowait(crawl_done)
+
+    runner = asyncio.create_task(run_workers())
+    try:
+        while True:
+            page = await completed.get()
+            if page is crawl_done:
+                break
+            yield page
+        await runner
+    finally:
+        if not runner.done():
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
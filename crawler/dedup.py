@@ -0,0 +1,153 @@
+# crawler/dedup.py
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .exceptions import ConfigurationError
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class NearDuplicateIndex:
+    """
+    MinHash index of page content for spotting near-duplicate pages during a crawl.
+
+    Docs sites serve the same text under many URLs (versioned paths, print views,
+    tracking parameters) that exact URL dedup cannot catch. Each page's main content is
+    reduced to its set of word shingles and summarized by a MinHash signature, whose
+    matching slots estimate the Jaccard similarity of two pages. Signatures use
+    one-permutation hashing: every shingle is hashed once and lands in one slot, which
+    keeps the smallest hash it sees, so a long page costs a single pass instead of one
+    pass per slot. Empty slots borrow from the next filled one. An LSH band index
+    turns the lookup into a few dictionary probes: signatures are cut into bands and
+    only pages sharing a whole band with the new page are compared with it.
+
+    The first page with some content is its canonical version; later pages at or above
+    ``threshold`` similarity are reported as duplicates of it.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 5, min_words: int = 30, max_chars: int = 50000):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity at which a page is a duplicate
+            num_perm: MinHash signature length
+            bands: LSH bands (``num_perm`` must be a multiple); more bands find
+                candidates at lower similarity at the cost of more comparisons
+            shingle_size: Words per shingle
+            min_words: Shorter pages are never indexed or reported, since a few words
+                in common say little
+            max_chars: Only the start of long pages is hashed
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ConfigurationError("threshold must be between 0 and 1")
+        if bands < 1 or num_perm % bands:
+            raise ConfigurationError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.max_chars = max_chars
+
+        self._buckets: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._relevance: Dict[str, float] = {}
+        self._duplicates = 0
+        self._comparisons = 0
+
+    def _shingles(self, text: str) -> Set[int]:
+        words = WORD_PATTERN.findall(text[:self.max_chars].lower())
+        if len(words) < self.min_words:
+            return set()
+        size = min(self.shingle_size, len(words))
+        return {
+            int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode("utf-8"),
+                                           digest_size=8).digest(), "little")
+            for i in range(len(words) - size + 1)
+        }
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """MinHash signature of a text, or None if it is too short to compare."""
+        shingles = self._shingles(text)
+        if not shingles:
+            return None
+        slots: List[Optional[int]] = [None] * self.num_perm
+        for shingle in shingles:
+            value, slot = divmod(shingle, self.num_perm)
+            if slots[slot] is None or value < slots[slot]:
+                slots[slot] = value
+
+        # Densify: an empty slot takes the next filled slot's value, tagged with the
+        # distance so it only matches a slot filled the same way
+        signature = list(slots)
+        for slot in range(self.num_perm):
+            distance = 1
+            while signature[slot] is None:
+                borrowed = slots[(slot + distance) % self.num_perm]
+                if borrowed is not None:
+                    signature[slot] = borrowed + (distance << 64)
+                distance += 1
+        return tuple(signature)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        return [(band, hash(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    def similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(1 for x, y in zip(first, second) if x == y) / self.num_perm
+
+    def check(self, url: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Look a page up and index it if it is new content.
+
+        Args:
+            url: The page URL
+            text: The page's main content
+
+        Returns:
+            ``(canonical_url, similarity)`` if the page duplicates an indexed page,
+            otherwise None (the page is then the canonical version of its content)
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        keys = self._band_keys(signature)
+
+        candidates: Set[str] = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+        candidates.discard(url)
+        best: Optional[Tuple[str, float]] = None
+        for candidate in candidates:
+            self._comparisons += 1
+            score = self.similarity(signature, self._signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        if best is not None:
+            self._duplicates += 1
+            return best
+
+        self._signatures[url] = signature
+        for key in keys:
+            self._buckets[key].append(url)
+        return None
+
+    def record_relevance(self, url: str, score: float) -> None:
+        """Remember a canonical page's relevance score for its duplicates."""
+        self._relevance[url] = score
+
+    def relevance(self, url: str) -> Optional[float]:
+        """Relevance score of a canonical page, if it has been scored yet."""
+        return self._relevance.get(url)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "canonical_pages": len(self._signatures),
+            "duplicates": self._duplicates,
+            "comparisons": self._comparisons,
+            "threshold": self.threshold
+        }
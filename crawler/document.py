@@ -0,0 +1,419 @@
+# crawler/document.py
+
+import hashlib
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import normalize_url, clean_text
+
+try:
+    from lxml import etree
+    import lxml.html
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAS_LXML = False
+
+# Elements rendered into the structured markdown, in the order they appear
+MARKDOWN_TAGS = {'h1', 'h2', 'h3', 'p', 'ul', 'ol', 'li', 'pre', 'code'}
+
+# Elements whose text never shows up in the page text (matches BeautifulSoup.get_text)
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+
+# Elements that start a new text block
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'details', 'dialog', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'head', 'header', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'summary', 'table', 'td', 'th', 'tr', 'ul'
+}
+
+# Elements that hold page chrome rather than content
+BOILERPLATE_TAGS = {'head', 'nav', 'header', 'footer', 'aside', 'form', 'dialog'}
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'dialog', 'search'}
+BOILERPLATE_PATTERN = re.compile(
+    r'nav|menu|footer|sidebar|cookie|consent|banner|breadcrumb|social|share|comment|'
+    r'promo|advert|sponsor|subscribe|newsletter|related|popup|modal|masthead|skip-link',
+    re.IGNORECASE
+)
+
+
+class ParsedDocument:
+    """
+    A page parsed once and reduced to everything the crawler and the AI processor need.
+
+    The HTML is walked a single time (with lxml when it is installed, falling back to
+    BeautifulSoup's ``html.parser``) to collect the title, links, structured markdown,
+    plain text, the paragraph/heading/list-item texts used by the basic extractor, the
+    anchor text of every link, the page's declared canonical URL and the text blocks
+    used to find the main content.
+    Only plain Python data is kept, so instances are cheap to hold and to pickle.
+    """
+
+    def __init__(self,
+                 url: str,
+                 title: str,
+                 links: List[str],
+                 markdown: str,
+                 text: str,
+                 paragraphs: List[str],
+                 headings: List[str],
+                 list_items: List[str],
+                 anchors: Optional[Dict[str, str]] = None,
+                 blocks: Optional[List[Tuple[str, str, int, bool]]] = None,
+                 canonical_url: Optional[str] = None):
+        self.url = url
+        self.title = title
+        self.links = links
+        self.markdown = markdown
+        self.text = text
+        self.paragraphs = paragraphs
+        self.headings = headings
+        self.list_items = list_items
+        # Link URL -> text of its first non-empty anchor
+        self.anchors = anchors if anchors is not None else {}
+        # Text split at block-level elements, in page order:
+        # (innermost block tag, text, characters inside links, inside page chrome)
+        self.blocks = blocks if blocks is not None else []
+        # Absolute URL of <link rel="canonical">, if the page declares one
+        self.canonical_url = canonical_url
+
+    @classmethod
+    def from_html(cls, html_content: str, url: str = "",
+                  link_key: Optional[Callable[[str], str]] = None) -> "ParsedDocument":
+        """
+        Parse raw HTML into a ParsedDocument.
+
+        Args:
+            html_content: Raw HTML content
+            url: URL the page was served from (after redirects), used to resolve
+                relative links
+            link_key: Optional function, such as a
+                :class:`~crawler.canonical.UrlCanonicalizer`, under which links are
+                deduplicated; the first spelling of each link is kept
+
+        Returns:
+            The parsed document
+        """
+        if HAS_LXML:
+            return _parse_with_lxml(html_content or "", url, link_key)
+        return _parse_with_soup(html_content or "", url, link_key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the document fields as a plain dictionary."""
+        return dict(self.__dict__)
+
+    def content_hash(self) -> str:
+        """
+        Fingerprint of the page's visible content and links.
+
+        Whitespace is collapsed first, so re-serialized markup with the same text and
+        links hashes the same.
+        """
+        text = re.sub(r"\s+", " ", f"{self.title}\n{self.text}").strip()
+        payload = "\n".join([text] + self.links)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _render_markdown_line(name: str, text: str) -> Optional[str]:
+    """Render one element's cleaned text as a markdown line (None for container tags)."""
+    if name == 'h1':
+        return f"# {text}"
+    elif name == 'h2':
+        return f"## {text}"
+    elif name == 'h3':
+        return f"### {text}"
+    elif name == 'p':
+        return text
+    elif name == 'li':
+        return f"- {text}"
+    elif name == 'pre' or name == 'code':
+        return f"```\n{text}\n```"
+    return None
+
+
+class _BlockSplitter:
+    """Collects :attr:`ParsedDocument.blocks` from start/end/text events of a tree walk."""
+
+    def __init__(self):
+        self.blocks: List[Tuple[str, str, int, bool]] = []
+        self._run: List[str] = []
+        self._run_link_chars = 0
+        self._open: List[Tuple[str, bool]] = []  # (block tag, is page chrome)
+        self._chrome_depth = 0
+        self._anchor_depth = 0
+
+    def _is_chrome(self, name: str, get: Callable[[str], Any]) -> bool:
+        role = (get('role') or '').lower()
+        if role == 'main' or name in ('article', 'main', 'body'):
+            return False
+        if name == 'header':
+            # An article's own header holds its title, not site chrome
+            return not any(tag in ('article', 'main') for tag, _ in self._open)
+        if name in BOILERPLATE_TAGS or role in BOILERPLATE_ROLES:
+            return True
+        classes = get('class') or ''
+        if not isinstance(classes, str):
+            classes = ' '.join(classes)  # BeautifulSoup returns a list
+        return bool(BOILERPLATE_PATTERN.search(f"{classes} {get('id') or ''}"))
+
+    def start(self, name: str, get: Callable[[str], Any]) -> None:
+        if name == 'a':
+            self._anchor_depth += 1
+        elif name in BLOCK_TAGS:
+            self.flush()
+            chrome = self._is_chrome(name, get)
+            self._open.append((name, chrome))
+            self._chrome_depth += chrome
+
+    def end(self, name: str) -> None:
+        if name == 'a':
+            self._anchor_depth = max(0, self._anchor_depth - 1)
+        elif name in BLOCK_TAGS and self._open:
+            self.flush()
+            _, chrome = self._open.pop()
+            self._chrome_depth -= chrome
+
+    def text(self, text: str) -> None:
+        self._run.append(text)
+        if self._anchor_depth:
+            self._run_link_chars += len(text.strip())
+
+    def flush(self) -> None:
+        text = clean_text(" ".join(self._run))
+        if text:
+            tag = self._open[-1][0] if self._open else 'body'
+            self.blocks.append((tag, text, min(self._run_link_chars, len(text)), self._chrome_depth > 0))
+        self._run = []
+        self._run_link_chars = 0
+
+
+def _load_lxml_root(html_content: str):
+    """Build an lxml tree, tolerating encoding declarations and empty documents."""
+    try:
+        return lxml.html.document_fromstring(html_content)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.document_fromstring(html_content.encode('utf-8'))
+    except etree.ParserError:
+        return None
+
+
+def _extract_link(base_url: str, href: str, seen_links: Dict[str, str], links: List[str],
+                  link_key: Optional[Callable[[str], str]]) -> Optional[str]:
+    """
+    Record a link unless an equivalent one was seen on the page.
+
+    Returns:
+        The absolute URL the page's links list holds for it, or None if it is not HTTP(S)
+    """
+    normalized_url = normalize_url(base_url, href)
+    if not normalized_url:
+        return None
+    key = link_key(normalized_url) if link_key is not None else normalized_url
+    kept = seen_links.get(key)
+    if kept is None:
+        kept = seen_links[key] = normalized_url
+        links.append(normalized_url)
+    return kept
+
+
+def _parse_with_lxml(html_content: str, url: str,
+                     link_key: Optional[Callable[[str], str]] = None) -> ParsedDocument:
+    """Single ``iterwalk`` pass over an lxml tree."""
+    root = _load_lxml_root(html_content)
+    if root is None:
+        return ParsedDocument(url, "No title found", [], "", "", [], [], [])
+
+    pieces: List[str] = []          # every text node in document order
+    open_elements: List[tuple] = []  # (element, index into pieces, markdown slot)
+    open_anchors: List[tuple] = []   # (element, link URL, index into pieces)
+    markdown_slots: List[Optional[str]] = []
+    links: List[str] = []
+    seen_links: Dict[str, str] = {}
+    anchors: Dict[str, str] = {}
+    paragraphs: List[str] = []
+    headings: List[str] = []
+    list_items: List[str] = []
+    title_text: Optional[str] = None
+    first_h1: Optional[str] = None
+    canonical_url: Optional[str] = None
+    skip_depth = 0
+    splitter = _BlockSplitter()
+
+    for event, el in etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')):
+        if event in ('comment', 'pi'):
+            # Comments and processing instructions only contribute their tail
+            if el.tail and not skip_depth:
+                pieces.append(el.tail)
+                splitter.text(el.tail)
+            continue
+        name = el.tag.lower()
+
+        if event == 'start':
+            if name in NON_TEXT_TAGS:
+                skip_depth += 1
+            if name == 'a':
+                href = el.get('href')
+                if href is not None:
+                    normalized_url = _extract_link(url, href, seen_links, links, link_key)
+                    if normalized_url and not anchors.get(normalized_url):
+                        open_anchors.append((el, normalized_url, len(pieces)))
+            elif name == 'link' and canonical_url is None and el.get('href'):
+                if 'canonical' in (el.get('rel') or '').lower().split():
+                    canonical_url = normalize_url(url, el.get('href'))
+            slot = None
+            if name in MARKDOWN_TAGS or name == 'title':
+                if name in MARKDOWN_TAGS:
+                    slot = len(markdown_slots)
+                    markdown_slots.append(None)
+                open_elements.append((el, len(pieces), slot))
+            splitter.start(name, el.get)
+            if el.text and not skip_depth:
+                pieces.append(el.text)
+                splitter.text(el.text)
+            continue
+
+        # 'end' event: every descendant has been seen, so the element text is complete
+        if open_anchors and open_anchors[-1][0] is el:
+            _, link, start = open_anchors.pop()
+            anchor = clean_text(" ".join(p.strip() for p in pieces[start:] if p.strip()))
+            anchors[link] = anchor or clean_text(el.get('title') or el.get('aria-label') or "")
+        if open_elements and open_elements[-1][0] is el:
+            _, start, slot = open_elements.pop()
+            raw_text = "".join(pieces[start:])
+            if name == 'title':
+                if title_text is None:
+                    title_text = raw_text
+            else:
+                text = clean_text(" ".join(p.strip() for p in pieces[start:] if p.strip()))
+                if text:
+                    markdown_slots[slot] = _render_markdown_line(name, text)
+                stripped = raw_text.strip()
+                if name == 'p' and len(stripped) > 50:
+                    paragraphs.append(stripped)
+                elif name in ('h1', 'h2', 'h3') and stripped:
+                    headings.append(stripped)
+                    if name == 'h1' and first_h1 is None:
+                        first_h1 = raw_text
+                elif name == 'li' and len(stripped) > 10:
+                    list_items.append(stripped)
+
+        splitter.end(name)
+        if name in NON_TEXT_TAGS:
+            skip_depth -= 1
+        if el.tail and not skip_depth:
+            pieces.append(el.tail)
+            splitter.text(el.tail)
+    splitter.flush()
+
+    if title_text:
+        title = clean_text(title_text)
+    elif first_h1:
+        title = clean_text(first_h1)
+    else:
+        title = "No title found"
+
+    return ParsedDocument(
+        url=url,
+        title=title,
+        links=links,
+        markdown="\n\n".join(line for line in markdown_slots if line),
+        text="\n".join(p.strip() for p in pieces if p.strip()),
+        paragraphs=paragraphs,
+        headings=headings,
+        list_items=list_items,
+        anchors=anchors,
+        blocks=splitter.blocks,
+        canonical_url=canonical_url
+    )
+
+
+def _parse_with_soup(html_content: str, url: str,
+                     link_key: Optional[Callable[[str], str]] = None) -> ParsedDocument:
+    """Fallback parser used when lxml is not installed."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    title = "No title found"
+    title_tag = soup.find('title')
+    h1_tag = soup.find('h1')
+    if title_tag and title_tag.text:
+        title = clean_text(title_tag.text)
+    elif h1_tag and h1_tag.text:
+        title = clean_text(h1_tag.text)
+
+    links = []
+    seen_links = {}
+    anchors = {}
+    for a_tag in soup.find_all('a', href=True):
+        normalized_url = _extract_link(url, a_tag['href'], seen_links, links, link_key)
+        if normalized_url and not anchors.get(normalized_url):
+            anchors[normalized_url] = clean_text(
+                a_tag.get_text(" ", strip=True) or a_tag.get('title') or a_tag.get('aria-label') or ""
+            )
+
+    canonical_url = None
+    for link_tag in soup.find_all('link', rel=True, href=True):
+        # rel is multi-valued and matched case-insensitively
+        if 'canonical' in (value.lower() for value in link_tag['rel']):
+            canonical_url = normalize_url(url, link_tag['href'])
+            break
+
+    lines = []
+    paragraphs = []
+    headings = []
+    list_items = []
+    for tag in soup.find_all(list(MARKDOWN_TAGS)):
+        name = tag.name.lower()
+        text = clean_text(tag.get_text(" ", strip=True))
+        if text:
+            lines.append(_render_markdown_line(name, text))
+        stripped = tag.text.strip()
+        if name == 'p' and len(stripped) > 50:
+            paragraphs.append(stripped)
+        elif name in ('h1', 'h2', 'h3') and stripped:
+            headings.append(stripped)
+        elif name == 'li' and len(stripped) > 10:
+            list_items.append(stripped)
+
+    return ParsedDocument(
+        url=url,
+        title=title,
+        links=links,
+        markdown="\n\n".join(line for line in lines if line),
+        text=soup.get_text(separator='\n', strip=True),
+        paragraphs=paragraphs,
+        headings=headings,
+        list_items=list_items,
+        anchors=anchors,
+        blocks=_soup_blocks(soup),
+        canonical_url=canonical_url
+    )
+
+
+def _soup_blocks(soup) -> List[Tuple[str, str, int, bool]]:
+    """Walk a BeautifulSoup tree (iteratively, so deep pages cannot hit the recursion limit)."""
+    from bs4 import CData, NavigableString, Tag
+
+    splitter = _BlockSplitter()
+    stack = [iter(soup.children)]
+    open_names: List[Optional[str]] = [None]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            name = open_names.pop()
+            if name is not None:
+                splitter.end(name)
+        elif isinstance(child, Tag):
+            name = child.name.lower()
+            if name in NON_TEXT_TAGS:
+                continue
+            splitter.start(name, child.get)
+            stack.append(iter(child.children))
+            open_names.append(name)
+        elif type(child) in (NavigableString, CData):
+            splitter.text(str(child))
+    splitter.flush()
+    return splitter.blocks
@@ -3,28 +3,97 @@
 import os
 import sys
 import asyncio
+import inspect
 import json
 import time
+import heapq
 import logging
-from typing import Dict, Any, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlparse
 from datetime import datetime, timezone
 
+import httpx
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-from .exceptions import CrawlerError, CrawlingError, RateLimitError
-from .utils import setup_logger, normalize_url, clean_text
-from .ai_processor import AiProcessor
+from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode
+from .exceptions import CrawlerError, CrawlingError, ConfigurationError, RateLimitError
+from .utils import setup_logger
+from .ai_processor import MODEL, PROMPT_VERSION, AiProcessor
+from .frontier import CrawlFrontier, url_key
+from .cache import CachedPage, PageCache
+from .llm_cache import LLMCache
+from .batching import RelevanceBatcher
+from .browser_pool import BrowserPool
+from .fetcher import GONE_STATUS_CODES, TieredFetcher
+from .politeness import THROTTLE_STATUS_CODES, PolitenessScheduler, parse_retry_after
+from .incremental import CrawlStateStore, IncrementalCrawl
+from .checkpoint import DONE, REUSED, CheckpointStore
+from .sinks import ResultSink
+from .coordinator import CrawlCoordinator, consume
+from .parsing import ParserPool
+from .link_scoring import LinkScorer, link_priority
+from .prefilter import ACCEPT, AMBIGUOUS, RELEVANCE_THRESHOLD, RelevancePrefilter
+from .dedup import NearDuplicateIndex
+from .canonical import UrlCanonicalizer
+from .sitemaps import SitemapEntry, SitemapReader, freshness
+from .content import main_content_sections
 
 class EnhancedCrawlerClient:
-    def __init__(self, api_key: Optional[str] = None, user_agent: str = "Crawler/1.0"):
+    def __init__(self, api_key: Optional[str] = None, user_agent: str = "Crawler/1.0",
+                 page_cache: Optional[PageCache] = None, llm_cache: Optional[LLMCache] = None,
+                 browser_pool_size: int = 8, browser_tab_max_uses: int = 50,
+                 browser_recycle_after: Optional[int] = 2000,
+                 browser_max_memory_mb: Optional[float] = None,
+                 http_fast_path: bool = True,
+                 politeness: Optional[PolitenessScheduler] = None,
+                 polite: bool = True,
+                 state_store: Optional[CrawlStateStore] = None,
+                 checkpoint_store: Optional[CheckpointStore] = None,
+                 parse_executor: str = "thread",
+                 parse_workers: Optional[int] = None,
+                 max_llm_input_tokens: int = 2000,
+                 long_page_mode: str = "pack",
+                 url_canonicalizer: Optional[UrlCanonicalizer] = None,
+                 canonicalize_urls: bool = True):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to environment variable)
+            user_agent: User agent sent by the browser and the HTTP client
+            page_cache: Optional on-disk cache of fetched HTML shared across crawls
+            llm_cache: Optional persistent cache of relevance and extraction responses
+            browser_pool_size: Maximum number of browser tabs open at the same time
+            browser_tab_max_uses: Pages rendered in one tab before it is replaced
+            browser_recycle_after: Pages rendered before the browser is restarted
+            browser_max_memory_mb: Restart the browser when it uses more memory than this
+            http_fast_path: Fetch server-rendered pages over plain HTTP and only use the
+                browser for pages that need JavaScript
+            politeness: Per-host rate limiter to use instead of the default one
+            polite: Rate limit requests per host; False disables the scheduler
+            state_store: Optional store of per-page content hashes and results used by
+                incremental re-crawls
+            checkpoint_store: Optional store that checkpoints crawls so they can be
+                resumed with :meth:`resume` after the process dies
+            parse_executor: Where HTML is parsed: ``"thread"`` or ``"process"`` pools keep
+                the event loop responsive, ``"inline"`` parses on the loop
+            parse_workers: Size of the parsing pool (defaults to the CPU count, at most 8)
+            max_llm_input_tokens: Token budget for the page's main content in extraction
+                prompts; the sections most relevant to the instructions are kept
+            long_page_mode: ``"pack"`` extracts from the sections that fit the budget,
+                ``"map_reduce"`` extracts from every chunk of a long page and merges the results
+            url_canonicalizer: Canonicalizer to use instead of the default one, e.g.
+                with per-site rules
+            canonicalize_urls: Deduplicate discovered links by their canonical URL
+                (tracking parameters, query order, index pages, rel=canonical, ...);
+                links are still fetched as written. False only ignores fragments
+        """
         self.logger = setup_logger("EnhancedCrawlerClient")
         load_dotenv()
 
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.ai_processor = AiProcessor(api_key=self.api_key)
+        self.ai_processor = AiProcessor(api_key=self.api_key, cache=llm_cache,
+                                        max_input_tokens=max_llm_input_tokens,
+                                        long_page_mode=long_page_mode)
 
         self.browser_config = BrowserConfig(
             headless=True,
@@ -42,69 +111,125 @@ class EnhancedCrawlerClient:
 
         self.crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, stream=False)
 
-        self._crawler = None
-        self._crawler_initialized = False
+        self.page_cache = page_cache
+        self.state_store = state_store
+        self.checkpoint_store = checkpoint_store
+        self._checkpoint_writer: Optional[ThreadPoolExecutor] = None
+        self.user_agent = user_agent
+
+        self.browser_pool = BrowserPool(
+            self.browser_config,
+            size=browser_pool_size,
+            max_uses=browser_tab_max_uses,
+            recycle_after=browser_recycle_after,
+            max_memory_mb=browser_max_memory_mb
+        )
+        if url_canonicalizer is None and canonicalize_urls:
+            url_canonicalizer = UrlCanonicalizer()
+        self.canonicalizer = url_canonicalizer
+        self.parser = ParserPool(parse_executor, max_workers=parse_workers, link_key=url_canonicalizer)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.fetcher = TieredFetcher(self._get_http_client) if http_fast_path else None
+        if politeness is None and polite:
+            politeness = PolitenessScheduler(user_agent=user_agent)
+        if politeness is not None and politeness.client_factory is None:
+            politeness.client_factory = self._get_http_client
+        self.politeness = politeness
 
     async def initialize_crawler(self):
-        if not self._crawler_initialized:
-            self._crawler = AsyncWebCrawler(config=self.browser_config)
-            await self._crawler.start()
-            self._crawler_initialized = True
+        if not self.browser_pool.started:
+            await self.browser_pool.start()
             self.logger.info("Crawler initialized")
 
     async def _ensure_crawler_initialized(self):
-        if not self._crawler_initialized:
+        if not self.browser_pool.started:
             await self.initialize_crawler()
 
     async def close(self):
-        if self._crawler_initialized and self._crawler:
-            try:
-                await self._crawler.close()
-            except Exception as e:
-                self.logger.warning(f"Error while closing crawler: {e}")
-            self._crawler_initialized = False
+        if self.browser_pool.started:
+            await self.browser_pool.close()
             self.logger.info("Crawler closed")
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        # Waits for parses still running in the pool, so keep it off the event loop
+        await asyncio.to_thread(self.parser.shutdown)
+        if self._checkpoint_writer is not None:
+            await asyncio.to_thread(self._checkpoint_writer.shutdown)
+            self._checkpoint_writer = None
+        try:
+            await self.ai_processor.aclose()
+        except Exception as e:
+            self.logger.warning(f"Error while closing AI processor: {e}")
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        title_tag = soup.find('title')
-        if title_tag and title_tag.text:
-            return clean_text(title_tag.text)
-        h1_tag = soup.find('h1')
-        if h1_tag and h1_tag.text:
-            return clean_text(h1_tag.text)
-        return "No title found"
-
-    def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
-        links = []
-        seen_urls = set()
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            normalized_url = normalize_url(base_url, href)
-            if normalized_url and normalized_url not in seen_urls:
-                seen_urls.add(normalized_url)
-                links.append(normalized_url)
-        return links
-
-    def _extract_structured_markdown(self, soup: BeautifulSoup) -> str:
-        lines = []
-        for tag in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'ol', 'li', 'pre', 'code']):
-            name = tag.name.lower()
-            text = clean_text(tag.get_text(" ", strip=True))
-            if not text:
-                continue
-            if name == 'h1':
-                lines.append(f"# {text}")
-            elif name == 'h2':
-                lines.append(f"## {text}")
-            elif name == 'h3':
-                lines.append(f"### {text}")
-            elif name == 'p':
-                lines.append(text)
-            elif name == 'li':
-                lines.append(f"- {text}")
-            elif name == 'pre' or name == 'code':
-                lines.append(f"```\n{text}\n```")
-        return "\n\n".join(lines)
+    def _checkpoint(self, method, *args) -> asyncio.Future:
+        """
+        Run a checkpoint store call on the client's checkpoint writer thread.
+
+        Calls run one at a time in the order they were made (a URL is always recorded
+        before it is claimed), and the event loop never waits on SQLite.
+        """
+        if self._checkpoint_writer is None:
+            self._checkpoint_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawler-checkpoint")
+        return asyncio.get_running_loop().run_in_executor(self._checkpoint_writer, method, *args)
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive HTTP client used for requests that don't need the browser."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True,
+                timeout=httpx.Timeout(15.0, connect=5.0)
+            )
+        return self._http_client
+
+    async def _cached_page(self, url: str) -> Optional[CachedPage]:
+        """
+        Return the cached page for a URL if it can be used without a browser render.
+
+        Fresh entries are returned directly. Stale entries are revalidated with a
+        conditional GET when the cache allows it; a 304 (or an unchanged ETag /
+        Last-Modified) restarts the entry's TTL and returns the cached body.
+        """
+        cached = await asyncio.to_thread(self.page_cache.get, url)
+        if cached is None:
+            return None
+        if self.page_cache.is_fresh(cached):
+            self.logger.info(f"Cache hit for {url}")
+            return cached
+        if not self.page_cache.revalidate or not cached.has_validators:
+            return None
+
+        headers = {}
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        await self._wait_for_host(url)
+        started = time.monotonic()
+        try:
+            # Stream so a changed page's body is never downloaded here
+            async with self._get_http_client().stream("GET", url, headers=headers) as response:
+                throttled = self._throttled(url, response.status_code, response.headers,
+                                            time.monotonic() - started)
+                unchanged = response.status_code == 304 or (
+                    response.status_code == 200 and (
+                        (cached.etag and response.headers.get("etag") == cached.etag) or
+                        (cached.last_modified and response.headers.get("last-modified") == cached.last_modified)
+                    )
+                )
+        except httpx.HTTPError as e:
+            self.logger.warning(f"Revalidation of {url} failed: {e}")
+            return None
+
+        if throttled:
+            # Treated as a miss; the fetch that follows waits out the host's backoff
+            return None
+        if unchanged:
+            await asyncio.to_thread(self.page_cache.touch, url)
+            self.logger.info(f"Cache revalidated for {url}")
+            return cached
+        return None
 
     async def wait_for_dynamic_content(self, page, selectors=None, timeout=5000):
         """
@@ -128,86 +253,236 @@ class EnhancedCrawlerClient:
             except Exception as e:
                 self.logger.warning(f"Timeout waiting for network idle: {e}")
     
-    async def _handle_rate_limiting(self, url, retry_count=0, max_retries=3, initial_delay=2):
+    async def _wait_for_host(self, url: str) -> None:
+        if self.politeness is not None:
+            await self.politeness.acquire(url)
+
+    def _throttled(self, url: str, status_code: Optional[int], headers: Dict[str, str],
+                   latency: Optional[float] = None) -> bool:
+        """Report a response to the politeness scheduler; True if the host asked us to back off."""
+        if self.politeness is None:
+            return status_code in THROTTLE_STATUS_CODES
+        retry_after = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+        return self.politeness.record(url, status_code, latency, retry_after)
+
+    async def _handle_rate_limiting(self, url: str, headers: Dict[str, str], retry_count: int,
+                                    max_retries: int, initial_delay: float = 2.0,
+                                    max_delay: float = 300.0) -> int:
         """
-        Handle rate limiting with exponential backoff.
-        
-        Args:
-            url: The URL being crawled
-            retry_count: Current retry attempt
-            max_retries: Maximum number of retries
-            initial_delay: Initial delay in seconds
-            
+        Count a throttled attempt and wait before the next one.
+
+        With a politeness scheduler the wait happens there, pausing only this host.
+        Without one, this request sleeps for the response's ``Retry-After`` or, if it
+        has none, with exponential backoff.
+
         Returns:
-            True if should retry, False if max retries exceeded
-            
+            The new retry count
+
         Raises:
             RateLimitError: If max retries exceeded
         """
         if retry_count >= max_retries:
             raise RateLimitError(f"Rate limit exceeded for {url} after {max_retries} retries")
-        
-        delay = initial_delay * (2 ** retry_count)
+        if self.politeness is not None:
+            self.logger.warning(f"Rate limited for {url}. Retrying (attempt {retry_count+1}/{max_retries})")
+            return retry_count + 1
+
+        retry_after = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = initial_delay * (2 ** retry_count)
+        delay = min(delay, max_delay)
         self.logger.warning(f"Rate limited for {url}. Retrying in {delay}s (attempt {retry_count+1}/{max_retries})")
         await asyncio.sleep(delay)
-        return True
+        return retry_count + 1
+
+    async def scrape_page(self, url: str, instructions: Optional[str] = None,
+                          relevance_batcher: Optional[RelevanceBatcher] = None,
+                          incremental: Optional[IncrementalCrawl] = None,
+                          link_scorer: Optional[LinkScorer] = None,
+                          rescore_links: bool = False,
+                          prefilter: Optional[RelevancePrefilter] = None,
+                          duplicates: Optional[NearDuplicateIndex] = None) -> Dict[str, Any]:
+        """
+        Fetch a single page, score it against the instructions and extract its content.
 
-    async def scrape_page(self, url: str, instructions: Optional[str] = None) -> Dict[str, Any]:
+        Args:
+            url: The page URL
+            instructions: Natural language instructions for what to extract
+            relevance_batcher: Optional batcher that scores this page together with
+                pages from other workers instead of making a dedicated LLM call
+            incremental: Optional change tracker; if the page's content is unchanged
+                since the last run, its stored result is returned without any LLM call
+            link_scorer: Optional scorer; the result then lists the best-scored links
+                instead of the first ones, with their scores under ``"link_scores"``
+            rescore_links: With a ``link_scorer``, let the LLM rescore the links of
+                relevant pages in one batched request per page
+            prefilter: Optional local relevance stage; pages it accepts or rejects
+                outright skip the relevance LLM call
+            duplicates: Optional near-duplicate index; a page whose main content
+                duplicates an earlier page skips both LLM calls and its result names
+                the earlier page under ``"duplicate_of"``
+
+        Returns:
+            The page result dictionary (or ``{"url", "error"}`` on failure)
+        """
         self.logger.info(f"Scraping URL: {url}")
         retry_count = 0
         max_retries = 3
         
         while True:
             try:
-                await self._ensure_crawler_initialized()
-                session_id = f"session_{int(time.time())}"
-                
-                # Try with different browser configurations if needed
-                if retry_count > 0:
-                    # Try with different browser settings on retry
-                    modified_config = self.crawl_config
-                    if "disable-http2" not in str(self.browser_config.extra_args):
-                        self.logger.info(f"Retry {retry_count} with HTTP/1.1 forced")
-                        # Force HTTP/1.1 on retry
-                        self._crawler = AsyncWebCrawler(config=BrowserConfig(
-                            headless=True,
-                            verbose=False,
-                            extra_args=[
-                                "--disable-gpu", 
-                                "--disable-dev-shm-usage", 
-                                "--no-sandbox",
-                                "--disable-http2",
-                            ],
-                            user_agent=self.browser_config.user_agent
-                        ))
-                        await self._crawler.start()
-                
-                result = await self._crawler.arun(url=url, config=self.crawl_config, session_id=session_id)
+                html_content = None
+                # Relative links resolve against the URL the page was served from
+                base_url = url
+                cached = await self._cached_page(url) if self.page_cache is not None else None
+                if cached is not None:
+                    html_content, base_url = cached.html, cached.url
+
+                if html_content is None and self.fetcher is not None:
+                    await self._wait_for_host(url)
+                    started = time.monotonic()
+                    static_page = await self.fetcher.fetch(url)
+                    if static_page is not None:
+                        if self._throttled(url, static_page.status_code, static_page.headers,
+                                           time.monotonic() - started):
+                            retry_count = await self._handle_rate_limiting(
+                                url, static_page.headers, retry_count, max_retries
+                            )
+                            continue
+                        if static_page.status_code in GONE_STATUS_CODES:
+                            raise CrawlingError(url, f"HTTP {static_page.status_code}", static_page.status_code)
+                        html_content, base_url = static_page.html, static_page.url
+                        if self.page_cache is not None:
+                            await asyncio.to_thread(self.page_cache.put, url, html_content, static_page.headers,
+                                                    final_url=base_url)
+
+                if html_content is None:
+                    await self._ensure_crawler_initialized()
+
+                    # Try with different browser configurations if needed
+                    if retry_count > 0:
+                        # Try with different browser settings on retry
+                        if "disable-http2" not in str(self.browser_config.extra_args):
+                            self.logger.info(f"Retry {retry_count} with HTTP/1.1 forced")
+                            # Force HTTP/1.1 on retry; the pool closes the old browser first
+                            self.browser_config = BrowserConfig(
+                                headless=True,
+                                verbose=False,
+                                extra_args=[
+                                    "--disable-gpu", 
+                                    "--disable-dev-shm-usage", 
+                                    "--no-sandbox",
+                                    "--disable-http2",
+                                ],
+                                user_agent=self.browser_config.user_agent
+                            )
+                            await self.browser_pool.restart(self.browser_config)
 
-                if not result.success:
-                    # Check for rate limiting patterns
-                    if "429" in str(result.error_message) or "rate limit" in str(result.error_message).lower():
-                        await self._handle_rate_limiting(url, retry_count, max_retries)
-                        retry_count += 1
+                    await self._wait_for_host(url)
+                    # Each page gets a pooled tab of its own for the duration of the fetch
+                    result = await self.browser_pool.run(url, self.crawl_config)
+                    headers = getattr(result, "response_headers", None) or {}
+                    status_code = getattr(result, "status_code", None)
+                    # Older crawl4ai versions only report rate limiting in the error message
+                    if not result.success and ("429" in str(result.error_message) or
+                                               "rate limit" in str(result.error_message).lower()):
+                        status_code = 429
+                    # Render time says little about server load, so latency is not recorded
+                    if self._throttled(url, status_code, headers):
+                        retry_count = await self._handle_rate_limiting(url, headers, retry_count, max_retries)
                         continue
-                    raise CrawlingError(url, result.error_message or "Unknown error")
 
-                html_content = result.html
-                soup = BeautifulSoup(html_content, 'html.parser')
-                title = self._extract_title(soup)
-                links = self._extract_links(soup, base_url=url)
-                structured_markdown = self._extract_structured_markdown(soup)
+                    if status_code in GONE_STATUS_CODES:
+                        raise CrawlingError(url, f"HTTP {status_code}", status_code)
+                    if not result.success:
+                        raise CrawlingError(url, result.error_message or "Unknown error", status_code)
+
+                    html_content = result.html
+                    base_url = getattr(result, "redirected_url", None) or url
+                    if self.page_cache is not None:
+                        await asyncio.to_thread(self.page_cache.put, url, html_content, headers, final_url=base_url)
+
+                # Parse once; the AI processor works from the same document
+                document = await self.parser.parse(html_content, url=base_url)
+                title = document.title
+                links = document.links
+                structured_markdown = document.markdown
+                declared_canonical = None
+                if self.canonicalizer is not None:
+                    declared_canonical = self.canonicalizer.declared_canonical(url, document.canonical_url)
+
+                # Checked before the incremental lookup so unchanged pages are indexed too
+                duplicate = None
+                if duplicates is not None:
+                    duplicate = duplicates.check(url, "\n\n".join(main_content_sections(document)))
+
+                if incremental is not None:
+                    content_hash = document.content_hash()
+                    previous = await asyncio.to_thread(incremental.reuse, url, content_hash)
+                    if previous is not None:
+                        self.logger.info(f"Content unchanged for {url}; reusing previous results")
+                        previous["timestamp"] = datetime.now(timezone.utc).isoformat()
+                        if duplicates is not None and duplicate is None:
+                            # Its duplicates later in the crawl take over this score
+                            duplicates.record_relevance(url, previous.get("relevance", {}).get("score", 0.0))
+                        return previous
+
+                if duplicate is not None:
+                    canonical_url, similarity = duplicate
+                    self.logger.info(f"{url} duplicates {canonical_url} (similarity {similarity:.2f})")
+                    # Canonical pages still being scored do not hold back their duplicates
+                    canonical_score = duplicates.relevance(canonical_url)
+                    result_data = {
+                        "url": url,
+                        "title": title,
+                        "links": links[:20],
+                        "duplicate_of": canonical_url,
+                        "relevance": {
+                            "score": canonical_score if canonical_score is not None else 0.0,
+                            "reason": f"Near-duplicate of {canonical_url} (similarity {similarity:.2f})"
+                        },
+                        "timestamp": datetime.now(timezone.utc).isoformat()
+                    }
+                    if declared_canonical:
+                        result_data["canonical_url"] = declared_canonical
+                    if base_url != url:
+                        result_data["final_url"] = base_url
+                    if incremental is not None:
+                        await asyncio.to_thread(incremental.save, url, content_hash, result_data)
+                    return result_data
 
                 content_sample = structured_markdown[:5000] if instructions else ""
-                relevance_score, relevance_reason = (1.0, "No instructions") if not instructions else self.ai_processor.analyze_relevance(
-                    content=content_sample,
-                    title=title,
-                    instructions=instructions
-                )
+                decision = AMBIGUOUS
+                if instructions and prefilter is not None:
+                    decision, relevance_score, relevance_reason = prefilter.classify(title, document.text)
+                if not instructions:
+                    relevance_score, relevance_reason = (1.0, "No instructions")
+                elif decision != AMBIGUOUS:
+                    self.logger.info(f"Prefilter {'accepted' if decision == ACCEPT else 'rejected'} {url}")
+                elif relevance_batcher is not None:
+                    relevance_score, relevance_reason = await relevance_batcher.score(title, content_sample)
+                else:
+                    relevance_score, relevance_reason = await self.ai_processor.analyze_relevance_async(
+                        content=content_sample,
+                        title=title,
+                        instructions=instructions
+                    )
+
+                if duplicates is not None:
+                    duplicates.record_relevance(url, relevance_score)
 
-                if relevance_score >= 0.3:
-                    ai_extracted_content = self.ai_processor.extract_structured_content(
-                        html_content=html_content,
+                link_scores = None
+                if link_scorer is not None:
+                    ranked = link_scorer.rank(links, document.anchors)[:20]
+                    if rescore_links and instructions and relevance_score >= RELEVANCE_THRESHOLD:
+                        ranked = await self._rescore_links(ranked, document, url, instructions)
+                    links = [link for link, _ in ranked]
+                    link_scores = dict(ranked)
+
+                if relevance_score >= RELEVANCE_THRESHOLD:
+                    ai_extracted_content = await self.ai_processor.extract_structured_content_async(
+                        document=document,
                         title=title,
                         url=url,
                         instructions=instructions or "Extract main content"
@@ -236,6 +511,14 @@ class EnhancedCrawlerClient:
                         "timestamp": datetime.now(timezone.utc).isoformat()
                     }
 
+                if link_scores is not None:
+                    result_data["link_scores"] = link_scores
+                if declared_canonical:
+                    result_data["canonical_url"] = declared_canonical
+                if base_url != url:
+                    result_data["final_url"] = base_url
+                if incremental is not None:
+                    await asyncio.to_thread(incremental.save, url, content_hash, result_data)
                 return result_data
 
             except RateLimitError as e:
@@ -244,67 +527,618 @@ class EnhancedCrawlerClient:
                 return {"url": url, "error": str(e)}
             except CrawlingError as e:
                 self.logger.error(f"Crawling error for {url}: {str(e)}")
-                return {"url": url, "error": f"Failed to crawl page: {str(e)}"}
+                if incremental is not None and e.status_code in GONE_STATUS_CODES:
+                    incremental.mark_gone(url)
+                error = {"url": url, "error": f"Failed to crawl page: {str(e)}"}
+                if e.status_code is not None:
+                    error["status_code"] = e.status_code
+                return error
             except Exception as e:
                 self.logger.error(f"Error processing {url}: {str(e)}")
                 return {"url": url, "error": f"Error processing page: {str(e)}"}
 
-    async def scrape_async(self, url: str, instructions: str = None, depth: int = 1,
-                           follow_external_links: bool = False, max_pages: int = 100) -> Dict[str, Any]:
+    async def _sitemap_seeds(self, reader: SitemapReader, url: str, limit: int,
+                             link_scorer: Optional[LinkScorer],
+                             modified_since: Optional[float]) -> Tuple[List[Tuple[SitemapEntry, float]], bool]:
         """
-        Async version of the scrape method.
+        The ``limit`` most promising pages of the start URL's host listed in its sitemaps.
+
+        Returns:
+            ``(entry, score)`` pairs, best first (ties keep sitemap order), and whether
+            listed pages were left out because of the limit
+        """
+        host = urlparse(url).netloc.lower()
+        now = time.time()
+        best: List[Tuple[float, int, SitemapEntry]] = []
+        position = 0
+        async for entry in reader.entries(await reader.discover(url), modified_since):
+            if urlparse(entry.url).netloc.lower() != host:
+                continue
+            fresh = freshness(entry.lastmod, now)
+            score = link_priority(link_scorer.score(entry.url), fresh) if link_scorer is not None else fresh
+            position += 1
+            # Bounded heap, so multi-million URL sitemaps cost max_pages entries of memory
+            item = (score, -position, entry)
+            if len(best) < limit:
+                heapq.heappush(best, item)
+            elif item[:2] > best[0][:2]:
+                heapq.heapreplace(best, item)
+        seeds = [(entry, score) for score, _, entry in sorted(best, key=lambda item: item[:2], reverse=True)]
+        return seeds, position > limit
+
+    async def _rescore_links(self, ranked: List[Tuple[str, float]], document, url: str,
+                             instructions: str) -> List[Tuple[str, float]]:
+        """Blend local link scores with the LLM's scores for the same links, best first."""
+        prioritized = await self.ai_processor.prioritize_links_async(
+            [link for link, _ in ranked], document.title, url, instructions, anchors=document.anchors
+        )
+        llm_scores = {}
+        for link, score in prioritized:
+            try:
+                llm_scores[link] = min(max(float(score), 0.0), 1.0)
+            except (TypeError, ValueError):
+                continue
+        # The LLM judges meaning better than keyword overlap, so its score weighs more
+        rescored = [(link, round(0.3 * score + 0.7 * llm_scores.get(link, score), 4)) for link, score in ranked]
+        rescored.sort(key=lambda item: item[1], reverse=True)
+        return rescored
+
+    def validate_crawl_options(self, **options) -> None:
+        """
+        Check ``scrape_stream`` keyword arguments without starting a crawl.
+
+        Lets callers such as the API reject a bad request up front instead of failing
+        once the crawl has started.
+
+        Raises:
+            ConfigurationError: For unknown options or values ``scrape_stream`` rejects
+        """
+        try:
+            bound = inspect.signature(self.scrape_stream).bind("", **options)
+        except TypeError as e:
+            raise ConfigurationError(str(e))
+        bound.apply_defaults()
+        arguments = bound.arguments
+        self._check_crawl_options(**{name: arguments[name] for name in (
+            "depth", "max_pages", "concurrency", "per_host_concurrency", "relevance_batch_size",
+            "incremental", "crawl_id", "coordinator", "strategy", "bloom_capacity", "seed_from_sitemaps"
+        )})
+        if arguments["relevance_prefilter"]:
+            RelevancePrefilter(arguments["instructions"], reject_below=arguments["prefilter_reject_below"],
+                               accept_above=arguments["prefilter_accept_above"])
+        if arguments["skip_near_duplicates"]:
+            NearDuplicateIndex(threshold=arguments["duplicate_threshold"])
+
+    def _check_crawl_options(self, depth: int, max_pages: int, concurrency: int,
+                             per_host_concurrency: Optional[int], relevance_batch_size: int,
+                             incremental: bool, crawl_id: Optional[str],
+                             coordinator: Optional[CrawlCoordinator], strategy: str,
+                             bloom_capacity: Optional[int], seed_from_sitemaps: bool) -> None:
+        """Raise ConfigurationError for crawl options ``scrape_stream`` cannot run with."""
+        for name, value, minimum in (("depth", depth, 0), ("max_pages", max_pages, 1),
+                                     ("concurrency", concurrency, 1),
+                                     ("relevance_batch_size", relevance_batch_size, 1)):
+            if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+                raise ConfigurationError(f"{name} must be an integer of at least {minimum}")
+        if per_host_concurrency is not None and (
+                isinstance(per_host_concurrency, bool) or not isinstance(per_host_concurrency, int)
+                or per_host_concurrency < 1):
+            raise ConfigurationError("per_host_concurrency must be at least 1")
+        if incremental and self.state_store is None:
+            raise ConfigurationError("incremental crawls need a state_store")
+        if strategy not in ("bfs", "best_first"):
+            raise ConfigurationError(f"Unknown crawl strategy: {strategy}")
+        if coordinator is not None and not crawl_id:
+            raise ConfigurationError("coordinated crawls need a crawl_id shared by every worker")
+        if crawl_id and self.checkpoint_store is None and coordinator is None:
+            raise ConfigurationError("crawl_id needs a checkpoint_store")
+        if coordinator is not None:
+            # The coordinator owns the queue and the crawl state: it hands out URLs in
+            # discovery order and is itself the checkpoint
+            unsupported = [name for name, used in (
+                ("seed_from_sitemaps", seed_from_sitemaps),
+                ("strategy='best_first'", strategy == "best_first"),
+                ("incremental", incremental),
+                ("bloom_capacity", bloom_capacity is not None),
+                ("checkpoint_store", self.checkpoint_store is not None)
+            ) if used]
+            if unsupported:
+                raise ConfigurationError(f"Not supported in coordinated crawls: {', '.join(unsupported)}")
+
+    async def scrape_stream(self, url: str, instructions: str = None, depth: int = 1,
+                            follow_external_links: bool = False, max_pages: int = 100,
+                            concurrency: int = 1, per_host_concurrency: Optional[int] = None,
+                            bloom_capacity: Optional[int] = None,
+                            relevance_batch_size: int = 1,
+                            relevance_batch_wait: float = 0.5,
+                            incremental: bool = False,
+                            crawl_id: Optional[str] = None,
+                            checkpoint_interval: float = 5.0,
+                            coordinator: Optional[CrawlCoordinator] = None,
+                            lease_seconds: float = 300.0,
+                            poll_interval: float = 1.0,
+                            strategy: str = "bfs",
+                            llm_link_scoring: bool = False,
+                            relevance_prefilter: bool = False,
+                            prefilter_reject_below: float = 0.05,
+                            prefilter_accept_above: float = 0.5,
+                            skip_near_duplicates: bool = False,
+                            duplicate_threshold: float = 0.9,
+                            seed_from_sitemaps: bool = False,
+                            sitemap_modified_since: Optional[float] = None,
+                            meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
         """
+        Crawl a website and yield each page result as soon as it is scraped.
+
+        Pages are fetched by ``concurrency`` workers consuming a shared frontier.
+        With the default of a single worker the crawl order is plain BFS; with more
+        workers depth and ``max_pages`` are enforced the same way, but pages complete
+        in whatever order the network returns them. Nothing is retained after a page
+        has been yielded, so memory does not grow with the size of the crawl.
+
+        Args:
+            url: The URL to start scraping from
+            instructions: Natural language instructions for what to extract
+            depth: How many levels of links to follow
+            follow_external_links: Whether to follow links to external domains
+            max_pages: Maximum number of pages to scrape
+            concurrency: Number of pages fetched at the same time across all hosts
+            per_host_concurrency: Maximum number of in-flight pages per host
+                (defaults to ``concurrency``)
+            bloom_capacity: Expected number of discovered URLs; when set, the frontier
+                deduplicates with a fixed-size Bloom filter instead of an exact set
+            relevance_batch_size: Score up to this many pages per relevance LLM call
+                (capped at ``concurrency``, since only in-flight pages can share a batch)
+            relevance_batch_wait: Seconds to wait for a relevance batch to fill up
+            incremental: Reuse the results of pages whose content is unchanged since the
+                last run of the same crawl (requires a ``state_store``) and report which
+                pages were added, changed or removed in ``meta["changes"]``. Pages
+                the crawl did not reach are only reported removed when ``max_pages``
+                left nothing out; pages answering 404/410 always are.
+            crawl_id: With a ``checkpoint_store``, the id to checkpoint this crawl under
+                (generated when omitted). If a checkpoint with this id exists, the crawl
+                continues from its frontier instead of starting over; pages gathered
+                before are not yielded again.
+            checkpoint_interval: Seconds between checkpoint commits
+            coordinator: Share the crawl with other workers, possibly on other machines,
+                through this backend. Every worker calls ``scrape_stream`` with the same
+                ``crawl_id`` and yields the pages it fetched itself; the first one to
+                arrive sets the crawl parameters. Per-host limits, the relevance
+                prefilter and near-duplicate detection apply per worker. Best-first
+                ordering, incremental crawls, sitemap seeding, ``bloom_capacity`` and
+                a ``checkpoint_store`` raise ConfigurationError, since the coordinator
+                owns the queue and the crawl state.
+            lease_seconds: With a ``coordinator``, how long a URL stays with one worker
+                before others may retry it
+            poll_interval: With a ``coordinator``, seconds an idle worker waits before
+                asking for URLs again
+            strategy: ``"bfs"`` crawls breadth-first. ``"best_first"`` always fetches the
+                most promising queued link next, scored locally from its anchor text and
+                URL against the instructions and from the relevance of the page linking
+                to it, so a ``max_pages`` budget reaches relevant content sooner.
+            llm_link_scoring: In best-first mode, also have the LLM rescore the links of
+                each relevant page (one request per page)
+            relevance_prefilter: Score pages locally with BM25 against the instructions
+                first. Pages below ``prefilter_reject_below`` are rejected and pages
+                above ``prefilter_accept_above`` are accepted without a relevance LLM
+                call; only the band in between is sent to the LLM.
+            prefilter_reject_below: Lower band edge (at most 0.3, the extraction threshold)
+            prefilter_accept_above: Upper band edge (at least 0.3)
+            skip_near_duplicates: Detect pages whose main content nearly duplicates a
+                page already crawled (MinHash with an LSH band index) before any LLM
+                call. Duplicates are yielded without markdown or extraction, with the
+                canonical page's URL under ``"duplicate_of"``.
+            duplicate_threshold: Estimated Jaccard similarity of the word shingles at
+                which a page counts as a duplicate
+            seed_from_sitemaps: Queue the pages listed in the site's sitemaps (found
+                through robots.txt ``Sitemap:`` lines or ``/sitemap.xml``, sitemap indexes
+                followed) before the crawl starts, alongside the start URL. Up to
+                ``max_pages`` of them are kept, most recently modified first (in
+                best-first mode, combined with their link score). In incremental crawls,
+                pages not modified since they were last crawled reuse their stored result
+                without being fetched, and do not count against ``max_pages``.
+            sitemap_modified_since: Unix timestamp; sitemap pages last modified before it
+                are not queued (pages without ``lastmod`` are)
+            meta: Optional dictionary that is filled with the crawl metadata once the
+                stream is exhausted
+
+        Yields:
+            One result dictionary per scraped page
+        """
+        self._check_crawl_options(
+            depth=depth, max_pages=max_pages, concurrency=concurrency,
+            per_host_concurrency=per_host_concurrency, relevance_batch_size=relevance_batch_size,
+            incremental=incremental, crawl_id=crawl_id, coordinator=coordinator, strategy=strategy,
+            bloom_capacity=bloom_capacity, seed_from_sitemaps=seed_from_sitemaps
+        )
+        per_host_concurrency = per_host_concurrency or concurrency
+
         start_time = time.time()
-        self.logger.info(f"Starting crawl of {url} with depth {depth}")
+        self.logger.info(f"Starting crawl of {url} with depth {depth} and {concurrency} worker(s)")
+
+        if coordinator is not None:
+            params = await asyncio.to_thread(coordinator.create, crawl_id, {
+                "url": url,
+                "instructions": instructions,
+                "depth": depth,
+                "follow_external_links": follow_external_links,
+                "max_pages": max_pages
+            })
+            relevance_batcher = None
+            batch_size = min(relevance_batch_size, concurrency)
+            if params["instructions"] and batch_size > 1:
+                relevance_batcher = RelevanceBatcher(
+                    self.ai_processor, params["instructions"],
+                    max_batch_size=batch_size, max_wait=relevance_batch_wait
+                )
+            prefilter = None
+            if relevance_prefilter and params["instructions"]:
+                prefilter = RelevancePrefilter(
+                    params["instructions"], reject_below=prefilter_reject_below,
+                    accept_above=prefilter_accept_above
+                )
+            duplicates = NearDuplicateIndex(threshold=duplicate_threshold) if skip_near_duplicates else None
+            pages_crawled = 0
+            async for page_data in consume(self, coordinator, crawl_id, concurrency=concurrency,
+                                           lease_seconds=lease_seconds, poll_interval=poll_interval,
+                                           relevance_batcher=relevance_batcher,
+                                           per_host_concurrency=per_host_concurrency,
+                                           prefilter=prefilter, duplicates=duplicates):
+                pages_crawled += 1
+                yield page_data
+            if meta is not None:
+                meta.update(params)
+                meta.update({
+                    "concurrency": concurrency,
+                    "crawl_id": crawl_id,
+                    "pages_crawled": pages_crawled,
+                    "coordinator": await asyncio.to_thread(coordinator.stats, crawl_id),
+                    "time_taken": time.time() - start_time,
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                })
+                if prefilter is not None:
+                    meta["prefilter"] = prefilter.stats()
+                if duplicates is not None:
+                    meta["near_duplicates"] = duplicates.stats()
+            self.logger.info(f"Coordinated crawl {crawl_id} completed. This worker scraped {pages_crawled} pages.")
+            return
 
         visited_urls: Set[str] = set()
-        results = []
         start_domain = urlparse(url).netloc
-        url_queue = [(url, 0)]
+        link_scorer = LinkScorer(instructions) if strategy == "best_first" else None
+        prefilter = None
+        if relevance_prefilter and instructions:
+            prefilter = RelevancePrefilter(
+                instructions, reject_below=prefilter_reject_below, accept_above=prefilter_accept_above
+            )
+        duplicates = NearDuplicateIndex(threshold=duplicate_threshold) if skip_near_duplicates else None
+        frontier = CrawlFrontier(key_func=self.canonicalizer or url_key, bloom_capacity=bloom_capacity,
+                                 priority=link_scorer is not None)
+        checkpoint = self.checkpoint_store
+        restored = None
+        if checkpoint is not None and crawl_id and await self._checkpoint(checkpoint.get, crawl_id):
+            restored = await self._checkpoint(checkpoint.load_frontier, crawl_id)
+        frontier_changed = asyncio.Condition()
+        in_flight = 0
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        completed: asyncio.Queue = asyncio.Queue()
+        crawl_done = object()
 
-        while url_queue and len(visited_urls) < max_pages:
-            current_url, current_depth = url_queue.pop(0)
-            if current_url in visited_urls:
-                continue
-            visited_urls.add(current_url)
+        batch_size = min(relevance_batch_size, concurrency)
+        relevance_batcher = None
+        if instructions and batch_size > 1:
+            relevance_batcher = RelevanceBatcher(
+                self.ai_processor, instructions,
+                max_batch_size=batch_size, max_wait=relevance_batch_wait
+            )
+
+        tracker = None
+        if incremental:
+            tracker = IncrementalCrawl(self.state_store, CrawlStateStore.crawl_key(
+                url=url_key(url), instructions=instructions, depth=depth,
+                follow_external_links=follow_external_links, max_pages=max_pages,
+                model=MODEL, prompt_version=PROMPT_VERSION
+            ))
+
+        if restored is not None:
+            # Pages fetched before the interruption count against max_pages; anything
+            # pending or mid-fetch is queued again in its original order
+            for queued_url, queued_depth, state in restored:
+                if state in (DONE, REUSED):
+                    frontier.mark_seen(queued_url)
+                    if state == DONE:
+                        visited_urls.add(queued_url)
+                    if tracker is not None:
+                        tracker.mark_seen(queued_url)
+                else:
+                    # Anchor texts are not checkpointed; rescore from the URL alone
+                    score = link_priority(link_scorer.score(queued_url), 0.0) if link_scorer else 0.0
+                    frontier.add(queued_url, queued_depth, score)
+            self.logger.info(f"Resuming crawl {crawl_id}: {len(visited_urls)} pages done, {len(frontier)} queued")
+        else:
+            frontier.add(url, 0)
+            if checkpoint is not None:
+                crawl_id = await self._checkpoint(checkpoint.create, {
+                    "url": url,
+                    "instructions": instructions,
+                    "depth": depth,
+                    "follow_external_links": follow_external_links,
+                    "max_pages": max_pages,
+                    "options": {
+                        "concurrency": concurrency,
+                        "per_host_concurrency": per_host_concurrency,
+                        "bloom_capacity": bloom_capacity,
+                        "relevance_batch_size": relevance_batch_size,
+                        "relevance_batch_wait": relevance_batch_wait,
+                        "incremental": incremental,
+                        "strategy": strategy,
+                        "llm_link_scoring": llm_link_scoring,
+                        "relevance_prefilter": relevance_prefilter,
+                        "prefilter_reject_below": prefilter_reject_below,
+                        "prefilter_accept_above": prefilter_accept_above,
+                        "skip_near_duplicates": skip_near_duplicates,
+                        "duplicate_threshold": duplicate_threshold,
+                        "seed_from_sitemaps": seed_from_sitemaps,
+                        "sitemap_modified_since": sitemap_modified_since
+                    }
+                }, crawl_id)
+                await self._checkpoint(checkpoint.add_url, crawl_id, url, 0)
+        last_checkpoint = time.monotonic()
+        # Set when pages were left out (max_pages, sitemap_modified_since)
+        pages_left_out = False
+
+        def host_limit(page_url: str) -> asyncio.Semaphore:
+            host = urlparse(page_url).netloc
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(per_host_concurrency)
+            return host_limits[host]
+
+        async def enqueue_links(page_data: Dict[str, Any], page_url: str, page_depth: int) -> None:
+            if page_depth >= depth:
+                return
+            added = []
+            page_domain = urlparse(page_url).netloc
+            link_scores = page_data.get('link_scores') or {}
+            parent_relevance = page_data.get('relevance', {}).get('score', 0.0)
+            for link in page_data.get('links', []):
+                link_domain = urlparse(link).netloc
+                if link_domain == page_domain or (follow_external_links and link_domain == start_domain):
+                    score = 0.0
+                    if link_scorer is not None:
+                        link_score = link_scores[link] if link in link_scores else link_scorer.score(link)
+                        score = link_priority(link_score, parent_relevance)
+                    if frontier.add(link, page_depth + 1, score):
+                        added.append((link, page_depth + 1))
+                    elif link_scorer is not None:
+                        # Already queued from another page: keep the better of both scores
+                        frontier.rescore(link, score)
+            if added and checkpoint is not None:
+                # Queued on the writer before any worker can claim these links
+                await self._checkpoint(checkpoint.add_urls, crawl_id, added)
+
+        sitemap_reader = None
+        if seed_from_sitemaps and restored is None:
+            sitemap_reader = SitemapReader(
+                self._get_http_client, wait=self._wait_for_host,
+                robots=self.politeness.robots if self.politeness is not None else None
+            )
+            seeds, truncated = await self._sitemap_seeds(
+                sitemap_reader, url, max_pages, link_scorer, sitemap_modified_since
+            )
+            if truncated or sitemap_reader.urls_skipped or sitemap_reader.sitemaps_skipped:
+                pages_left_out = True
+            reused = 0
+            for entry, score in seeds:
+                if frontier.seen(entry.url):
+                    continue
+                previous = None
+                if tracker is not None and entry.lastmod is not None:
+                    previous = await asyncio.to_thread(tracker.reuse_unmodified, entry.url, entry.lastmod)
+                if previous is None:
+                    if frontier.add(entry.url, 0, score) and checkpoint is not None:
+                        await self._checkpoint(checkpoint.add_url, crawl_id, entry.url, 0)
+                    continue
+                # Unchanged since the last run: no fetch, and not counted against
+                # max_pages, but its links are still followed so pages only reachable
+                # through it are not reported as removed
+                reused += 1
+                frontier.mark_seen(entry.url)
+                if checkpoint is not None:
+                    await self._checkpoint(checkpoint.add_url, crawl_id, entry.url, 0)
+                    await self._checkpoint(checkpoint.save_result, crawl_id, entry.url, previous, REUSED)
+                await enqueue_links(previous, entry.url, 0)
+                completed.put_nowait(previous)
+            self.logger.info(f"Seeded {len(seeds) - reused} pages from sitemaps; {reused} unmodified pages reused")
+
+        async def worker():
+            nonlocal in_flight, last_checkpoint, pages_left_out
+            while True:
+                async with frontier_changed:
+                    # Idle until there is work or every other worker has finished
+                    while not frontier and in_flight:
+                        await frontier_changed.wait()
+                    if not frontier:
+                        return
+                    current_url, current_depth = frontier.pop()
+                    in_flight += 1
+
+                try:
+                    if len(visited_urls) >= max_pages:
+                        pages_left_out = True
+                        continue
+                    visited_urls.add(current_url)
+                    if checkpoint is not None:
+                        await self._checkpoint(checkpoint.claim, crawl_id, current_url)
+
+                    self.logger.info(f"Scraping {current_url} (depth {current_depth})")
+                    async with host_limit(current_url):
+                        page_data = await self.scrape_page(
+                            url=current_url, instructions=instructions,
+                            relevance_batcher=relevance_batcher, incremental=tracker,
+                            link_scorer=link_scorer, rescore_links=llm_link_scoring,
+                            prefilter=prefilter, duplicates=duplicates
+                        )
+
+                    # A redirect target or a declared canonical URL is this same page;
+                    # fetching it too would only repeat it
+                    for alias in ('final_url', 'canonical_url'):
+                        if page_data.get(alias):
+                            frontier.mark_seen(page_data[alias])
 
+                    await enqueue_links(page_data, current_url, current_depth)
+
+                    if checkpoint is not None:
+                        await self._checkpoint(checkpoint.save_result, crawl_id, current_url, page_data)
+                        if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                            last_checkpoint = time.monotonic()
+                            await self._checkpoint(checkpoint.flush)
+
+                    completed.put_nowait(page_data)
+
+                except Exception as e:
+                    self.logger.error(f"Error processing {current_url}: {str(e)}")
+                    completed.put_nowait({"url": current_url, "error": str(e)})
+                finally:
+                    async with frontier_changed:
+                        in_flight -= 1
+                        frontier_changed.notify_all()
+
+        async def run_workers():
             try:
-                self.logger.info(f"Scraping {current_url} (depth {current_depth})")
-                page_data = await self.scrape_page(url=current_url, instructions=instructions)
-                results.append(page_data)
-
-                if current_depth < depth:
-                    links = page_data.get('links', [])
-                    current_domain = urlparse(current_url).netloc
-                    for link in links:
-                        if link in visited_urls or any(link == u for u, _ in url_queue):
-                            continue
-                        link_domain = urlparse(link).netloc
-                        if link_domain == current_domain or (follow_external_links and link_domain == start_domain):
-                            url_queue.append((link, current_depth + 1))
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+            finally:
+                completed.put_nowait(crawl_done)
 
-            except Exception as e:
-                self.logger.error(f"Error processing {current_url}: {str(e)}")
-                results.append({"url": current_url, "error": str(e)})
+        runner = asyncio.create_task(run_workers())
+        pages_crawled = 0
+        try:
+            while True:
+                page_data = await completed.get()
+                if page_data is crawl_done:
+                    break
+                pages_crawled += 1
+                yield page_data
+            # Surface anything unexpected raised outside the per-page handler
+            await runner
+        finally:
+            if not runner.done():
+                # The consumer stopped early: stop the workers with it
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+            if checkpoint is not None:
+                await self._checkpoint(checkpoint.flush)
+                finished = not runner.cancelled() and runner.exception() is None
+                await self._checkpoint(checkpoint.set_status, crawl_id, "completed" if finished else "interrupted")
 
-        result = {
-            "meta": {
+        # Only a crawl that ran to the end can tell which pages disappeared, and only
+        # one that left nothing out can tell it of the pages it did not reach
+        changes = None
+        if tracker is not None:
+            changes = await asyncio.to_thread(tracker.finish, complete=not pages_left_out)
+        if meta is not None:
+            meta.update({
                 "url": url,
                 "instructions": instructions,
                 "depth": depth,
                 "follow_external_links": follow_external_links,
-                "pages_crawled": len(results),
+                "concurrency": concurrency,
+                "strategy": strategy,
+                "crawl_id": crawl_id,
+                "urls_discovered": frontier.seen_count,
+                "pages_crawled": pages_crawled,
                 "time_taken": time.time() - start_time,
                 "timestamp": datetime.now(timezone.utc).isoformat()
-            },
-            "pages": results
-        }
+            })
+            if self.ai_processor.cache is not None:
+                meta["llm_cache"] = self.ai_processor.cache.stats()
+            if relevance_batcher is not None:
+                meta["relevance_batching"] = relevance_batcher.stats()
+            if prefilter is not None:
+                meta["prefilter"] = prefilter.stats()
+            if duplicates is not None:
+                meta["near_duplicates"] = duplicates.stats()
+            if sitemap_reader is not None:
+                meta["sitemaps"] = sitemap_reader.stats()
+            if self.browser_pool.started:
+                meta["browser_pool"] = self.browser_pool.stats()
+            if self.fetcher is not None:
+                meta["fetch_tiers"] = self.fetcher.stats()
+            if self.politeness is not None:
+                meta["politeness"] = self.politeness.stats()
+            meta["parsing"] = self.parser.stats()
+            if changes is not None:
+                meta["changes"] = changes
+
+        self.logger.info(f"Crawl completed. Scraped {pages_crawled} pages.")
 
-        self.logger.info(f"Crawl completed. Scraped {len(results)} pages.")
-        return result
+    async def scrape_async(self, url: str, instructions: str = None, depth: int = 1,
+                           follow_external_links: bool = False, max_pages: int = 100,
+                           sink: Optional[ResultSink] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Async version of the scrape method.
+
+        Collects every page from :meth:`scrape_stream` (which accepts the same
+        keyword options) into a single result. With a ``sink``, each page is written
+        to it as soon as it is scraped and the sink takes the place of the page list,
+        so memory stays flat however large the crawl is.
+        """
+        meta: Dict[str, Any] = {}
+        pages = sink if sink is not None else []
+        write = sink.write if sink is not None else pages.append
+        async for page in self.scrape_stream(
+            url, instructions, depth, follow_external_links, max_pages, meta=meta, **kwargs
+        ):
+            write(page)
+        if sink is not None:
+            await asyncio.to_thread(sink.flush)
+        return {"meta": meta, "pages": pages}
+
+    async def resume_async(self, crawl_id: str) -> Dict[str, Any]:
+        """
+        Continue a checkpointed crawl from where it stopped.
+
+        The crawl runs with its original parameters, starting from the saved frontier.
+        The returned pages include those gathered before the interruption.
+
+        Args:
+            crawl_id: Id of a crawl recorded in the ``checkpoint_store``
+
+        Returns:
+            A dictionary containing the scraped data and metadata
+        """
+        if self.checkpoint_store is None:
+            raise ConfigurationError("resuming a crawl needs a checkpoint_store")
+        checkpoint = self.checkpoint_store.get(crawl_id)
+        if checkpoint is None:
+            raise ConfigurationError(f"No checkpoint found for crawl {crawl_id}")
+
+        params = checkpoint["params"]
+        meta: Dict[str, Any] = {}
+        async for _ in self.scrape_stream(
+            params["url"], params["instructions"], params["depth"],
+            params["follow_external_links"], params["max_pages"],
+            crawl_id=crawl_id, meta=meta, **params["options"]
+        ):
+            pass
+        pages = list(self.checkpoint_store.results(crawl_id))
+        meta["pages_crawled"] = len(pages)
+        return {"meta": meta, "pages": pages}
+
+    def resume(self, crawl_id: str) -> Dict[str, Any]:
+        """Synchronous interface for :meth:`resume_async`."""
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+
+        if loop.is_running():
+            return asyncio.create_task(self.resume_async(crawl_id))
+        return loop.run_until_complete(self.resume_async(crawl_id))
     
     def scrape(self, url: str, instructions: str = None, depth: int = 1, 
-               follow_external_links: bool = False, max_pages: int = 100) -> Dict[str, Any]:
+               follow_external_links: bool = False, max_pages: int = 100,
+               **kwargs) -> Dict[str, Any]:
         """
         Synchronous interface for scraping a website.
         
@@ -314,6 +1148,9 @@ class EnhancedCrawlerClient:
             depth: How many levels of links to follow
             follow_external_links: Whether to follow links to external domains
             max_pages: Maximum number of pages to scrape
+            sink: Optional ResultSink that receives pages as they are scraped
+            **kwargs: Further crawl options (``concurrency``, ``per_host_concurrency``,
+                ...) accepted by :meth:`scrape_stream`
                 
         Returns:
             A dictionary containing the scraped data and metadata
@@ -328,11 +1165,11 @@ class EnhancedCrawlerClient:
         # Run the async method in the event loop
         if loop.is_running():
             return asyncio.create_task(
-                self.scrape_async(url, instructions, depth, follow_external_links, max_pages)
+                self.scrape_async(url, instructions, depth, follow_external_links, max_pages, **kwargs)
             )
         else:
             return loop.run_until_complete(
-                self.scrape_async(url, instructions, depth, follow_external_links, max_pages)
+                self.scrape_async(url, instructions, depth, follow_external_links, max_pages, **kwargs)
             )
 
     def create_rag_documents(self, crawl_result: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -345,8 +1182,15 @@ class EnhancedCrawlerClient:
         Returns:
             A list of RAG-friendly document chunks with metadata
         """
-        rag_documents = []
-        
+        return list(self.iter_rag_documents(crawl_result))
+
+    def iter_rag_documents(self, crawl_result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the chunks of :meth:`create_rag_documents` one at a time.
+
+        Pages are read lazily, so a crawl written to a sink can be chunked into a
+        vector store without loading it into memory.
+        """
         for page in crawl_result.get('pages', []):
             if 'error' in page:
                 continue
@@ -360,7 +1204,7 @@ class EnhancedCrawlerClient:
                 
                 # Add summary as a high-value chunk
                 if 'summary' in ai_content:
-                    rag_documents.append({
+                    yield {
                         'chunk_type': 'summary',
                         'content': ai_content['summary'],
                         'metadata': {
@@ -370,12 +1214,12 @@ class EnhancedCrawlerClient:
                             'relevance_score': page.get('relevance', {}).get('score', 1.0),
                             'timestamp': page.get('timestamp', '')
                         }
-                    })
+                    }
                 
                 # Add key points as individual chunks
                 if 'key_points' in ai_content and ai_content['key_points']:
                     for i, point in enumerate(ai_content['key_points']):
-                        rag_documents.append({
+                        yield {
                             'chunk_type': 'key_point',
                             'content': point,
                             'metadata': {
@@ -386,13 +1230,13 @@ class EnhancedCrawlerClient:
                                 'relevance_score': page.get('relevance', {}).get('score', 1.0),
                                 'timestamp': page.get('timestamp', '')
                             }
-                        })
+                        }
             
             # Split content into chunks
             if content:
                 chunks = self._chunk_content(content)
                 for i, chunk in enumerate(chunks):
-                    rag_documents.append({
+                    yield {
                         'chunk_type': 'content',
                         'content': chunk,
                         'metadata': {
@@ -403,9 +1247,7 @@ class EnhancedCrawlerClient:
                             'relevance_score': page.get('relevance', {}).get('score', 1.0),
                             'timestamp': page.get('timestamp', '')
                         }
-                    })
-        
-        return rag_documents
+                    }
 
     def _chunk_content(self, content: str, chunk_size: int = 1000, overlap: int = 100) -> List[str]:
         """
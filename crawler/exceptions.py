@@ -1,13 +1,16 @@
 # crawler/exceptions.py
 
+from typing import Optional
+
 class CrawlerError(Exception):
     """Base exception class for the Crawler project."""
     pass
 
 class CrawlingError(CrawlerError):
     """Raised when there's an error during the crawling process (e.g., network issue, page load failure)."""
-    def __init__(self, url: str, message: str):
+    def __init__(self, url: str, message: str, status_code: Optional[int] = None):
         self.url = url
+        self.status_code = status_code
         self.message = f"Failed to crawl {url}: {message}"
         super().__init__(self.message)
 
@@ -0,0 +1,186 @@
+# crawler/fetcher.py
+
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from .politeness import THROTTLE_STATUS_CODES
+from .utils import setup_logger
+
+# Fetch tiers, cheapest first
+HTTP_TIER = "http"
+BROWSER_TIER = "browser"
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Responses that mean the page no longer exists
+GONE_STATUS_CODES = (404, 410)
+
+# Empty mount points left by client-side frameworks (React, Vue, Next, Nuxt, Svelte, Angular)
+SPA_ROOT_PATTERN = re.compile(
+    r"<(div|main|app-root)[^>]*\bid\s*=\s*[\"']?(root|app|__next|__nuxt|svelte|main-app)[\"']?[^>]*>\s*</\1>"
+    r"|<app-root[^>]*>\s*</app-root>",
+    re.IGNORECASE
+)
+NOSCRIPT_PATTERN = re.compile(
+    r"<noscript[^>]*>[^<]*(enable javascript|requires javascript|javascript is (disabled|required)"
+    r"|turn on javascript|need to enable javascript)",
+    re.IGNORECASE
+)
+NON_TEXT_PATTERN = re.compile(r"<(script|style|template|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def needs_javascript(html: str, min_text_chars: int = 200) -> bool:
+    """
+    Guess whether a server response has to be rendered in a browser to be useful.
+
+    True for bodies with almost no visible text, an empty single-page-app mount
+    point, or a ``<noscript>`` notice asking for JavaScript.
+    """
+    if SPA_ROOT_PATTERN.search(html) or NOSCRIPT_PATTERN.search(html):
+        return True
+    text = TAG_PATTERN.sub(" ", NON_TEXT_PATTERN.sub(" ", html))
+    return len(WHITESPACE_PATTERN.sub(" ", text).strip()) < min_text_chars
+
+
+class StaticPage:
+    """A page served by the plain HTTP tier; ``url`` is the final URL after redirects."""
+
+    def __init__(self, url: str, html: str, status_code: int, headers: Dict[str, str]):
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.headers = headers
+
+
+class TieredFetcher:
+    """
+    Fetches pages over plain HTTP and decides when the browser is needed instead.
+
+    Server-rendered pages (most documentation and blogs) are served from the shared
+    keep-alive HTTP client in tens of milliseconds. A response is escalated to the
+    browser when it is not HTML, is blocked, or looks like it needs JavaScript (see
+    :func:`needs_javascript`). A host whose pages are blocked or need JavaScript
+    ``escalate_after`` times in a row is pinned to the browser, so it is not probed
+    again on every page. One short page or one bot check is not enough, and the pin
+    expires after ``pin_pages`` pages or ``pin_seconds``, whichever comes first, since
+    sites change.
+    """
+
+    def __init__(self, client_factory: Callable[[], httpx.AsyncClient],
+                 max_body_bytes: int = 5 * 1024 * 1024, min_text_chars: int = 200,
+                 escalate_after: int = 3, pin_pages: int = 100, pin_seconds: float = 600.0):
+        """
+        Args:
+            client_factory: Returns the pooled HTTP client to fetch with
+            max_body_bytes: Bodies larger than this are left to the browser
+            min_text_chars: Visible text below which a page is treated as JS-rendered
+            escalate_after: Consecutive blocked or JS-rendered pages that pin a host
+                to the browser
+            pin_pages: Pages sent straight to the browser before the host is probed again
+            pin_seconds: Seconds before a pinned host is probed again
+        """
+        self.logger = setup_logger("TieredFetcher")
+        self.client_factory = client_factory
+        self.max_body_bytes = max_body_bytes
+        self.min_text_chars = min_text_chars
+        self.escalate_after = escalate_after
+        self.pin_pages = pin_pages
+        self.pin_seconds = pin_seconds
+
+        self._failures: Dict[str, int] = {}
+        # Hosts pinned to the browser: host -> [expiry (monotonic), pages left]
+        self._pinned: Dict[str, List[float]] = {}
+        self.http_pages = 0
+        self.escalations = 0
+        self.browser_skips = 0
+
+    def tier_for(self, url: str) -> Optional[str]:
+        """BROWSER_TIER while the URL's host is pinned to the browser, otherwise None."""
+        host = urlparse(url).netloc.lower()
+        pin = self._pinned.get(host)
+        if pin is None:
+            return None
+        if pin[0] <= time.monotonic() or pin[1] <= 0:
+            del self._pinned[host]
+            self.logger.info(f"Probing {host} over HTTP again")
+            return None
+        return BROWSER_TIER
+
+    def _record_failure(self, url: str) -> None:
+        """Count a page that needed the browser because of its host; pin the host if it keeps happening."""
+        host = urlparse(url).netloc.lower()
+        failures = self._failures.get(host, 0) + 1
+        if failures >= self.escalate_after:
+            self._pinned[host] = [time.monotonic() + self.pin_seconds, self.pin_pages]
+            self.logger.info(f"Pinning {host} to the browser after {failures} pages in a row needed it")
+            failures = 0
+        self._failures[host] = failures
+
+    async def fetch(self, url: str) -> Optional[StaticPage]:
+        """
+        Try to fetch a page without the browser.
+
+        Returns:
+            The page, or None if it has to be rendered in the browser. A 429/503 is
+            returned as a page with an empty body so the caller can back off, and so
+            is a 404/410, since the browser would not find the page either.
+        """
+        if self.tier_for(url) == BROWSER_TIER:
+            self._pinned[urlparse(url).netloc.lower()][1] -= 1
+            self.browser_skips += 1
+            return None
+
+        try:
+            async with self.client_factory().stream("GET", url) as response:
+                content_type = response.headers.get("content-type", "").lower()
+                if response.status_code in THROTTLE_STATUS_CODES + GONE_STATUS_CODES:
+                    return StaticPage(url, "", response.status_code, dict(response.headers))
+                if response.status_code in (401, 403):
+                    # Often a bot check that a real browser gets through
+                    return self._escalate(url, f"HTTP {response.status_code}", host_failure=True)
+                if response.status_code >= 400:
+                    return self._escalate(url, f"HTTP {response.status_code}")
+                if not content_type.startswith(HTML_CONTENT_TYPES):
+                    return self._escalate(url, f"content type {content_type or 'unknown'}")
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > self.max_body_bytes:
+                        return self._escalate(url, "body too large")
+                html = body.decode(response.encoding or "utf-8", errors="replace")
+                final_url = str(response.url)
+                headers = dict(response.headers)
+                status_code = response.status_code
+        except httpx.HTTPError as e:
+            return self._escalate(url, f"request failed: {e}")
+
+        if needs_javascript(html, self.min_text_chars):
+            return self._escalate(url, "page needs JavaScript", host_failure=True)
+
+        self._failures.pop(urlparse(url).netloc.lower(), None)
+        self.http_pages += 1
+        self.logger.info(f"Fetched {url} without the browser")
+        return StaticPage(final_url, html, status_code, headers)
+
+    def _escalate(self, url: str, reason: str, host_failure: bool = False) -> None:
+        self.escalations += 1
+        if host_failure:
+            self._record_failure(url)
+        self.logger.info(f"Using the browser for {url}: {reason}")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pages served per tier and hosts pinned to the browser."""
+        return {
+            "http_pages": self.http_pages,
+            "escalations": self.escalations,
+            "browser_skips": self.browser_skips,
+            "browser_hosts": sorted(self._pinned)
+        }
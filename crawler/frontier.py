@@ -0,0 +1,199 @@
+# crawler/frontier.py
+
+import hashlib
+import heapq
+import itertools
+import math
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def url_key(url: str) -> str:
+    """
+    Dedup key for a URL: scheme and host lowercased, default port and fragment dropped.
+
+    Args:
+        url: An absolute URL
+
+    Returns:
+        The key used by the frontier's seen index
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    if parsed.username or parsed.password:
+        netloc = f"{parsed.netloc.rsplit('@', 1)[0]}@{netloc}"
+    return parsed._replace(scheme=scheme, netloc=netloc, fragment="").geturl()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter for memory-bounded deduplication of very large URL sets.
+
+    Membership tests can return false positives (at roughly ``error_rate`` once
+    ``capacity`` items have been added) but never false negatives, so a crawl using
+    it may skip a small fraction of pages but never fetches one twice.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> bool:
+        """Add an item. Returns True if it was (probably) not present before."""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            mask = 1 << bit
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        """Memory used by the bit array."""
+        return len(self._bits)
+
+
+class CrawlFrontier:
+    """
+    Crawl frontier with a seen index keyed by canonical URL.
+
+    Every URL that has ever been added (queued or already popped) is remembered, so
+    ``add`` and the membership test are O(1) regardless of frontier size. Pass
+    ``bloom_capacity`` to replace the exact seen-set with a :class:`BloomFilter` whose
+    memory stays fixed no matter how many URLs are discovered.
+
+    URLs are popped in FIFO order, or with ``priority=True`` highest score first (ties
+    in FIFO order), which turns a crawl into a best-first crawl.
+    """
+
+    def __init__(self,
+                 key_func: Callable[[str], str] = url_key,
+                 bloom_capacity: Optional[int] = None,
+                 bloom_error_rate: float = 0.001,
+                 priority: bool = False):
+        """
+        Args:
+            key_func: Maps a URL to its dedup key
+            bloom_capacity: Expected number of distinct URLs; enables Bloom-filter mode
+            bloom_error_rate: Target false-positive rate in Bloom-filter mode
+            priority: Pop the highest-scored URL instead of the oldest
+        """
+        self.key_func = key_func
+        self.priority = priority
+        self._queue: Deque[Tuple[str, int]] = deque()
+        # Priority mode: heap of (-score, seq, key, url, depth). Rescoring pushes a new
+        # entry; entries whose score no longer matches _queued are skipped when popped.
+        self._heap: List[Tuple[float, int, str, str, int]] = []
+        self._queued: Dict[str, Tuple[float, int]] = {}
+        self._seq = itertools.count()
+        if bloom_capacity:
+            self._seen = BloomFilter(bloom_capacity, bloom_error_rate)
+        else:
+            self._seen = set()
+
+    def add(self, url: str, depth: int, score: float = 0.0) -> bool:
+        """
+        Queue a URL unless an equivalent URL was seen before.
+
+        Args:
+            url: The URL to queue
+            depth: Its crawl depth
+            score: Priority in priority mode (higher is popped first); ignored otherwise
+
+        Returns:
+            True if the URL was queued
+        """
+        key = self.key_func(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        if self.priority:
+            self._queued[key] = (score, depth)
+            heapq.heappush(self._heap, (-score, next(self._seq), key, url, depth))
+        else:
+            self._queue.append((url, depth))
+        return True
+
+    def rescore(self, url: str, score: float) -> bool:
+        """
+        Raise the score of a URL that is still queued (priority mode only), e.g. when
+        a more relevant page links to it too. Lower scores are ignored.
+
+        Returns:
+            True if the URL was queued and its score raised
+        """
+        key = self.key_func(url)
+        if key not in self._queued or self._queued[key][0] >= score:
+            return False
+        depth = self._queued[key][1]
+        self._queued[key] = (score, depth)
+        heapq.heappush(self._heap, (-score, next(self._seq), key, url, depth))
+        return True
+
+    def mark_seen(self, url: str) -> None:
+        """Remember a URL as seen without queueing it (e.g. one already crawled)."""
+        self._seen.add(self.key_func(url))
+
+    def pop(self) -> Tuple[str, int]:
+        """Remove and return the oldest (or in priority mode the best) queued (url, depth) pair."""
+        if not self.priority:
+            return self._queue.popleft()
+        while True:
+            neg_score, _, key, url, depth = heapq.heappop(self._heap)
+            queued = self._queued.get(key)
+            if queued is not None and queued[0] == -neg_score:
+                del self._queued[key]
+                return url, depth
+
+    def seen(self, url: str) -> bool:
+        """True if an equivalent URL has been queued at some point."""
+        return self.key_func(url) in self._seen
+
+    @property
+    def seen_count(self) -> int:
+        """Number of distinct URLs added so far."""
+        return len(self._seen)
+
+    def __len__(self) -> int:
+        return len(self._queued) if self.priority else len(self._queue)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
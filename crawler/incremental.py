@@ -0,0 +1,230 @@
+# crawler/incremental.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .frontier import url_key
+from .llm_cache import LLMCache
+from .utils import setup_logger
+
+
+class CrawlStateStore:
+    """
+    Persistent per-URL state for incremental re-crawls.
+
+    For every crawl configuration (see :meth:`crawl_key`) the store keeps each page's
+    content hash, when it was last crawled, and the page result produced from that
+    content, including the LLM relevance verdict and ``ai_extracted_content``. When a
+    later run sees the same content it reuses the stored result instead of calling the
+    LLM again.
+    """
+
+    def __init__(self, path: str = ".crawler_cache/state.sqlite"):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self.logger = setup_logger("CrawlStateStore")
+        self.path = path
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_state (
+                crawl_key TEXT NOT NULL,
+                url_key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_crawled REAL NOT NULL,
+                PRIMARY KEY (crawl_key, url_key)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def crawl_key(**parts: Any) -> str:
+        """Identify a crawl configuration; results are only reused within the same key."""
+        return LLMCache.make_key(**parts)
+
+    def get(self, crawl_key: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the stored state of a page.
+
+        Returns:
+            ``{"content_hash", "result", "last_crawled"}`` or None if the page is new
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, result, last_crawled FROM page_state WHERE crawl_key = ? AND url_key = ?",
+                (crawl_key, url_key(url))
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "result": json.loads(row[1]), "last_crawled": row[2]}
+
+    def put(self, crawl_key: str, url: str, content_hash: str, result: Dict[str, Any]) -> None:
+        """Store the latest content hash and result for a page."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO page_state VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (crawl_key, url_key) DO UPDATE SET
+                    url = excluded.url,
+                    content_hash = excluded.content_hash,
+                    result = excluded.result,
+                    last_crawled = excluded.last_crawled
+            """, (crawl_key, url_key(url), url, content_hash, json.dumps(result, ensure_ascii=False), now, now))
+            self._conn.commit()
+
+    def touch(self, crawl_key: str, url: str) -> None:
+        """Record that an unchanged page was crawled again."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE page_state SET last_crawled = ? WHERE crawl_key = ? AND url_key = ?",
+                (time.time(), crawl_key, url_key(url))
+            )
+            self._conn.commit()
+
+    def remove_missing(self, crawl_key: str, seen_keys: Set[str]) -> List[str]:
+        """
+        Drop pages of a crawl configuration that the latest run did not scrape.
+
+        Returns:
+            The URLs that were removed
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url_key, url FROM page_state WHERE crawl_key = ?", (crawl_key,)
+            ).fetchall()
+            missing = [(key, url) for key, url in rows if key not in seen_keys]
+            self._conn.executemany(
+                "DELETE FROM page_state WHERE crawl_key = ? AND url_key = ?",
+                [(crawl_key, key) for key, _ in missing]
+            )
+            self._conn.commit()
+        return [url for _, url in missing]
+
+    def remove(self, crawl_key: str, urls: List[str]) -> List[str]:
+        """
+        Drop the given pages of a crawl configuration.
+
+        Returns:
+            The URLs that were stored and have been removed
+        """
+        removed = []
+        with self._lock:
+            for url in urls:
+                cursor = self._conn.execute(
+                    "DELETE FROM page_state WHERE crawl_key = ? AND url_key = ?", (crawl_key, url_key(url))
+                )
+                if cursor.rowcount:
+                    removed.append(url)
+            self._conn.commit()
+        return removed
+
+    def clear(self) -> None:
+        """Forget every crawl."""
+        with self._lock:
+            self._conn.execute("DELETE FROM page_state")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class IncrementalCrawl:
+    """
+    Change tracking for one run of a crawl configuration against a CrawlStateStore.
+
+    Pages are classified as added, changed or unchanged as they are scraped. Pages that
+    answered 404/410 are reported as removed by :meth:`finish`. So are, after a run that
+    covered the whole site, the pages the store knew about that it did not scrape
+    successfully (failing, or no longer linked). A run cut short by ``max_pages``
+    cannot tell a page that disappeared from one it never got to, so it keeps them.
+
+    Lookups and saves block on the store, so the async crawler runs them through
+    ``asyncio.to_thread``.
+    """
+
+    def __init__(self, store: CrawlStateStore, crawl_key: str):
+        self.store = store
+        self.crawl_key = crawl_key
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+        self._seen: Set[str] = set()
+        self._gone: List[str] = []
+
+    def mark_seen(self, url: str) -> None:
+        """Keep a page scraped by an earlier, interrupted attempt from being reported as removed."""
+        self._seen.add(url_key(url))
+
+    def reuse(self, url: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored result if the page's content has not changed.
+
+        Otherwise the page is recorded as added or changed and None is returned.
+        """
+        self._seen.add(url_key(url))
+        previous = self.store.get(self.crawl_key, url)
+        if previous is None:
+            self.added.append(url)
+            return None
+        if previous["content_hash"] != content_hash:
+            self.changed.append(url)
+            return None
+        self.unchanged.append(url)
+        self.store.touch(self.crawl_key, url)
+        return previous["result"]
+
+    def reuse_unmodified(self, url: str, lastmod: float) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored result without fetching the page if it was crawled after
+        ``lastmod`` (its last modification according to the sitemap).
+
+        Otherwise nothing is recorded and None is returned; the page is then fetched
+        and classified by :meth:`reuse` as usual.
+        """
+        previous = self.store.get(self.crawl_key, url)
+        if previous is None or previous["last_crawled"] < lastmod:
+            return None
+        self._seen.add(url_key(url))
+        self.unchanged.append(url)
+        self.store.touch(self.crawl_key, url)
+        return previous["result"]
+
+    def mark_gone(self, url: str) -> None:
+        """Record a page that was fetched and no longer exists (404/410)."""
+        self._gone.append(url)
+
+    def save(self, url: str, content_hash: str, result: Dict[str, Any]) -> None:
+        self.store.put(self.crawl_key, url, content_hash, result)
+
+    def finish(self, complete: bool = True) -> Dict[str, Any]:
+        """
+        Close the run and return the change report.
+
+        Args:
+            complete: Whether the run covered the whole site. Otherwise only pages
+                recorded with :meth:`mark_gone` are removed.
+        """
+        if complete:
+            removed = self.store.remove_missing(self.crawl_key, self._seen)
+        else:
+            removed = self.store.remove(self.crawl_key, self._gone)
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": removed,
+            "unchanged": len(self.unchanged)
+        }
@@ -0,0 +1,104 @@
+# crawler/link_scoring.py
+
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about what a page is about
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'if', 'because', 'as', 'what', 'when', 'where',
+    'how', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do',
+    'does', 'did', 'to', 'from', 'in', 'out', 'of', 'on', 'for', 'with', 'by', 'we', 'our',
+    'you', 'your', 'they', 'their', 'it', 'its', 'this', 'that', 'these', 'those', 'all',
+    'any', 'get', 'find', 'extract', 'information', 'info', 'about', 'page', 'pages',
+    'building', 'build', 'want', 'need', 'more', 'html', 'htm', 'php', 'aspx', 'www', 'com'
+}
+
+# Links that rarely lead to content worth extracting
+UTILITY_WORDS = {
+    'login', 'logout', 'signin', 'signup', 'register', 'account', 'cart', 'checkout',
+    'privacy', 'terms', 'cookie', 'cookies', 'legal', 'share', 'print', 'feed', 'rss'
+}
+
+# Linked files the crawler cannot extract anything from
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.css', '.js', '.zip',
+    '.gz', '.tar', '.mp3', '.mp4', '.avi', '.mov', '.exe', '.dmg', '.woff', '.woff2'
+)
+
+
+def stem(token: str) -> str:
+    """Crude stemming so 'benefit' matches 'benefits' and 'policy' matches 'policies'."""
+    return token[:5] if len(token) > 5 else token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a text, without stopwords and very short words."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+
+def link_priority(link_score: float, parent_relevance: float, parent_weight: float = 0.3) -> float:
+    """
+    Frontier priority of a link: mostly its own score, partly the relevance of the page
+    it was found on, since relevant pages tend to link to relevant pages.
+    """
+    return (1 - parent_weight) * link_score + parent_weight * parent_relevance
+
+
+class LinkScorer:
+    """
+    Cheap local estimate of how likely a link leads to content matching the instructions.
+
+    A link is scored by how many instruction keywords appear in its anchor text and in
+    its URL path, without fetching anything or calling the LLM. Utility links (login,
+    privacy policy, ...) are discounted and links to binary files score zero.
+    """
+
+    def __init__(self, instructions: Optional[str], anchor_weight: float = 0.6,
+                 saturation: int = 2):
+        """
+        Args:
+            instructions: Natural language instructions for what to extract
+            anchor_weight: Share of the score from the anchor text (the rest is the URL)
+            saturation: Keyword matches at which a part scores 1.0
+        """
+        self.keywords = {stem(token) for token in tokenize(instructions or "")}
+        self.anchor_weight = anchor_weight
+        self.saturation = max(1, min(saturation, len(self.keywords) or 1))
+
+    def _matches(self, tokens: List[str]) -> float:
+        hits = len(self.keywords.intersection(stem(token) for token in tokens))
+        return min(1.0, hits / self.saturation)
+
+    def score(self, url: str, anchor: str = "") -> float:
+        """
+        Score one link.
+
+        Args:
+            url: Absolute link URL
+            anchor: Text of the link
+
+        Returns:
+            A score between 0.0 and 1.0 (0.0 for every link when there are no keywords)
+        """
+        parsed = urlparse(url)
+        path = unquote(parsed.path).lower()
+        if path.endswith(SKIP_EXTENSIONS) or not self.keywords:
+            return 0.0
+
+        anchor_tokens = tokenize(anchor)
+        path_tokens = tokenize(f"{path} {unquote(parsed.query)}")
+        score = (self.anchor_weight * self._matches(anchor_tokens) +
+                 (1 - self.anchor_weight) * self._matches(path_tokens))
+        if UTILITY_WORDS.intersection(anchor_tokens + path_tokens):
+            score *= 0.3
+        return round(score, 4)
+
+    def rank(self, links: List[str], anchors: Optional[Dict[str, str]] = None) -> List[Tuple[str, float]]:
+        """Score links and sort them best first (ties keep page order)."""
+        anchors = anchors or {}
+        scored = [(link, self.score(link, anchors.get(link, ""))) for link in links]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
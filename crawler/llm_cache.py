@@ -0,0 +1,122 @@
+# crawler/llm_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .utils import setup_logger
+
+
+class LLMCache:
+    """
+    Persistent SQLite cache for LLM responses with size-bounded LRU eviction.
+
+    Keys are a SHA-256 over everything that determines a completion (model, prompt
+    template version, messages and sampling parameters), so the same page content and
+    instructions sent again - on a re-crawl, from a duplicate URL or from a repeated UI
+    request - are answered locally. Hit and miss counters are kept for the lifetime of
+    the instance.
+    """
+
+    def __init__(self, path: str = ".crawler_cache/llm.sqlite", max_size_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite database file
+            max_size_bytes: Upper bound on the total size of stored responses
+        """
+        self.logger = setup_logger("LLMCache")
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Hash the parts that determine a completion into a cache key."""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a response and evict least recently used entries if over the size limit."""
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now)
+            )
+            self._total_size += size - (old[0] if old else 0)
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Delete least recently used rows until under the size limit. Caller holds the lock."""
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if self._total_size <= self.max_size_bytes:
+                break
+            victims.append((key,))
+            self._total_size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.logger.info(f"Evicted {len(victims)} cached LLM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": self._total_size
+        }
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,144 @@
+# crawler/parsing.py
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .document import ParsedDocument
+from .exceptions import ConfigurationError
+from .utils import setup_logger
+
+# Where pages are parsed
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+
+class ParserPool:
+    """
+    Runs HTML parsing off the event loop.
+
+    Parsing a large page takes long enough to stall every other coroutine (in-flight
+    crawls, API requests) while it runs. With ``"thread"`` pages are parsed in a thread
+    pool; lxml releases the GIL while it builds the tree, so the loop keeps running.
+    ``"process"`` parses in worker processes, which also spreads the pure-Python walk
+    over the tree across cores; ParsedDocument holds only plain data, so it pickles
+    cheaply on the way back. ``"inline"`` parses on the loop as before.
+
+    Queue depth (pages waiting for a free worker) is tracked so saturation shows up in
+    :meth:`stats`.
+    """
+
+    def __init__(self, executor: str = THREAD, max_workers: Optional[int] = None,
+                 link_key: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            executor: ``"thread"``, ``"process"`` or ``"inline"``
+            max_workers: Size of the pool (defaults to the CPU count, at most 8)
+            link_key: Optional function under which each page's links are deduplicated
+                (must be picklable with ``"process"``)
+        """
+        if executor not in (INLINE, THREAD, PROCESS):
+            raise ConfigurationError(f"Unknown parse executor: {executor}")
+        self.logger = setup_logger("ParserPool")
+        self.executor = executor
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.link_key = link_key
+        if self.max_workers < 1:
+            raise ConfigurationError("max_workers must be at least 1")
+        self._pool: Optional[Executor] = None
+
+        self._in_flight = 0
+        self._max_queue_depth = 0
+        self._parsed = 0
+        self._failed = 0
+        self._parse_seconds = 0.0
+        self._max_parse_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.executor == PROCESS:
+                # Spawned workers start clean instead of inheriting the loop's threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawler-parse")
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        """Pages submitted but not yet picked up by a worker."""
+        return max(0, self._in_flight - self.max_workers)
+
+    async def parse(self, html: str, url: str = "") -> ParsedDocument:
+        """
+        Parse raw HTML into a ParsedDocument without blocking the event loop.
+
+        Args:
+            html: Raw HTML content
+            url: URL the page was served from (after redirects), used to resolve
+                relative links
+
+        Returns:
+            The parsed document
+        """
+        if self.executor == INLINE:
+            started = time.monotonic()
+            document = ParsedDocument.from_html(html, url=url, link_key=self.link_key)
+            self._record(time.monotonic() - started, 0.0)
+            return document
+
+        submitted = time.monotonic()
+        self._in_flight += 1
+        self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+        try:
+            loop = asyncio.get_running_loop()
+            document, parse_seconds = await loop.run_in_executor(
+                self._get_pool(), _timed_parse, html, url, self.link_key
+            )
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+        self._record(parse_seconds, time.monotonic() - submitted - parse_seconds)
+        return document
+
+    def _record(self, parse_seconds: float, wait_seconds: float) -> None:
+        self._parsed += 1
+        self._parse_seconds += parse_seconds
+        self._max_parse_seconds = max(self._max_parse_seconds, parse_seconds)
+        self._wait_seconds += max(0.0, wait_seconds)
+
+    def shutdown(self) -> None:
+        """Stop the workers; the pool is recreated on the next parse."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        parsed = self._parsed or 1
+        return {
+            "executor": self.executor,
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self._max_queue_depth,
+            "parsed": self._parsed,
+            "failed": self._failed,
+            "avg_parse_ms": round(self._parse_seconds / parsed * 1000, 2),
+            "max_parse_ms": round(self._max_parse_seconds * 1000, 2),
+            "avg_wait_ms": round(self._wait_seconds / parsed * 1000, 2)
+        }
+
+
+def _timed_parse(html: str, url: str, link_key: Optional[Callable[[str], str]] = None):
+    """Parse in a worker and report how long the parse itself took."""
+    started = time.monotonic()
+    document = ParsedDocument.from_html(html, url=url, link_key=link_key)
+    return document, time.monotonic() - started
@@ -0,0 +1,234 @@
+# crawler/politeness.py
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from .utils import setup_logger
+
+# Responses that mean the server wants us to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds to wait according to a ``Retry-After`` header (delta-seconds or HTTP date).
+
+    Returns:
+        The delay, or None if the header is missing or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (now if now is not None else time.time()))
+
+
+class HostState:
+    """Token bucket and adaptive rate for one host."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.crawl_delay: Optional[float] = None
+        self.crawl_delay_checked = False
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_checked = False
+        self.robots_lock = asyncio.Lock()
+        self.throttled = 0
+        self.lock = asyncio.Lock()
+
+    @property
+    def effective_rate(self) -> float:
+        if self.crawl_delay:
+            return min(self.rate, 1.0 / self.crawl_delay)
+        return self.rate
+
+    @property
+    def effective_burst(self) -> float:
+        # A crawl delay means one request per interval, never back to back
+        return 1.0 if self.crawl_delay else self.burst
+
+
+class PolitenessScheduler:
+    """
+    Per-host rate limiting that adapts to how each server responds.
+
+    Every host has its own token bucket, so waiting on one host never delays requests
+    to another. Rates follow AIMD: each healthy response adds ``increase`` requests per
+    second (up to ``max_rate``), while a 429/503 or a response slower than
+    ``latency_target`` multiplies the rate by ``decrease_factor``. A ``Retry-After``
+    header pauses the host for the requested time, and a robots.txt ``Crawl-delay``
+    caps its rate. Each host's robots.txt is fetched once and shared through
+    :meth:`robots`, e.g. with the sitemap reader.
+    """
+
+    def __init__(self,
+                 initial_rate: float = 2.0,
+                 min_rate: float = 0.1,
+                 max_rate: float = 10.0,
+                 burst: float = 2.0,
+                 increase: float = 0.25,
+                 decrease_factor: float = 0.5,
+                 latency_target: float = 3.0,
+                 max_retry_after: float = 300.0,
+                 respect_robots: bool = True,
+                 client_factory: Optional[Callable[[], httpx.AsyncClient]] = None,
+                 user_agent: str = "*"):
+        """
+        Args:
+            initial_rate: Requests per second allowed to a host before any feedback
+            min_rate: Lowest rate a host is slowed down to
+            max_rate: Highest rate a host is sped up to
+            burst: Requests a host may receive back to back
+            increase: Rate added after each healthy response
+            decrease_factor: Rate multiplier after a throttled or slow response
+            latency_target: Response time in seconds above which a host counts as overloaded
+            max_retry_after: Upper bound on how long a ``Retry-After`` can pause a host
+            respect_robots: Honour ``Crawl-delay`` from each host's robots.txt
+            client_factory: Returns the HTTP client used to fetch robots.txt
+            user_agent: User agent matched against robots.txt groups
+        """
+        self.logger = setup_logger("PolitenessScheduler")
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.max_retry_after = max_retry_after
+        self.respect_robots = respect_robots
+        self.client_factory = client_factory
+        self.user_agent = user_agent
+
+        self._hosts: Dict[str, HostState] = {}
+
+    def _state(self, url: str) -> HostState:
+        host = urlparse(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.initial_rate, self.burst)
+        return state
+
+    async def acquire(self, url: str) -> None:
+        """Wait until a request to the URL's host is allowed."""
+        state = self._state(url)
+        async with state.lock:
+            if self.respect_robots and not state.crawl_delay_checked:
+                state.crawl_delay_checked = True
+                parser = await self.robots(url)
+                state.crawl_delay = self._crawl_delay(url, parser) if parser is not None else None
+                if state.crawl_delay:
+                    state.tokens = min(state.tokens, 1.0)
+
+            while True:
+                now = time.monotonic()
+                if state.blocked_until > now:
+                    await asyncio.sleep(state.blocked_until - now)
+                    continue
+                rate = state.effective_rate
+                state.tokens = min(state.effective_burst, state.tokens + (now - state.last_refill) * rate)
+                state.last_refill = now
+                if state.tokens >= 1.0:
+                    state.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - state.tokens) / rate)
+
+    def record(self, url: str, status_code: Optional[int], latency: Optional[float] = None,
+               retry_after: Optional[str] = None) -> bool:
+        """
+        Feed a response back into the host's rate.
+
+        Args:
+            url: The requested URL
+            status_code: HTTP status of the response, if known
+            latency: Seconds the server took to respond, if measured
+            retry_after: The response's ``Retry-After`` header, if any
+
+        Returns:
+            True if the response asked us to slow down
+        """
+        state = self._state(url)
+        throttled = status_code in THROTTLE_STATUS_CODES
+        if throttled:
+            state.throttled += 1
+            state.rate = max(self.min_rate, state.rate * self.decrease_factor)
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = 1.0 / state.rate
+            delay = min(delay, self.max_retry_after)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            state.tokens = 0.0
+            self.logger.warning(
+                f"{urlparse(url).netloc} answered {status_code}; pausing {delay:.1f}s, "
+                f"rate now {state.rate:.2f}/s"
+            )
+        elif latency is not None and latency > self.latency_target:
+            state.rate = max(self.min_rate, state.rate * self.decrease_factor)
+        elif status_code is not None and status_code < 400:
+            state.rate = min(self.max_rate, state.rate + self.increase)
+        return throttled
+
+    async def robots(self, url: str) -> Optional[RobotFileParser]:
+        """
+        The parsed robots.txt of the URL's host, fetched on first use only.
+
+        Returns:
+            The parser, or None if there is no client or no robots.txt could be fetched
+        """
+        state = self._state(url)
+        async with state.robots_lock:
+            if not state.robots_checked and self.client_factory is not None:
+                state.robots_checked = True
+                state.robots = await self._fetch_robots(url)
+        return state.robots
+
+    async def _fetch_robots(self, url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            response = await self.client_factory().get(robots_url)
+        except httpx.HTTPError as e:
+            self.logger.info(f"Could not fetch {robots_url}: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+        parser = RobotFileParser()
+        parser.parse(response.text.splitlines())
+        # crawl_delay() ignores parsers that were never marked as read
+        parser.modified()
+        return parser
+
+    def _crawl_delay(self, url: str, parser: RobotFileParser) -> Optional[float]:
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None:
+            rate = parser.request_rate(self.user_agent)
+            delay = rate.seconds / rate.requests if rate and rate.requests else None
+        if delay:
+            self.logger.info(f"{urlparse(url).netloc} asks for a crawl delay of {delay}s")
+        return float(delay) if delay else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Current rate and throttle count for every host seen."""
+        return {
+            host: {
+                "rate": round(state.effective_rate, 3),
+                "crawl_delay": state.crawl_delay,
+                "throttled": state.throttled
+            }
+            for host, state in self._hosts.items()
+        }
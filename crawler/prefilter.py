@@ -0,0 +1,130 @@
+# crawler/prefilter.py
+
+import math
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from .exceptions import ConfigurationError
+from .link_scoring import stem, tokenize
+
+# Pages scoring below this are not extracted
+RELEVANCE_THRESHOLD = 0.3
+
+# Prefilter decisions
+ACCEPT = "accept"
+REJECT = "reject"
+AMBIGUOUS = "ambiguous"
+
+
+class RelevancePrefilter:
+    """
+    Local BM25 relevance stage that runs before the relevance LLM call.
+
+    Each page is scored against the instruction keywords with BM25, normalized to 0-1.
+    That is the IDF-weighted share of the keywords the page covers, with repeated
+    occurrences saturating. Document frequencies and the average page length are
+    learned from the pages of the crawl as they arrive. Every keyword counts towards
+    the normalization, those no page has contained so far with the smoothed IDF of a
+    zero document frequency, so a page matching one keyword out of six cannot score
+    high just because it came first. Statistics from a handful of pages are noise, so
+    until ``min_corpus`` pages have been scored every page goes to the LLM. After that,
+    pages below ``reject_below`` are rejected and pages above ``accept_above`` are
+    accepted, both without an API call. Only the band in between goes to the LLM.
+    """
+
+    def __init__(self, instructions: Optional[str], reject_below: float = 0.05,
+                 accept_above: float = 0.5, k1: float = 1.2, b: float = 0.75,
+                 title_weight: int = 3, max_chars: int = 50000, min_corpus: int = 10):
+        """
+        Args:
+            instructions: Natural language instructions for what to extract
+            reject_below: Local scores below this reject the page
+            accept_above: Local scores above this accept the page
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            title_weight: How many times the title's words are counted
+            max_chars: Only the start of long pages is scored
+            min_corpus: Pages scored before the prefilter accepts or rejects any
+        """
+        if not 0.0 <= reject_below <= RELEVANCE_THRESHOLD <= accept_above <= 1.0:
+            raise ConfigurationError(
+                f"Prefilter bands must satisfy 0 <= reject_below <= {RELEVANCE_THRESHOLD} <= accept_above <= 1"
+            )
+        self.terms = sorted({stem(token) for token in tokenize(instructions or "")})
+        self.reject_below = reject_below
+        self.accept_above = accept_above
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.max_chars = max_chars
+        self.min_corpus = min_corpus
+
+        self._term_set = set(self.terms)
+        self._docs = 0
+        self._total_length = 0
+        self._document_frequency: Counter = Counter()
+        self.decisions: Counter = Counter()
+
+    def score(self, title: str, text: str) -> float:
+        """
+        Score one page and add it to the corpus statistics.
+
+        Returns:
+            A score between 0.0 and 1.0
+        """
+        tokens = [stem(token) for token in tokenize(text[:self.max_chars])]
+        tokens += [stem(token) for token in tokenize(title)] * self.title_weight
+        counts = Counter(token for token in tokens if token in self._term_set)
+
+        self._docs += 1
+        self._total_length += len(tokens)
+        self._document_frequency.update(counts.keys())
+        if not self.terms:
+            return 0.0
+
+        avg_length = self._total_length / self._docs
+        length_norm = 1 - self.b + self.b * len(tokens) / max(avg_length, 1.0)
+        matched = 0.0
+        possible = 0.0
+        for term in self.terms:
+            # Smoothed, so keywords no page has contained yet still count (df = 0)
+            df = self._document_frequency[term]
+            idf = math.log(1 + (self._docs - df + 0.5) / (df + 0.5))
+            tf = counts[term]
+            matched += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+            possible += idf * (self.k1 + 1)
+        return matched / possible if possible else 0.0
+
+    def classify(self, title: str, text: str) -> Tuple[str, float, str]:
+        """
+        Decide whether a page needs the LLM to judge its relevance.
+
+        Returns:
+            ``(decision, score, reason)`` where decision is ``"accept"``, ``"reject"``
+            or ``"ambiguous"``
+        """
+        if not self.terms:
+            self.decisions[AMBIGUOUS] += 1
+            return AMBIGUOUS, 0.0, "No keywords in instructions"
+
+        score = round(self.score(title, text), 4)
+        if self._docs <= self.min_corpus:
+            decision, reason = AMBIGUOUS, (f"Local prefilter: keyword score {score:.2f} "
+                                           f"(learning, {self._docs} of {self.min_corpus} pages)")
+        elif score < self.reject_below:
+            decision, reason = REJECT, f"Local prefilter: keyword score {score:.2f} below {self.reject_below}"
+        elif score > self.accept_above:
+            decision, reason = ACCEPT, f"Local prefilter: keyword score {score:.2f} above {self.accept_above}"
+        else:
+            decision, reason = AMBIGUOUS, f"Local prefilter: keyword score {score:.2f}"
+        self.decisions[decision] += 1
+        return decision, score, reason
+
+    def stats(self) -> Dict[str, Any]:
+        """Pages accepted, rejected and passed on to the LLM."""
+        return {
+            "accepted": self.decisions[ACCEPT],
+            "rejected": self.decisions[REJECT],
+            "sent_to_llm": self.decisions[AMBIGUOUS],
+            "bands": [self.reject_below, self.accept_above]
+        }
@@ -0,0 +1,410 @@
+# crawler/sharding.py
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .canonical import UrlCanonicalizer
+from .coordinator import CrawlCoordinator, Lease
+from .exceptions import ConfigurationError
+from .frontier import url_key
+from .sinks import SqliteSink
+from .utils import setup_logger
+
+# URL states in the shared store
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+ABANDONED = "abandoned"
+# Another page's redirect target or canonical URL; never fetched
+ALIAS = "alias"
+
+RESULTS_TABLE = "pages"
+
+# scrape_stream options a sharded crawl passes on to every process
+SHARD_OPTIONS = frozenset({
+    "per_host_concurrency", "relevance_batch_size", "relevance_batch_wait",
+    "relevance_prefilter", "prefilter_reject_below", "prefilter_accept_above",
+    "skip_near_duplicates", "duplicate_threshold"
+})
+
+
+def shard_for(url: str, shards: int) -> int:
+    """Stable shard number for a URL's host, identical in every process."""
+    host = urlparse(url).netloc.lower()
+    digest = hashlib.blake2b(host.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class SharedCrawlStore:
+    """
+    SQLite frontier and seen index shared by the processes of a sharded crawl.
+
+    Every URL is inserted once, keyed by ``key_func`` (by default
+    :func:`~crawler.frontier.url_key`), so deduplication is global across processes.
+    Each row carries the shard that owns the URL's host, and workers only claim rows
+    of their own shard. Claims happen inside an immediate transaction, so the global
+    ``max_pages`` budget is never exceeded. Abandoned URLs were never fetched and do
+    not count against it.
+    """
+
+    def __init__(self, path: str, key_func: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            path: SQLite database file shared by all processes
+            key_func: Function mapping URLs to dedup keys, e.g. a UrlCanonicalizer; all
+                processes must use the same one
+        """
+        self.path = path
+        self.key_func = key_func or url_key
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                start_domain TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                state TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS urls_shard_state ON urls (shard, state)")
+
+    def add(self, url: str, depth: int, start_domain: str, shard: int) -> bool:
+        """
+        Add a URL unless an equivalent URL was added before, by any process.
+
+        Returns:
+            True if the URL was new
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO urls VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key_func(url), url, depth, start_domain, shard, PENDING)
+            )
+        return cursor.rowcount == 1
+
+    def mark_seen(self, urls: List[Tuple[str, int]]) -> None:
+        """Record (url, shard) pairs as seen so no process adds them to the frontier."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO urls VALUES (?, ?, 0, '', ?, ?)",
+                [(self.key_func(url), url, shard, ALIAS) for url, shard in urls]
+            )
+
+    def claim(self, shard: int, max_pages: int) -> Optional[Tuple[str, int, str]]:
+        """
+        Claim the shard's oldest pending URL while the global page budget allows it.
+
+        Returns:
+            (url, depth, start_domain), or None if nothing can be claimed right now
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                used = self._conn.execute(
+                    "SELECT COUNT(*) FROM urls WHERE state IN (?, ?, ?)", (CLAIMED, DONE, FAILED)
+                ).fetchone()[0]
+                row = None
+                if used < max_pages:
+                    row = self._conn.execute(
+                        "SELECT url_key, url, depth, start_domain FROM urls "
+                        "WHERE shard = ? AND state = ? ORDER BY rowid LIMIT 1",
+                        (shard, PENDING)
+                    ).fetchone()
+                    if row is not None:
+                        self._conn.execute("UPDATE urls SET state = ? WHERE url_key = ?", (CLAIMED, row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (row[1], row[2], row[3]) if row else None
+
+    def finish(self, url: str, failed: bool = False) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET state = ? WHERE url_key = ?", (FAILED if failed else DONE, self.key_func(url))
+            )
+
+    def active(self, max_pages: int) -> bool:
+        """True while any process is fetching, or pending URLs remain within the budget."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+        if counts.get(CLAIMED, 0):
+            return True
+        used = counts.get(DONE, 0) + counts.get(FAILED, 0)
+        return counts.get(PENDING, 0) > 0 and used < max_pages
+
+    def release(self, shard: int) -> int:
+        """Return a shard's claimed URLs to pending, e.g. after its process died."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE urls SET state = ? WHERE shard = ? AND state = ?", (PENDING, shard, CLAIMED)
+            )
+        return cursor.rowcount
+
+    def abandon(self, shard: int) -> int:
+        """Give up on a shard's unfinished URLs so the other processes can finish."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE urls SET state = ? WHERE shard = ? AND state IN (?, ?)",
+                (ABANDONED, shard, PENDING, CLAIMED)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _key_func(client_options: Dict[str, Any]) -> Callable[[str], str]:
+    """The dedup key the EnhancedCrawlerClient built from these options uses."""
+    if client_options.get("url_canonicalizer") is not None:
+        return client_options["url_canonicalizer"]
+    return UrlCanonicalizer() if client_options.get("canonicalize_urls", True) else url_key
+
+
+def _run_shard(shard: int, shards: int, store_path: str, params: Dict[str, Any],
+               client_options: Dict[str, Any]) -> None:
+    """Entry point of a worker process: crawl one shard with its own browser and event loop."""
+    asyncio.run(_crawl_shard(shard, shards, store_path, params, client_options))
+
+
+class ShardCoordinator(CrawlCoordinator):
+    """
+    One shard's view of a SharedCrawlStore, so that shard processes run the same
+    worker as coordinated crawls (:func:`~crawler.coordinator.consume`).
+
+    Leases never expire: a dead process's claims are released by the parent before
+    the shard restarts. Results go to a SqliteSink keeping one row per URL, so pages
+    re-crawled after a restart are not stored twice.
+    """
+
+    def __init__(self, store: SharedCrawlStore, shard: int, shards: int, params: Dict[str, Any]):
+        """
+        Args:
+            store: The crawl's shared store
+            shard: This process's shard
+            shards: Number of shards
+            params: Crawl parameters (``url``, ``instructions``, ``depth``,
+                ``follow_external_links``, ``max_pages``)
+        """
+        self.store = store
+        self.shard = shard
+        self.shards = shards
+        self.key_func = store.key_func
+        self._params = params
+        # Committed one by one: a page is marked done only once its result is stored
+        self._results = SqliteSink(store.path, table=RESULTS_TABLE, unique_urls=True, commit_every=1)
+
+    def create(self, crawl_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        # The parent process seeded the store before starting the shards
+        return self._params
+
+    def params(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        return self._params
+
+    def add(self, crawl_id: str, url: str, depth: int) -> bool:
+        return self.store.add(url, depth, urlparse(url).netloc, shard_for(url, self.shards))
+
+    def add_links(self, crawl_id: str, lease: Lease, links: List[str]) -> None:
+        for link in links:
+            self.store.add(link, lease.depth + 1, lease.start_domain, shard_for(link, self.shards))
+
+    def mark_seen(self, crawl_id: str, urls: List[str]) -> None:
+        self.store.mark_seen([(url, shard_for(url, self.shards)) for url in urls])
+
+    def lease(self, crawl_id: str, lease_seconds: float, max_pages: int) -> Optional[Lease]:
+        claimed = self.store.claim(self.shard, max_pages)
+        if claimed is None:
+            return None
+        url, depth, start_domain = claimed
+        return Lease(url, depth, str(self.shard), float("inf"), start_domain=start_domain)
+
+    def complete(self, crawl_id: str, lease: Lease, page: Dict[str, Any]) -> bool:
+        self._results.write(page)
+        self.store.finish(lease.url, failed="error" in page)
+        return True
+
+    def active(self, crawl_id: str, max_pages: int) -> bool:
+        return self.store.active(max_pages)
+
+    def stats(self, crawl_id: str) -> Dict[str, int]:
+        return self.store.counts()
+
+    def close(self) -> None:
+        self._results.close()
+
+
+async def _crawl_shard(shard: int, shards: int, store_path: str, params: Dict[str, Any],
+                       client_options: Dict[str, Any]) -> None:
+    # Imported here so the coordinator process never loads the browser stack
+    from .enhanced_crawler import EnhancedCrawlerClient
+
+    logger = setup_logger("ShardWorker")
+    store = SharedCrawlStore(store_path, key_func=_key_func(client_options))
+    coordinator = ShardCoordinator(store, shard, shards, params)
+    client = EnhancedCrawlerClient(**client_options)
+    pages = 0
+    try:
+        async for _ in client.scrape_stream(
+                params["url"], params["instructions"], depth=params["depth"],
+                follow_external_links=params["follow_external_links"], max_pages=params["max_pages"],
+                concurrency=params["concurrency"], coordinator=coordinator, crawl_id=f"shard-{shard}",
+                poll_interval=params["poll_interval"], **params["options"]):
+            pages += 1
+    finally:
+        await client.close()
+        coordinator.close()
+        store.close()
+        logger.info(f"Shard {shard} finished after {pages} pages")
+
+
+class ShardedCrawler:
+    """
+    Crawls many sites at once across several processes, one shard of hosts per process.
+
+    HTML parsing, markdown building and chunking are CPU-bound, so one process
+    saturates a single core long before the network does. Here every URL is assigned
+    to a shard by a hash of its host. Each shard runs in its own process with its own
+    browser, HTTP client and event loop. The processes share a SQLite store for the
+    frontier, the global seen index and the results. A shard whose process dies is
+    restarted and continues where it stopped. Each process runs the coordinated-crawl
+    worker of :meth:`EnhancedCrawlerClient.scrape_stream`, so per-host limits, the
+    relevance prefilter and near-duplicate detection apply per process.
+    """
+
+    def __init__(self, processes: Optional[int] = None, store_path: str = ".crawler_cache/sharded.sqlite",
+                 client_options: Optional[Dict[str, Any]] = None, max_restarts: int = 2):
+        """
+        Args:
+            processes: Number of worker processes (defaults to the CPU count)
+            store_path: SQLite file shared by the processes; it is reset for each crawl
+            client_options: Keyword arguments for each process's EnhancedCrawlerClient
+                (must be picklable, e.g. ``api_key``, ``user_agent``, ``http_fast_path``)
+            max_restarts: How often a shard's process is restarted after dying
+        """
+        self.logger = setup_logger("ShardedCrawler")
+        self.processes = processes or os.cpu_count() or 1
+        self.store_path = store_path
+        self.client_options = client_options or {}
+        self.max_restarts = max_restarts
+        if self.processes < 1:
+            raise ConfigurationError("processes must be at least 1")
+
+    def crawl(self, urls: List[str], instructions: Optional[str] = None, depth: int = 1,
+              follow_external_links: bool = False, max_pages: int = 100,
+              concurrency: int = 4, poll_interval: float = 0.5, **options) -> Dict[str, Any]:
+        """
+        Crawl a list of sites.
+
+        Args:
+            urls: Start URLs; each site keeps to its own domain as in a normal crawl
+            instructions: Natural language instructions for what to extract
+            depth: How many levels of links to follow from each start URL
+            follow_external_links: Whether to follow links to external domains
+            max_pages: Maximum number of pages across all sites and processes
+            concurrency: Pages fetched at the same time within each process
+            poll_interval: Seconds an idle process waits before checking for new URLs
+            **options: Further ``scrape_stream`` options for every process, e.g.
+                ``per_host_concurrency``, ``relevance_prefilter`` or
+                ``skip_near_duplicates`` (see ``SHARD_OPTIONS``)
+
+        Returns:
+            ``{"meta": ..., "pages": SqliteSink}``; the pages are read lazily from the
+            shared store
+        """
+        unsupported = sorted(set(options) - SHARD_OPTIONS)
+        if self.client_options.get("checkpoint_store") is not None:
+            unsupported.append("checkpoint_store")
+        if unsupported:
+            raise ConfigurationError(f"Not supported in sharded crawls: {', '.join(unsupported)}")
+
+        start_time = time.time()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.store_path + suffix):
+                os.remove(self.store_path + suffix)
+
+        store = SharedCrawlStore(self.store_path, key_func=_key_func(self.client_options))
+        SqliteSink(self.store_path, table=RESULTS_TABLE, unique_urls=True).close()
+        for url in urls:
+            store.add(url, 0, urlparse(url).netloc, shard_for(url, self.processes))
+
+        params = {
+            "url": ", ".join(urls),
+            "instructions": instructions,
+            "depth": depth,
+            "follow_external_links": follow_external_links,
+            "max_pages": max_pages,
+            "concurrency": concurrency,
+            "poll_interval": poll_interval,
+            "options": options
+        }
+        # Spawned processes start clean instead of inheriting the parent's event loop and threads
+        context = multiprocessing.get_context("spawn")
+        restarts = {shard: 0 for shard in range(self.processes)}
+
+        def start(shard: int) -> multiprocessing.Process:
+            process = context.Process(
+                target=_run_shard, name=f"crawler-shard-{shard}",
+                args=(shard, self.processes, self.store_path, params, self.client_options)
+            )
+            process.start()
+            return process
+
+        running = {shard: start(shard) for shard in range(self.processes)}
+        self.logger.info(f"Crawling {len(urls)} start URLs with {self.processes} processes")
+        while running:
+            for shard, process in list(running.items()):
+                process.join(timeout=poll_interval)
+                if process.is_alive():
+                    continue
+                del running[shard]
+                if process.exitcode == 0:
+                    continue
+                if restarts[shard] < self.max_restarts:
+                    restarts[shard] += 1
+                    released = store.release(shard)
+                    self.logger.warning(
+                        f"Shard {shard} exited with {process.exitcode}; restarting it ({released} URLs released)"
+                    )
+                    running[shard] = start(shard)
+                else:
+                    abandoned = store.abandon(shard)
+                    self.logger.error(f"Shard {shard} failed repeatedly; abandoning {abandoned} URLs")
+
+        counts = store.counts()
+        store.close()
+        pages = SqliteSink(self.store_path, table=RESULTS_TABLE)
+        pages.close()
+        meta = {
+            "url": ", ".join(urls),
+            "urls": urls,
+            "instructions": instructions,
+            "depth": depth,
+            "follow_external_links": follow_external_links,
+            "processes": self.processes,
+            "urls_discovered": sum(counts.values()),
+            "pages_crawled": len(pages),
+            "restarts": sum(restarts.values()),
+            "time_taken": time.time() - start_time,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        self.logger.info(f"Sharded crawl completed. Scraped {meta['pages_crawled']} pages.")
+        return {"meta": meta, "pages": pages}
@@ -0,0 +1,214 @@
+# crawler/sinks.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from .exceptions import ConfigurationError
+from .utils import setup_logger
+
+
+class ResultSink:
+    """
+    Destination for page results written while a crawl runs.
+
+    A sink is passed to ``scrape``/``scrape_async`` in place of the in-memory page list
+    and ends up under ``"pages"`` in the returned result. Sinks that keep their pages can
+    be iterated any number of times; each iteration reads the pages back lazily, so
+    ``create_rag_documents`` and ``export_to_markdown`` never hold the whole crawl in
+    memory.
+    """
+
+    def write(self, page: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Make every page written so far visible to readers of the sink's storage."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JsonlSink(ResultSink):
+    """Appends each page as one JSON line to a file."""
+
+    def __init__(self, path: str, append: bool = False):
+        """
+        Args:
+            path: File to write to
+            append: Keep pages already in the file instead of truncating it
+        """
+        self.logger = setup_logger("JsonlSink")
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        self._count = 0
+        if append:
+            with open(path, "r", encoding="utf-8") as f:
+                self._count = sum(1 for line in f if line.strip())
+
+    def write(self, page: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(page, ensure_ascii=False) + "\n")
+        self._count += 1
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class SqliteSink(ResultSink):
+    """
+    Stores each page as a row in a SQLite table, in completion order.
+
+    Pages are buffered and inserted in one transaction every ``commit_every`` pages or
+    ``commit_interval`` seconds, and on :meth:`flush` and :meth:`close`, so a crawl
+    does not wait on a commit per page. A crash loses the pages still buffered.
+    """
+
+    def __init__(self, path: str, table: str = "pages", batch_size: int = 100, unique_urls: bool = False,
+                 commit_every: int = 100, commit_interval: float = 5.0):
+        """
+        Args:
+            path: SQLite database file
+            table: Table holding the pages (created if missing)
+            batch_size: Rows read per query when iterating
+            unique_urls: Keep the first result per URL and ignore later writes of the
+                same URL, e.g. from a worker re-crawling pages after a restart
+            commit_every: Pages buffered before they are committed (1 commits every page)
+            commit_interval: Seconds after which buffered pages are committed with the
+                next write
+        """
+        if not table.isidentifier():
+            raise ConfigurationError(f"Invalid table name: {table}")
+        self.logger = setup_logger("SqliteSink")
+        self.path = path
+        self.table = table
+        self.batch_size = batch_size
+        self.unique_urls = unique_urls
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval
+        self._pending: List[Tuple[str, str]] = []
+        self._last_commit = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Generous timeout: several processes may write to the same file
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                page TEXT NOT NULL
+            )
+        """)
+        if unique_urls:
+            self._conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_url ON {table} (url)")
+        self._conn.commit()
+
+    def write(self, page: Dict[str, Any]) -> None:
+        row = (page.get("url", ""), json.dumps(page, ensure_ascii=False))
+        with self._lock:
+            self._pending.append(row)
+            if (len(self._pending) >= self.commit_every or
+                    time.monotonic() - self._last_commit >= self.commit_interval):
+                self._commit()
+
+    def _commit(self) -> None:
+        """Insert the buffered pages in one transaction. Caller holds the lock."""
+        if self._pending:
+            insert = "INSERT OR IGNORE" if self.unique_urls else "INSERT"
+            self._conn.executemany(f"{insert} INTO {self.table} (url, page) VALUES (?, ?)", self._pending)
+            self._conn.commit()
+            self._pending = []
+        self._last_commit = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.flush()
+        # A fresh connection, so iterating also works after the sink was closed
+        conn = sqlite3.connect(self.path)
+        try:
+            last_seq = 0
+            while True:
+                rows = conn.execute(
+                    f"SELECT seq, page FROM {self.table} WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last_seq, self.batch_size)
+                ).fetchall()
+                if not rows:
+                    return
+                for _, page in rows:
+                    yield json.loads(page)
+                last_seq = rows[-1][0]
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        finally:
+            conn.close()
+
+
+class CallbackSink(ResultSink):
+    """Hands each page to a function and keeps nothing."""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Args:
+            callback: Called with every page result as soon as it is scraped
+        """
+        self.callback = callback
+        self._count = 0
+
+    def write(self, page: Dict[str, Any]) -> None:
+        self.callback(page)
+        self._count += 1
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        raise ConfigurationError("CallbackSink does not keep pages; use a JsonlSink or SqliteSink to read them back")
+
+    def __len__(self) -> int:
+        return self._count
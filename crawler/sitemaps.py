@@ -0,0 +1,260 @@
+# crawler/sitemaps.py
+
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import httpx
+
+from .fetcher import GONE_STATUS_CODES
+from .utils import setup_logger
+
+# Most sitemap files fetched for one crawl (indexes included)
+MAX_SITEMAPS = 100
+
+# Days after which a page's freshness bonus has halved
+FRESHNESS_HALF_LIFE_DAYS = 30.0
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """
+    Unix timestamp of a W3C datetime (``2024-05-01``, ``2024-05-01T10:00:00+02:00``, ...).
+
+    Returns:
+        The timestamp (dates without a zone are taken as UTC), or None if unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"  # fromisoformat only accepts "Z" from Python 3.11
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def freshness(lastmod: Optional[float], now: float) -> float:
+    """1.0 for a page modified now, halving every FRESHNESS_HALF_LIFE_DAYS (0.0 if unknown)."""
+    if lastmod is None:
+        return 0.0
+    age_days = max(0.0, now - lastmod) / 86400
+    return 0.5 ** (age_days / FRESHNESS_HALF_LIFE_DAYS)
+
+
+class SitemapEntry:
+    """One ``<url>`` of a sitemap, or one ``<sitemap>`` of a sitemap index."""
+
+    def __init__(self, url: str, lastmod: Optional[float] = None, priority: Optional[float] = None):
+        self.url = url
+        self.lastmod = lastmod
+        self.priority = priority
+
+
+class SitemapParser:
+    """
+    Incremental sitemap parser fed with raw response bytes.
+
+    Gzipped sitemaps are detected from their magic bytes and inflated on the fly.
+    Each entry is handed out as soon as its closing tag has been read, then dropped
+    from the tree, so memory does not grow with the size of the sitemap.
+    """
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self._inflater = None
+        self._head = b""
+        self._root = None
+        self._fields: Dict[str, str] = {}
+
+    def feed(self, data: bytes) -> List[Tuple[str, SitemapEntry]]:
+        """
+        Parse the next chunk.
+
+        Returns:
+            ``(kind, entry)`` pairs completed by this chunk; kind is ``"url"`` for a page
+            and ``"sitemap"`` for a nested sitemap listed in an index
+        """
+        if self._head is not None:
+            # Sniff compression from the first two bytes, however the chunks are cut
+            self._head += data
+            if len(self._head) < len(GZIP_MAGIC):
+                return []
+            data, self._head = self._head, None
+            if data.startswith(GZIP_MAGIC):
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflater is not None:
+            data = self._inflater.decompress(data)
+        self._parser.feed(data)
+        return self._entries()
+
+    def close(self) -> List[Tuple[str, SitemapEntry]]:
+        """Finish parsing and return the last entries."""
+        if self._head:
+            self._parser.feed(self._head)
+        self._parser.close()
+        return self._entries()
+
+    def _entries(self) -> List[Tuple[str, SitemapEntry]]:
+        entries = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            tag = element.tag.rpartition("}")[2].lower()
+            if tag in ("loc", "lastmod", "priority"):
+                # The entry's own <loc> comes first; extensions such as <image:loc> follow
+                self._fields.setdefault(tag, (element.text or "").strip())
+            elif tag in ("url", "sitemap"):
+                loc = self._fields.get("loc")
+                if loc:
+                    try:
+                        priority = float(self._fields["priority"]) if self._fields.get("priority") else None
+                    except ValueError:
+                        priority = None
+                    entries.append((tag, SitemapEntry(loc, parse_lastmod(self._fields.get("lastmod")), priority)))
+                self._fields = {}
+                self._root.clear()
+        return entries
+
+
+class SitemapReader:
+    """
+    Finds a site's sitemaps and streams the page URLs they list.
+
+    Sitemaps are taken from the ``Sitemap:`` lines of robots.txt, falling back to
+    ``/sitemap.xml``. Sitemap indexes are followed breadth-first up to ``max_sitemaps``
+    files. Pages and nested sitemaps whose ``lastmod`` is older than ``modified_since``
+    are skipped; a nested sitemap that old is not even fetched, since none of its pages
+    can have changed since then either.
+
+    ``sitemaps_skipped`` counts every sitemap whose pages were not all listed: ones too
+    old to fetch, ones that failed (errors, unreadable XML, HTTP statuses other than
+    404/410) and ones left unfetched by ``max_sitemaps``.
+    """
+
+    def __init__(self, client_factory: Callable[[], httpx.AsyncClient],
+                 wait: Optional[Callable[[str], Awaitable[None]]] = None,
+                 max_sitemaps: int = MAX_SITEMAPS,
+                 robots: Optional[Callable[[str], Awaitable[Optional[RobotFileParser]]]] = None):
+        """
+        Args:
+            client_factory: Returns the HTTP client used to fetch robots.txt and sitemaps
+            wait: Optional coroutine awaited before each request, e.g. a per-host rate limiter
+            max_sitemaps: Most sitemap files fetched
+            robots: Optional coroutine returning a URL's parsed robots.txt (or None), e.g.
+                :meth:`PolitenessScheduler.robots`, so robots.txt is fetched once per host
+        """
+        self.logger = setup_logger("SitemapReader")
+        self.client_factory = client_factory
+        self.wait = wait
+        self.robots = robots
+        self.max_sitemaps = max_sitemaps
+        self.sitemaps_fetched = 0
+        self.sitemaps_skipped = 0
+        self.urls_listed = 0
+        self.urls_skipped = 0
+
+    async def discover(self, url: str) -> List[str]:
+        """Sitemap URLs for the site of ``url``, from its robots.txt."""
+        parsed = urlparse(url)
+        site = f"{parsed.scheme}://{parsed.netloc}"
+        parser = await self.robots(url) if self.robots is not None else await self._fetch_robots(site)
+        sitemaps = parser.site_maps() if parser is not None else None
+        return sitemaps or [f"{site}/sitemap.xml"]
+
+    async def _fetch_robots(self, site: str) -> Optional[RobotFileParser]:
+        robots_url = f"{site}/robots.txt"
+        try:
+            if self.wait is not None:
+                await self.wait(robots_url)
+            response = await self.client_factory().get(robots_url)
+        except httpx.HTTPError as e:
+            self.logger.info(f"Could not fetch {robots_url}: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+        parser = RobotFileParser()
+        parser.parse(response.text.splitlines())
+        return parser
+
+    async def entries(self, sitemap_urls: List[str],
+                      modified_since: Optional[float] = None) -> AsyncIterator[SitemapEntry]:
+        """
+        Stream the page entries of sitemaps, following sitemap indexes.
+
+        Args:
+            sitemap_urls: Sitemaps (or sitemap indexes) to start from
+            modified_since: Skip pages and nested sitemaps last modified before this Unix
+                timestamp (entries without ``lastmod`` are kept)
+
+        Yields:
+            One SitemapEntry per listed page, in sitemap order
+        """
+        queue = deque(sitemap_urls)
+        seen = set()
+        while queue and self.sitemaps_fetched < self.max_sitemaps:
+            sitemap_url = queue.popleft()
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            self.sitemaps_fetched += 1
+            parser = SitemapParser()
+            try:
+                if self.wait is not None:
+                    await self.wait(sitemap_url)
+                async with self.client_factory().stream("GET", sitemap_url) as response:
+                    if response.status_code != 200:
+                        self.logger.info(f"Sitemap {sitemap_url} returned HTTP {response.status_code}")
+                        # A missing sitemap lists nothing; any other failure may hide pages
+                        if response.status_code not in GONE_STATUS_CODES:
+                            self.sitemaps_skipped += 1
+                        continue
+                    async for chunk in response.aiter_bytes():
+                        for entry in self._pages(parser.feed(chunk), queue, modified_since):
+                            yield entry
+                for entry in self._pages(parser.close(), queue, modified_since):
+                    yield entry
+            except (httpx.HTTPError, ElementTree.ParseError, zlib.error) as e:
+                self.logger.warning(f"Could not read sitemap {sitemap_url}: {e}")
+                self.sitemaps_skipped += 1
+        unfetched = set(queue) - seen
+        if unfetched:
+            self.sitemaps_skipped += len(unfetched)
+            self.logger.info(f"Stopped after {self.max_sitemaps} sitemaps; {len(unfetched)} not fetched")
+
+    def _pages(self, parsed: List[Tuple[str, SitemapEntry]], queue: deque,
+               modified_since: Optional[float]) -> List[SitemapEntry]:
+        """Queue the nested sitemaps among parsed entries and return the pages."""
+        pages = []
+        for kind, entry in parsed:
+            outdated = modified_since is not None and entry.lastmod is not None and entry.lastmod < modified_since
+            if kind == "url":
+                self.urls_listed += 1
+                if outdated:
+                    self.urls_skipped += 1
+                else:
+                    pages.append(entry)
+            elif outdated:
+                self.sitemaps_skipped += 1
+            else:
+                queue.append(entry.url)
+        return pages
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sitemaps_fetched": self.sitemaps_fetched,
+            "sitemaps_skipped": self.sitemaps_skipped,
+            "urls_listed": self.urls_listed,
+            "urls_skipped": self.urls_skipped
+        }
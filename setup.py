@@ -8,12 +8,19 @@ setup(
         "fastapi>=0.95.0",
         "openai>=1.0.0",
         "beautifulsoup4>=4.12.0",
+        "lxml>=4.9.2",
         "requests>=2.28.0",
         "crawl4ai>=0.1.0", 
         "python-dotenv>=1.0.0",
         "uvicorn>=0.21.0",
         "asyncio>=3.4.3",
+        "httpx>=0.24.0",
+        "psutil>=5.9.0",
     ],
+    extras_require={
+        # RedisCoordinator, for crawls spread over several machines
+        "redis": ["redis>=4.2.0"],
+    },
     author="Abhishek Shetty",
     author_email="ashetty21@berkeley.edu",
     description="An AI-powered web crawler for RAG systems",
@@ -0,0 +1,87 @@
+# tests/conftest.py
+
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.enhanced_crawler import EnhancedCrawlerClient
+
+FILLER = " ".join(["Widgets are small parts used to build larger machines."] * 6)
+
+
+def html_page(title: str, body: str = "", head: str = "") -> str:
+    """A server-rendered page with enough text to stay on the HTTP tier."""
+    return (f"<html><head><title>{title}</title>{head}</head>"
+            f"<body><h1>{title}</h1><p>{FILLER}</p>{body}</body></html>")
+
+
+class FakeSite:
+    """
+    Serves a dict of pages through an httpx MockTransport and records every request.
+
+    ``pages`` maps URLs to HTML, ``redirects`` maps URLs to their target, and
+    ``responses`` maps URLs to ``(status, headers)`` pairs returned, one per request,
+    before the page itself is served.
+    """
+
+    def __init__(self, pages: Dict[str, str], redirects: Optional[Dict[str, str]] = None,
+                 responses: Optional[Dict[str, List[Tuple[int, Dict[str, str]]]]] = None):
+        self.pages = pages
+        self.redirects = redirects or {}
+        self.responses = {url: list(queued) for url, queued in (responses or {}).items()}
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        self.requests.append(url)
+        if self.responses.get(url):
+            status, headers = self.responses[url].pop(0)
+            return httpx.Response(status, headers=headers)
+        if url in self.redirects:
+            return httpx.Response(301, headers={"Location": self.redirects[url]})
+        if url in self.pages:
+            return httpx.Response(200, text=self.pages[url], headers={"Content-Type": "text/html"})
+        return httpx.Response(404, text="missing", headers={"Content-Type": "text/html"})
+
+    def client(self, **kwargs) -> EnhancedCrawlerClient:
+        """A crawler client that fetches from this site and never starts a browser."""
+        kwargs.setdefault("polite", False)
+        kwargs.setdefault("parse_executor", "inline")
+        client = EnhancedCrawlerClient(api_key=None, **kwargs)
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler),
+                                                follow_redirects=True)
+        if client.politeness is not None:
+            client.politeness.client_factory = client._get_http_client
+
+        async def no_browser():
+            raise AssertionError("the browser should not be needed")
+
+        client._ensure_crawler_initialized = no_browser
+        return client
+
+
+class CharEncoding:
+    """A tokenizer that makes every character a token, far above the length estimate."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture
+def char_tokens(monkeypatch):
+    """Count tokens with CharEncoding instead of tiktoken (or the length estimate)."""
+    from crawler import content
+    monkeypatch.setattr(content, "_encoding", lambda model=None: CharEncoding())
+
+
+@pytest.fixture(autouse=True)
+def no_openai_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
@@ -0,0 +1,150 @@
+# tests/test_ai_processor.py
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+from conftest import html_page
+from crawler.ai_processor import AiProcessor, _merge_data
+from crawler.content import count_tokens
+
+
+class FakeAsyncOpenAI:
+    """Stands in for AsyncOpenAI, answering every completion with ``reply(messages)``."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        content = self.reply(kwargs["messages"])
+        if isinstance(content, Exception):
+            raise content
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(content)))])
+
+
+def processor_with(reply, **options) -> AiProcessor:
+    processor = AiProcessor(api_key="test", **options)
+    processor._async_client = FakeAsyncOpenAI(reply)
+    return processor
+
+
+def test_relevance_is_read_from_the_async_completion():
+    processor = processor_with(lambda messages: {"relevance_score": 0.9, "reasoning": "Pricing page"})
+    score = asyncio.run(processor.analyze_relevance_async("Plans from $5", "Pricing", "find pricing"))
+    assert score == (0.9, "Pricing page")
+    prompt = processor._async_client.calls[0]["messages"][-1]["content"]
+    assert "find pricing" in prompt and "Pricing" in prompt
+
+
+def test_relevance_falls_back_to_keywords_when_the_request_fails():
+    processor = processor_with(lambda messages: RuntimeError("rate limited"))
+    score, reason = asyncio.run(processor.analyze_relevance_async("Plans and pricing", "Pricing", "pricing plans"))
+    assert (score, reason) == processor._keyword_relevance("Plans and pricing", "Pricing", "pricing plans")
+
+
+def test_batch_relevance_maps_results_by_id_and_fills_gaps():
+    reply = {"results": [{"id": 1, "relevance_score": 0.8, "reasoning": "second"},
+                         {"id": 0, "relevance_score": 0.1, "reasoning": "first"}]}
+    processor = processor_with(lambda messages: reply)
+    pages = [("Blog", "news"), ("Pricing", "plans"), ("Pricing plans", "pricing plans")]
+    results = asyncio.run(processor.analyze_relevance_batch_async(pages, "pricing plans"))
+    assert results[:2] == [(0.1, "first"), (0.8, "second")]
+    # The page missing from the response is scored by keywords
+    assert results[2] == processor._keyword_relevance("pricing plans", "Pricing plans", "pricing plans")
+    assert len(processor._async_client.calls) == 1
+
+
+def test_extraction_returns_the_completion_with_source_metadata():
+    reply = {"summary": "Plans start at $5.", "key_points": ["Basic: $5"], "relevance_score": 0.7,
+             "extracted_data": {"plans": ["Basic"]}}
+    processor = processor_with(lambda messages: reply)
+    html = html_page("Pricing", "<p>The Basic plan costs $5 a month and suits small teams.</p>")
+    result = asyncio.run(processor.extract_structured_content_async(html, "Pricing", "https://ex.com/pricing",
+                                                                    "list plan prices"))
+    assert result["extracted_data"] == {"plans": ["Basic"]}
+    assert result["source_url"] == "https://ex.com/pricing" and result["source_title"] == "Pricing"
+    assert "Basic plan costs $5" in processor._async_client.calls[0]["messages"][-1]["content"]
+
+
+def test_extraction_input_is_packed_off_the_event_loop():
+    threads = []
+    processor = processor_with(lambda messages: {"summary": "ok"})
+    packed = processor._extraction_input
+
+    def recording_input(*args):
+        threads.append(threading.current_thread().name)
+        return packed(*args)
+
+    processor._extraction_input = recording_input
+    asyncio.run(processor.extract_structured_content_async(html_page("Pricing"), "Pricing", "https://ex.com/",
+                                                           "list plan prices"))
+    assert threads and threading.current_thread().name not in threads
+
+
+def test_extraction_falls_back_to_basic_extraction_on_errors():
+    processor = processor_with(lambda messages: RuntimeError("timeout"))
+    html = html_page("Pricing", "<h2>Plans</h2><p>The Basic plan costs $5 a month and suits small teams.</p>")
+    result = asyncio.run(processor.extract_structured_content_async(html, "Pricing", "https://ex.com/pricing",
+                                                                    "list plan prices"))
+    assert "Plans" in result["key_points"] and result["relevance_score"] == 0.5
+    assert "extracted_data" not in result
+
+
+def test_concurrent_requests_share_the_event_loop():
+    processor = processor_with(lambda messages: {"relevance_score": 0.5, "reasoning": "ok"})
+
+    async def run():
+        return await asyncio.gather(*(processor.analyze_relevance_async("content", f"Page {i}", "pricing")
+                                      for i in range(4)))
+
+    assert asyncio.run(run()) == [(0.5, "ok")] * 4
+    assert processor._async_client.max_in_flight == 4
+
+
+def test_merge_data_merges_objects_key_by_key():
+    merged = _merge_data({"plans": ["Basic"], "currency": "USD", "trial": None},
+                         {"plans": ["Basic", "Pro"], "currency": "EUR", "trial": "14 days"})
+    assert merged == {"plans": ["Basic", "Pro"], "currency": ["USD", "EUR"], "trial": "14 days"}
+
+
+def test_long_pages_are_extracted_chunk_by_chunk_and_merged(char_tokens):
+    partials = {
+        1: {"summary": "Basic plan.", "key_points": ["Basic costs $5"], "relevance_score": 0.9,
+            "extracted_data": {"plans": ["Basic"], "currency": "USD"}},
+        2: {"summary": "Pro plan.", "key_points": ["basic  costs $5", "Pro costs $20"], "relevance_score": 0.8,
+            "extracted_data": {"plans": ["Pro"]}},
+    }
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        part = int(prompt.split("Page Content (part ")[1].split(" ")[0])
+        return partials.get(part, {"summary": "Other.", "key_points": [], "relevance_score": 0.1})
+
+    processor = processor_with(reply, long_page_mode="map_reduce", max_input_tokens=600)
+    body = "".join(f"<h2>Section {number}</h2><p>{'Plans are billed monthly in dollars. ' * 12}</p>"
+                   for number in range(4))
+    result = asyncio.run(processor.extract_structured_content_async(html_page("Pricing", body), "Pricing",
+                                                                    "https://ex.com/pricing", "list plan prices"))
+
+    prompts = [call["messages"][-1]["content"] for call in processor._async_client.calls]
+    assert result["chunks"] == len(prompts) > 2
+    for prompt in prompts:
+        content = prompt.split("):", 1)[1].split("Based on the user's instructions")[0].strip()
+        assert count_tokens(content) <= 600
+    # The best chunks' summaries in page order; key points deduplicated ignoring case and spacing
+    assert result["summary"] == "Basic plan. Pro plan."
+    assert result["key_points"] == ["Basic costs $5", "Pro costs $20"]
+    assert result["extracted_data"] == {"plans": ["Basic", "Pro"], "currency": "USD"}
+    assert result["relevance_score"] == 0.9 and result["source_url"] == "https://ex.com/pricing"
@@ -0,0 +1,53 @@
+# tests/test_api.py
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import FakeSite
+from api.jobs import COMPLETED, CrawlJob, JobManager
+from api.main import app
+
+
+@pytest.fixture
+def api():
+    # No context manager: startup would launch the real browser
+    app.state.crawler = FakeSite({}).client()
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("body", [
+    {"url": "https://a.example/", "depth": 1, "strategy": "deepest"},
+    {"url": "https://a.example/", "depth": 1, "max_pages": "ten"},
+    {"url": "https://a.example/", "depth": 1, "concurrency": 0},
+    {"url": "https://a.example/", "depth": 1, "incremental": True},
+])
+def test_bad_crawl_options_are_rejected_with_400(api, body):
+    response = api.post("/api/scrape", json=body)
+    assert response.status_code == 400
+    assert api.post("/api/jobs", json=body).status_code == 400
+
+
+def test_jobs_keep_only_their_latest_pages():
+    job = CrawlJob({"url": "https://a.example/"}, max_pages_kept=3)
+    for number in range(10):
+        job.add_page({"url": f"https://a.example/{number}"})
+
+    assert len(job.pages) < 6
+    assert job.to_dict()["pages_crawled"] == 10
+    first, pages = job.pages_since(8)
+    assert first == 8 and [page["url"] for page in pages] == ["https://a.example/8", "https://a.example/9"]
+    first, pages = job.pages_since(0)
+    assert first == job.pages_dropped and pages[-1]["url"] == "https://a.example/9"
+
+
+def test_finished_jobs_are_evicted_after_their_ttl():
+    manager = JobManager(crawler=None, finished_job_ttl=60.0)
+    old, recent = CrawlJob({}), CrawlJob({})
+    for job, finished_at in ((old, time.time() - 120), (recent, time.time())):
+        job.status, job.finished_at = COMPLETED, finished_at
+        manager._jobs[job.id] = job
+
+    assert manager.get(old.id) is None
+    assert [job.id for job in manager.list()] == [recent.id]
@@ -0,0 +1,45 @@
+# tests/test_batching.py
+
+import asyncio
+
+from crawler.batching import RelevanceBatcher
+
+
+class FakeProcessor:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def analyze_relevance_batch_async(self, pages, instructions):
+        self.batches.append([title for title, _ in pages])
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return [(0.5, f"scored {title}") for title, _ in pages]
+
+
+def test_concurrent_pages_share_batches():
+    processor = FakeProcessor()
+    batcher = RelevanceBatcher(processor, "pricing", max_batch_size=2, max_wait=0.05)
+
+    async def run():
+        return await asyncio.gather(*(batcher.score(title, "") for title in ("a", "b", "c")))
+
+    results = asyncio.run(run())
+    assert results == [(0.5, "scored a"), (0.5, "scored b"), (0.5, "scored c")]
+    # Two pages fill a batch at once; the third waits for max_wait
+    assert processor.batches == [["a", "b"], ["c"]]
+    assert batcher.stats() == {"batches_sent": 2, "pages_scored": 3}
+
+
+def test_batch_errors_reach_every_caller():
+    batcher = RelevanceBatcher(FakeProcessor(fail=True), "pricing", max_batch_size=2, max_wait=0.05)
+
+    async def run():
+        return await asyncio.gather(batcher.score("a", ""), batcher.score("b", ""), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    assert batcher.stats()["batches_sent"] == 0
+
+
+def test_max_batch_size_is_at_least_one():
+    assert RelevanceBatcher(FakeProcessor(), "pricing", max_batch_size=0).max_batch_size == 1
@@ -0,0 +1,110 @@
+# tests/test_browser_pool.py
+
+import asyncio
+from types import SimpleNamespace
+
+from crawl4ai import BrowserConfig, CrawlerRunConfig
+
+from crawler.browser_pool import BrowserPool
+
+
+class StubCrawler:
+    """Stands in for AsyncWebCrawler, recording the tabs it is asked to use and close."""
+
+    def __init__(self, error: str = None):
+        self.error = error
+        self.sessions = []
+        self.killed = []
+        self.closed = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.crawler_strategy = SimpleNamespace(kill_session=self.kill_session)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    async def kill_session(self, session_id):
+        self.killed.append(session_id)
+
+    async def arun(self, url, config):
+        self.sessions.append(config.session_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return SimpleNamespace(success=self.error is None, error_message=self.error, html="<html></html>")
+
+
+class StubPool(BrowserPool):
+    def __init__(self, error: str = None, **options):
+        super().__init__(BrowserConfig(headless=True), **options)
+        self.error = error
+        self.crawlers = []
+
+    def _create_crawler(self):
+        self.crawlers.append(StubCrawler(self.error))
+        return self.crawlers[-1]
+
+
+def fetch(pool: BrowserPool, pages: int, concurrent: bool = False) -> None:
+    async def run():
+        urls = [f"https://ex.com/p{number}" for number in range(pages)]
+        if concurrent:
+            await asyncio.gather(*(pool.run(url, CrawlerRunConfig()) for url in urls))
+        else:
+            for url in urls:
+                await pool.run(url, CrawlerRunConfig())
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_tabs_are_reused_across_pages():
+    pool = StubPool(size=2)
+    fetch(pool, 6)
+    crawler = pool.crawlers[0]
+    assert len(pool.crawlers) == 1 and len(set(crawler.sessions)) == 2
+    # Tabs are only closed with the pool
+    assert sorted(crawler.killed) == sorted(set(crawler.sessions)) and crawler.closed
+
+
+def test_pages_in_flight_never_exceed_the_pool_size():
+    pool = StubPool(size=2)
+    fetch(pool, 6, concurrent=True)
+    assert pool.crawlers[0].max_in_flight == 2
+
+
+def test_worn_out_tabs_are_replaced():
+    pool = StubPool(size=1, max_uses=2)
+    fetch(pool, 5)
+    crawler = pool.crawlers[0]
+    sessions = crawler.sessions
+    assert sessions[0] == sessions[1] != sessions[2] == sessions[3] != sessions[4]
+    assert pool.sessions_replaced == 2 and crawler.killed[:2] == [sessions[0], sessions[2]]
+
+
+def test_broken_tabs_are_replaced_at_once():
+    pool = StubPool(error="Target closed", size=1)
+    fetch(pool, 2)
+    sessions = pool.crawlers[0].sessions
+    assert sessions[0] != sessions[1] and pool.sessions_replaced == 2
+
+
+def test_browser_is_recycled_after_recycle_after_pages():
+    pool = StubPool(size=2, recycle_after=3)
+    fetch(pool, 7)
+    assert pool.restarts == 2 and len(pool.crawlers) == 3
+    assert [len(crawler.sessions) for crawler in pool.crawlers] == [3, 3, 1]
+    assert all(crawler.closed for crawler in pool.crawlers)
+
+
+def test_browser_is_recycled_when_it_uses_too_much_memory():
+    pool = StubPool(size=1, recycle_after=None, max_memory_mb=500)
+    usage = iter([100.0, 900.0, 100.0])
+    pool._browser_memory_mb = lambda: next(usage, 100.0)
+    fetch(pool, 4)
+    assert pool.restarts == 1
+    assert [len(crawler.sessions) for crawler in pool.crawlers] == [2, 2]
@@ -0,0 +1,125 @@
+# tests/test_cache.py
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+from conftest import FakeSite, html_page
+from crawler.ai_processor import AiProcessor
+from crawler.cache import PageCache
+from crawler.llm_cache import LLMCache
+from crawler.politeness import PolitenessScheduler
+
+
+def test_llm_cache_round_trip_and_stats(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    key = LLMCache.make_key(model="m", prompt="p")
+    assert key == LLMCache.make_key(prompt="p", model="m")
+    assert cache.get(key) is None
+    cache.set(key, {"score": 0.5})
+    assert cache.get(key) == {"score": 0.5}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_llm_cache_evicts_least_recently_used(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), max_size_bytes=250)
+    for i in range(3):
+        cache.set(f"k{i}", "x" * 100)
+        cache.get("k0")
+    assert cache.get("k0") is not None
+    assert cache.get("k1") is None
+    assert cache.stats()["size_bytes"] <= 250
+
+
+def test_page_cache_keeps_body_validators_and_final_url(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"), ttl=60)
+    cache.put("https://ex.com/old#top", "<html>hi</html>", {"ETag": '"v1"'}, final_url="https://ex.com/new/")
+    page = cache.get("https://ex.com/old")
+    assert page.html == "<html>hi</html>"
+    assert page.etag == '"v1"'
+    assert page.url == "https://ex.com/new/"
+    assert cache.is_fresh(page)
+    assert PageCache(str(tmp_path / "pages"), ttl=0).is_fresh(page) is False
+
+
+def test_page_cache_tracks_its_size_and_evicts_least_recently_used(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"), max_size_bytes=250)
+    cache.put("https://ex.com/a", "a" * 100)
+    cache.put("https://ex.com/a", "b" * 100)  # replaces, does not add
+    cache.put("https://ex.com/c", "c" * 100)
+    assert cache._total_size == 200
+    cache.get("https://ex.com/a")
+    cache.put("https://ex.com/d", "d" * 100)
+    assert cache.get("https://ex.com/c") is None and cache.get("https://ex.com/a") is not None
+    assert cache._total_size == cache._stored_size() == 200
+    # The total survives a restart
+    assert PageCache(str(tmp_path / "pages"), max_size_bytes=250)._total_size == 200
+
+
+class RecordingScheduler(PolitenessScheduler):
+    def __init__(self):
+        super().__init__(initial_rate=100.0, burst=100.0, respect_robots=False)
+        self.acquired = []
+        self.statuses = []
+
+    async def acquire(self, url):
+        self.acquired.append(url)
+        await super().acquire(url)
+
+    def record(self, url, status_code, latency=None, retry_after=None):
+        self.statuses.append(status_code)
+        return super().record(url, status_code, latency, retry_after)
+
+
+def test_revalidation_is_paced_and_reported_to_politeness(tmp_path):
+    url = "https://ex.com/"
+    cache = PageCache(str(tmp_path / "pages"), ttl=0)
+    cache.put(url, html_page("Home"), {"ETag": '"v1"'})
+    site = FakeSite({url: html_page("Home")}, responses={url: [(304, {}), (429, {"Retry-After": "1"})]})
+    scheduler = RecordingScheduler()
+    client = site.client(page_cache=cache, politeness=scheduler)
+
+    async def revalidate_twice():
+        return await client._cached_page(url), await client._cached_page(url)
+
+    fresh, throttled = asyncio.run(revalidate_twice())
+    assert fresh is not None and fresh.html == html_page("Home")
+    # A throttled revalidation is a miss, and the host is backed off
+    assert throttled is None
+    assert scheduler.acquired == [url, url] and scheduler.statuses == [304, 429]
+
+
+def test_async_llm_calls_use_the_cache_off_the_event_loop(tmp_path):
+    loop_thread = []
+    cache_threads = []
+
+    class RecordingCache(LLMCache):
+        def get(self, key):
+            cache_threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            cache_threads.append(threading.get_ident())
+            super().set(key, value)
+
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"ok": 1})))])
+
+    processor = AiProcessor(api_key="test", cache=RecordingCache(str(tmp_path / "llm.sqlite")))
+    processor._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def run():
+        loop_thread.append(threading.get_ident())
+        first = await processor._chat_json_async("system", "prompt", 0.0, 10)
+        second = await processor._chat_json_async("system", "prompt", 0.0, 10)
+        return first, second
+
+    assert asyncio.run(run()) == ({"ok": 1}, {"ok": 1})
+    assert len(calls) == 1
+    assert len(cache_threads) == 3
+    assert loop_thread[0] not in cache_threads
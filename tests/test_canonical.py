@@ -0,0 +1,79 @@
+# tests/test_canonical.py
+
+import asyncio
+
+from conftest import FakeSite, html_page
+from crawler.canonical import UrlCanonicalizer
+from crawler.coordinator import SQLiteCoordinator
+from crawler.document import ParsedDocument
+from crawler.sharding import SharedCrawlStore
+
+
+def test_canonicalize_drops_tracking_and_sorts_query():
+    canonicalize = UrlCanonicalizer()
+    assert canonicalize("HTTPS://Ex.com:443/a?utm_source=x&b=2&a=1#top") == "https://ex.com/a?a=1&b=2"
+    assert canonicalize("https://ex.com/a;jsessionid=ABC") == "https://ex.com/a"
+    assert canonicalize("https://ex.com/docs/index.html") == "https://ex.com/docs/"
+
+
+def test_trailing_slash_kept_by_default():
+    assert UrlCanonicalizer()("https://ex.com/docs/") == "https://ex.com/docs/"
+    assert UrlCanonicalizer(strip_trailing_slash=True)("https://ex.com/docs/") == "https://ex.com/docs"
+    rules = {"ex.com": {"strip_trailing_slash": True}}
+    assert UrlCanonicalizer(rules=rules)("https://www.ex.com/docs/") == "https://www.ex.com/docs"
+
+
+def test_declared_canonical_ignores_other_hosts():
+    canonicalize = UrlCanonicalizer()
+    assert canonicalize.declared_canonical("https://ex.com/print/a", "https://ex.com/a") == "https://ex.com/a"
+    assert canonicalize.declared_canonical("https://ex.com/a", "https://other.com/a") is None
+    assert canonicalize.declared_canonical("https://ex.com/a", "https://ex.com/a#x") is None
+
+
+def test_links_deduplicated_by_key_keep_first_spelling():
+    html = ("<a href='/docs/?utm_source=nav'>Docs</a><a href='/docs/'>Docs</a>"
+            "<a href='/guide?b=2&a=1'>Guide</a><a href='/guide?a=1&b=2'>Guide</a>")
+    document = ParsedDocument.from_html(html, url="https://ex.com/", link_key=UrlCanonicalizer())
+    assert document.links == ["https://ex.com/docs/?utm_source=nav", "https://ex.com/guide?b=2&a=1"]
+
+
+def test_relative_links_resolve_against_directory_url():
+    site = FakeSite({
+        "https://ex.com/": html_page("Home", "<a href='/docs/'>Docs</a>"),
+        "https://ex.com/docs/": html_page("Docs", "<a href='guide'>Guide</a>"),
+        "https://ex.com/docs/guide": html_page("Guide"),
+    })
+    client = site.client()
+    result = asyncio.run(client.scrape_async("https://ex.com/", depth=2))
+    urls = [page["url"] for page in result["pages"]]
+    assert urls == ["https://ex.com/", "https://ex.com/docs/", "https://ex.com/docs/guide"]
+    assert not any("error" in page for page in result["pages"])
+
+
+def test_relative_links_resolve_against_final_url_after_redirect():
+    site = FakeSite({
+        "https://ex.com/": html_page("Home", "<a href='/old'>Old</a>"),
+        "https://ex.com/new/": html_page("New", "<a href='child'>Child</a><a href='/new/'>Self</a>"),
+        "https://ex.com/new/child": html_page("Child"),
+    }, redirects={"https://ex.com/old": "https://ex.com/new/"})
+    client = site.client()
+    result = asyncio.run(client.scrape_async("https://ex.com/", depth=3))
+    pages = {page["url"]: page for page in result["pages"]}
+    assert pages["https://ex.com/old"]["final_url"] == "https://ex.com/new/"
+    assert "https://ex.com/new/child" in pages
+    # The redirect target is the page already crawled
+    assert "https://ex.com/new/" not in pages
+
+
+def test_coordinator_and_shared_store_dedup_with_key_func(tmp_path):
+    canonicalize = UrlCanonicalizer()
+    coordinator = SQLiteCoordinator(str(tmp_path / "coordinator.sqlite"), key_func=canonicalize)
+    coordinator.create("c1", {"url": "https://ex.com/a?x=1&y=2", "max_pages": 10})
+    assert not coordinator.add("c1", "https://ex.com/a?y=2&x=1&utm_medium=mail", 1)
+    assert coordinator.add("c1", "https://ex.com/b", 1)
+    coordinator.close()
+
+    store = SharedCrawlStore(str(tmp_path / "shared.sqlite"), key_func=canonicalize)
+    assert store.add("https://ex.com/a?utm_source=x", 0, "ex.com", 0)
+    assert not store.add("https://ex.com/a", 0, "ex.com", 0)
+    store.close()
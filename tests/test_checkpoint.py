@@ -0,0 +1,80 @@
+# tests/test_checkpoint.py
+
+import asyncio
+import threading
+
+from conftest import FakeSite, html_page
+from crawler.checkpoint import CLAIMED, DONE, PENDING, REUSED, CheckpointStore
+
+START = "https://ex.com/"
+
+
+def test_store_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    crawl_id = store.create({"url": START})
+    store.add_url(crawl_id, START, 0)
+    store.add_url(crawl_id, "https://ex.com/a", 1)
+    store.add_url(crawl_id, START, 0)
+    store.add_urls(crawl_id, [("https://ex.com/b", 1), (START, 0)])
+    store.claim(crawl_id, "https://ex.com/a")
+    store.save_result(crawl_id, START, {"url": START, "title": "Home"})
+    store.flush()
+
+    assert store.load_frontier(crawl_id) == [
+        (START, 0, DONE), ("https://ex.com/a", 1, CLAIMED), ("https://ex.com/b", 1, PENDING)
+    ]
+    assert list(store.results(crawl_id)) == [{"url": START, "title": "Home"}]
+    assert store.get(crawl_id)["pages"] == 1 and store.get(crawl_id)["status"] == "running"
+    store.delete(crawl_id)
+    assert store.get(crawl_id) is None
+    store.close()
+
+
+def test_resume_fetches_only_unfinished_urls(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    crawl_id = store.create({"url": START, "instructions": None, "depth": 1, "follow_external_links": False,
+                             "max_pages": 4, "options": {}})
+    for url, state in ((START, DONE), ("https://ex.com/p0", DONE), ("https://ex.com/p1", CLAIMED),
+                       ("https://ex.com/p2", PENDING), ("https://ex.com/p3", REUSED)):
+        store.add_url(crawl_id, url, 0 if url == START else 1)
+        if state == CLAIMED:
+            store.claim(crawl_id, url)
+        elif state != PENDING:
+            store.save_result(crawl_id, url, {"url": url}, state=state)
+    store.flush()
+
+    site = FakeSite({f"https://ex.com/p{number}": html_page(f"P{number}") for number in range(4)})
+    result = asyncio.run(site.client(checkpoint_store=store).resume_async(crawl_id))
+
+    # Reused pages were never fetched, so they leave the budget to p1 and p2
+    assert sorted(site.requests) == ["https://ex.com/p1", "https://ex.com/p2"]
+    assert len(result["pages"]) == 5
+    assert store.get(crawl_id)["status"] == "completed"
+
+
+class ThreadRecordingStore(CheckpointStore):
+    """Records which thread each frontier write runs on."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def add_urls(self, crawl_id, entries):
+        self.threads.add(threading.current_thread().name)
+        super().add_urls(crawl_id, entries)
+
+    def claim(self, crawl_id, url):
+        self.threads.add(threading.current_thread().name)
+        super().claim(crawl_id, url)
+
+
+def test_checkpoint_writes_run_off_the_event_loop(tmp_path):
+    store = ThreadRecordingStore(str(tmp_path / "checkpoints.sqlite"))
+    pages = {START: html_page("Home", "<a href='/a'>a</a><a href='/b'>b</a>"),
+             "https://ex.com/a": html_page("A"), "https://ex.com/b": html_page("B")}
+    client = FakeSite(pages).client(checkpoint_store=store)
+    result = asyncio.run(client.scrape_async(START, depth=1, max_pages=10, concurrency=3, crawl_id="run"))
+
+    assert len(result["pages"]) == 3
+    assert store.threads and threading.current_thread().name not in store.threads
+    assert [state for _, _, state in store.load_frontier("run")] == [DONE, DONE, DONE]
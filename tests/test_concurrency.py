@@ -0,0 +1,70 @@
+# tests/test_concurrency.py
+
+import asyncio
+from collections import Counter
+
+import httpx
+
+from conftest import FakeSite, html_page
+
+START = "https://ex.com/"
+
+
+class SlowSite(FakeSite):
+    """A FakeSite whose responses take a moment, recording how many overlap."""
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            return super().handler(request)
+        finally:
+            self.in_flight -= 1
+
+
+def tree_site(site_class=FakeSite, width: int = 6):
+    """A start page linking to ``width`` pages, each linking to two pages one level deeper."""
+    pages = {START: html_page("Home", "".join(f"<a href='/p{i}'>p{i}</a>" for i in range(width)))}
+    for i in range(width):
+        pages[f"https://ex.com/p{i}"] = html_page(f"P{i}", f"<a href='/p{i}/a'>a</a><a href='/p{i}/b'>b</a>")
+        for leaf in ("a", "b"):
+            pages[f"https://ex.com/p{i}/{leaf}"] = html_page(f"P{i}{leaf}")
+    return site_class(pages)
+
+
+def crawl(site, **options):
+    return asyncio.run(site.client().scrape_async(START, **options))["pages"]
+
+
+def test_concurrent_workers_fetch_pages_in_parallel():
+    site = tree_site(SlowSite)
+    pages = crawl(site, depth=1, max_pages=20, concurrency=4)
+    assert len(pages) == 7
+    assert 1 < site.max_in_flight <= 4
+
+
+def test_per_host_concurrency_caps_requests_to_one_host():
+    site = tree_site(SlowSite)
+    crawl(site, depth=1, max_pages=20, concurrency=4, per_host_concurrency=2)
+    assert site.max_in_flight == 2
+
+
+def test_max_pages_holds_under_concurrency():
+    site = tree_site(SlowSite)
+    pages = crawl(site, depth=2, max_pages=5, concurrency=4)
+    assert len(pages) == 5
+    # Nothing beyond the budget is fetched, and nothing twice
+    assert len(site.requests) == 5 and max(Counter(site.requests).values()) == 1
+
+
+def test_depth_holds_under_concurrency():
+    site = tree_site()
+    pages = crawl(site, depth=1, max_pages=100, concurrency=3)
+    assert sorted(page["url"] for page in pages) == [START] + [f"https://ex.com/p{i}" for i in range(6)]
+    assert not any(url.endswith(("/a", "/b")) for url in site.requests)
@@ -0,0 +1,71 @@
+# tests/test_content.py
+
+from crawler.content import (build_llm_input, chunk_sections, count_tokens, main_content_sections,
+                             section_scores)
+from crawler.document import ParsedDocument
+
+
+def document(body: str) -> ParsedDocument:
+    return ParsedDocument.from_html(f"<html><head><title>T</title></head><body>{body}</body></html>",
+                                    url="https://ex.com/")
+
+
+def section(heading: str, sentence: str, repeat: int = 3) -> str:
+    return f"<h2>{heading}</h2><p>{sentence * repeat}</p>"
+
+
+def test_main_content_drops_chrome_link_lists_and_labels():
+    doc = document(
+        "<nav><a href='/a'>Home</a> <a href='/b'>Pricing</a></nav>"
+        "<h1>Plans</h1><p>Every plan includes unlimited projects and email support.</p>"
+        "<div><a href='/x'>Related article one</a> <a href='/y'>Related article two</a></div>"
+        "<p>Share</p>"
+        "<footer><p>Copyright 2024 Example Corporation, all rights reserved.</p></footer>"
+    )
+    assert main_content_sections(doc) == ["# Plans\nEvery plan includes unlimited projects and email support."]
+
+
+def test_main_content_falls_back_when_the_strict_pass_keeps_almost_nothing():
+    doc = document("<div class='content-nav'><p>The whole article sits inside a navigation-like wrapper.</p></div>")
+    assert "The whole article sits inside a navigation-like wrapper." in main_content_sections(doc)[-1]
+
+
+def test_sections_are_scored_by_instruction_keywords():
+    sections = ["## About\nWe build widgets.", "## Pricing\nPlans and pricing for teams.", "## Jobs\nWe hire."]
+    scores = section_scores(sections, "pricing plans")
+    assert max(range(3), key=lambda i: scores[i]) == 1
+    # Without instructions only the lead bonus is left
+    assert section_scores(sections, None) == [0.1, 0.0, 0.0]
+
+
+def test_small_pages_are_returned_whole():
+    doc = document(section("Pricing", "Plans start at five dollars a month. "))
+    result = build_llm_input(doc, "pricing", max_tokens=500)
+    assert result["truncated"] is False and result["sections_used"] == result["sections"] == 1
+    assert result["text"].startswith("## Pricing")
+
+
+def test_long_pages_are_packed_best_sections_first_in_page_order():
+    doc = document(
+        section("About", "Our company was founded long ago by widget makers. ", 8) +
+        section("Pricing", "Plans and pricing start at five dollars a month. ", 8) +
+        section("Careers", "We are hiring engineers in several offices. ", 8) +
+        section("Billing", "Pricing is billed monthly and plans renew automatically. ", 8)
+    )
+    result = build_llm_input(doc, "pricing plans", max_tokens=250)
+    assert result["truncated"] is True and result["tokens"] <= 250 + count_tokens(" ...")
+    text = result["text"]
+    # The two pricing sections win and are joined in page order, marking the gaps
+    assert "## About" not in text and "## Careers" not in text
+    assert text.startswith("[...]\n\n## Pricing") and "[...]\n\n## Billing" in text
+    assert result["sections"] == 4 and result["page_tokens"] > 250
+
+
+def test_chunks_keep_sections_whole_and_stay_within_measured_budgets(char_tokens):
+    sections = [f"## Part {number}\n" + "Widgets ship worldwide. " * 5 for number in range(5)]
+    sections.insert(2, "## Long\n" + "Every plan includes support. " * 40)
+    chunks = chunk_sections(sections, 300)
+    assert all(count_tokens(chunk) <= 300 for chunk in chunks)
+    # Nothing is lost or reordered, and short sections are never split
+    assert "".join(chunks).replace("\n\n", "").replace(" ", "") == "".join(sections).replace(" ", "")
+    assert all(any(section in chunk for chunk in chunks) for section in sections if count_tokens(section) <= 300)
@@ -0,0 +1,126 @@
+# tests/test_coordinator.py
+
+import asyncio
+import time
+
+import pytest
+
+from conftest import FakeSite, html_page
+from crawler.coordinator import SQLiteCoordinator, consume
+from crawler.exceptions import ConfigurationError
+
+START = "https://ex.com/"
+
+
+def docs_site() -> FakeSite:
+    pages = {START: html_page("Home", "".join(f"<a href='/p{i}'>Page {i}</a>" for i in range(6)))}
+    for i in range(6):
+        pages[f"https://ex.com/p{i}"] = html_page(f"Page {i}", "<a href='/'>Home</a>")
+    return FakeSite(pages)
+
+
+async def collect(stream):
+    return [page async for page in stream]
+
+
+def test_lease_complete_and_expiry(tmp_path):
+    coordinator = SQLiteCoordinator(str(tmp_path / "c.sqlite"))
+    coordinator.create("c1", {"url": START, "max_pages": 10})
+    stale = coordinator.lease("c1", lease_seconds=-1, max_pages=10)
+    # The expired lease is handed out again, and completing with the old one is ignored
+    fresh = coordinator.lease("c1", lease_seconds=60, max_pages=10)
+    assert fresh.url == START and fresh.token != stale.token
+    assert not coordinator.complete("c1", stale, {"url": START})
+    assert coordinator.complete("c1", fresh, {"url": START})
+    assert [page["url"] for page in coordinator.results("c1")] == [START]
+    assert coordinator.stats("c1") == {"queued": 0, "leased": 0, "done": 1}
+    assert not coordinator.active("c1", 10)
+
+
+def test_workers_share_one_crawl(tmp_path):
+    site = docs_site()
+    coordinator = SQLiteCoordinator(str(tmp_path / "c.sqlite"))
+
+    async def run():
+        streams = [site.client().scrape_stream(START, depth=1, max_pages=20, concurrency=2,
+                                               crawl_id="c1", coordinator=coordinator) for _ in range(2)]
+        return await asyncio.gather(*(collect(stream) for stream in streams))
+
+    first, second = asyncio.run(run())
+    urls = sorted(page["url"] for page in first + second)
+    assert urls == sorted([START] + [f"https://ex.com/p{i}" for i in range(6)])
+    assert len(list(coordinator.results("c1"))) == 7
+
+
+def test_coordinator_calls_do_not_block_the_loop(tmp_path):
+    class SlowCoordinator(SQLiteCoordinator):
+        def lease(self, *args, **kwargs):
+            time.sleep(0.05)
+            return super().lease(*args, **kwargs)
+
+    site = docs_site()
+    coordinator = SlowCoordinator(str(tmp_path / "c.sqlite"))
+    coordinator.create("c1", {"url": START, "instructions": None, "depth": 1,
+                              "follow_external_links": False, "max_pages": 3})
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        pages = await collect(consume(site.client(), coordinator, "c1", concurrency=1))
+        task.cancel()
+        return pages
+
+    pages = asyncio.run(run())
+    assert len(pages) == 3
+    # Four leases took at least 0.2s; the loop kept ticking meanwhile
+    assert ticks > 20
+
+
+@pytest.mark.parametrize("options", [
+    {"strategy": "best_first"},
+    {"seed_from_sitemaps": True},
+    {"bloom_capacity": 1000},
+])
+def test_unsupported_options_are_rejected(tmp_path, options):
+    coordinator = SQLiteCoordinator(str(tmp_path / "c.sqlite"))
+    stream = docs_site().client().scrape_stream(START, crawl_id="c1", coordinator=coordinator, **options)
+    with pytest.raises(ConfigurationError):
+        asyncio.run(collect(stream))
+
+
+def test_worker_options_apply(tmp_path):
+    coordinator = SQLiteCoordinator(str(tmp_path / "c.sqlite"))
+    meta = {}
+    stream = docs_site().client().scrape_stream(START, "widgets", depth=1, crawl_id="c1",
+                                                coordinator=coordinator, relevance_prefilter=True,
+                                                skip_near_duplicates=True, meta=meta)
+    pages = asyncio.run(collect(stream))
+    assert len(pages) == 7
+    # The pages share most of their text; duplicates skip the prefilter, the rest go
+    # to the LLM while the prefilter is still learning
+    duplicates = meta["near_duplicates"]["duplicates"]
+    assert duplicates >= 1
+    assert meta["prefilter"]["sent_to_llm"] + duplicates == 7
+
+
+def test_redirect_targets_are_marked_seen_in_the_shared_frontier(tmp_path):
+    site = FakeSite({
+        START: html_page("Home", "<a href='/old'>Old</a><a href='/other'>Other</a>"),
+        "https://ex.com/new": html_page("New"),
+        "https://ex.com/other": html_page("Other", "<a href='/new'>New</a>"),
+    }, redirects={"https://ex.com/old": "https://ex.com/new"})
+    coordinator = SQLiteCoordinator(str(tmp_path / "c.sqlite"))
+    stream = site.client().scrape_stream(START, depth=2, max_pages=10, concurrency=1, crawl_id="c1",
+                                         coordinator=coordinator)
+    pages = asyncio.run(collect(stream))
+
+    # /new was fetched once, through the redirect, and not again from /other's link
+    assert site.requests.count("https://ex.com/new") == 1
+    assert sorted(page["url"] for page in pages) == [START, "https://ex.com/old", "https://ex.com/other"]
+    assert coordinator.stats("c1") == {"queued": 0, "leased": 0, "done": 3}
@@ -0,0 +1,54 @@
+# tests/test_dedup.py
+
+import asyncio
+import random
+
+from conftest import FakeSite, html_page
+from crawler.dedup import NearDuplicateIndex
+from crawler.incremental import CrawlStateStore
+
+START = "https://ex.com/"
+
+
+def prose(seed: int, words: int = 300) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"word{number}" for number in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def test_near_duplicates_are_reported_against_the_first_page():
+    index = NearDuplicateIndex(threshold=0.8)
+    text = prose(1)
+    assert index.check("https://ex.com/a", text) is None
+    duplicate = index.check("https://ex.com/a/print", text + " printed")
+    assert duplicate is not None and duplicate[0] == "https://ex.com/a" and duplicate[1] >= 0.8
+    assert index.check("https://ex.com/b", prose(2)) is None
+    assert index.stats()["canonical_pages"] == 2 and index.stats()["duplicates"] == 1
+
+
+def test_signature_similarity_tracks_overlap_and_short_pages_are_ignored():
+    index = NearDuplicateIndex()
+    same = index.similarity(index.signature(prose(3)), index.signature(prose(3)))
+    different = index.similarity(index.signature(prose(3)), index.signature(prose(4)))
+    assert same == 1.0 and different < 0.2
+    assert index.signature("too short to compare") is None
+    assert index.check("https://ex.com/short", "too short to compare") is None
+
+
+def test_duplicates_of_reused_pages_take_over_their_relevance(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+    article = html_page("Article", f"<p>{prose(5)}</p>")
+
+    def crawl(*links):
+        anchors = "".join(f"<a href='/{link}'>{link}</a>" for link in links)
+        pages = {START: html_page("Home", f"<p>{prose(6)}</p>{anchors}"),
+                 "https://ex.com/article": article, "https://ex.com/copy": article}
+        client = FakeSite(pages).client(state_store=store)
+        return asyncio.run(client.scrape_async(START, depth=1, max_pages=10, incremental=True,
+                                               skip_near_duplicates=True))
+
+    crawl("article")
+    # The article is unchanged and reused; its new copy is a duplicate of it
+    pages = {page["url"]: page for page in crawl("article", "copy")["pages"]}
+    assert pages["https://ex.com/copy"]["duplicate_of"] == "https://ex.com/article"
+    assert pages["https://ex.com/copy"]["relevance"]["score"] == 1.0
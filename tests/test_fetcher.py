@@ -0,0 +1,72 @@
+# tests/test_fetcher.py
+
+import asyncio
+
+import httpx
+
+from conftest import FakeSite, html_page
+from crawler.fetcher import BROWSER_TIER, TieredFetcher, needs_javascript
+
+SPA = "<html><body><div id='root'></div><script src='/app.js'></script></body></html>"
+
+
+def fetcher_for(site: FakeSite, **kwargs) -> TieredFetcher:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(site.handler), follow_redirects=True)
+    return TieredFetcher(lambda: client, **kwargs)
+
+
+def fetch_all(fetcher: TieredFetcher, urls):
+    async def run():
+        return [await fetcher.fetch(url) for url in urls]
+    return asyncio.run(run())
+
+
+def test_needs_javascript():
+    assert needs_javascript(SPA)
+    assert needs_javascript("<html><body><p>Hi</p></body></html>")
+    assert not needs_javascript(html_page("Docs"))
+
+
+def test_one_short_page_does_not_pin_the_host():
+    site = FakeSite({"https://ex.com/empty": SPA, "https://ex.com/a": html_page("A")})
+    fetcher = fetcher_for(site)
+    empty, page = fetch_all(fetcher, ["https://ex.com/empty", "https://ex.com/a"])
+    assert empty is None
+    assert page is not None and page.url == "https://ex.com/a"
+    assert fetcher.tier_for("https://ex.com/b") is None
+
+
+def test_single_forbidden_response_does_not_pin_the_host():
+    site = FakeSite({"https://ex.com/a": html_page("A")}, responses={"https://ex.com/a": [(403, {})]})
+    fetcher = fetcher_for(site)
+    blocked, page = fetch_all(fetcher, ["https://ex.com/a", "https://ex.com/a"])
+    assert blocked is None and page is not None
+
+
+def test_repeated_failures_pin_the_host_until_the_pin_expires():
+    pages = {f"https://ex.com/spa{i}": SPA for i in range(3)}
+    pages["https://ex.com/a"] = html_page("A")
+    site = FakeSite(pages)
+    fetcher = fetcher_for(site, escalate_after=3, pin_pages=2)
+    fetch_all(fetcher, [f"https://ex.com/spa{i}" for i in range(3)])
+    assert fetcher.tier_for("https://ex.com/a") == BROWSER_TIER
+    assert fetcher.stats()["browser_hosts"] == ["ex.com"]
+
+    # Two pages go straight to the browser, then HTTP is tried again
+    results = fetch_all(fetcher, ["https://ex.com/a"] * 3)
+    assert results[:2] == [None, None]
+    assert results[2] is not None
+    assert site.requests.count("https://ex.com/a") == 1
+
+
+def test_pin_expires_after_pin_seconds():
+    site = FakeSite({f"https://ex.com/spa{i}": SPA for i in range(2)})
+    fetcher = fetcher_for(site, escalate_after=2, pin_seconds=0.0)
+    fetch_all(fetcher, ["https://ex.com/spa0", "https://ex.com/spa1"])
+    assert fetcher.tier_for("https://ex.com/spa0") is None
+
+
+def test_static_page_reports_final_url():
+    site = FakeSite({"https://ex.com/new": html_page("New")}, redirects={"https://ex.com/old": "https://ex.com/new"})
+    (page,) = fetch_all(fetcher_for(site), ["https://ex.com/old"])
+    assert page.url == "https://ex.com/new"
@@ -0,0 +1,77 @@
+# tests/test_frontier.py
+
+import asyncio
+
+from conftest import FakeSite, html_page
+from crawler.frontier import BloomFilter, CrawlFrontier, url_key
+
+
+def test_url_key_ignores_fragment_and_default_port():
+    assert url_key("https://Ex.com:443/a#top") == url_key("https://ex.com/a")
+
+
+def test_fifo_order_and_dedup():
+    frontier = CrawlFrontier()
+    assert frontier.add("https://ex.com/a", 0)
+    assert frontier.add("https://ex.com/b", 1)
+    assert not frontier.add("https://ex.com/a#x", 1)
+    assert frontier.pop() == ("https://ex.com/a", 0)
+    # Popped URLs stay seen
+    assert not frontier.add("https://ex.com/a", 2)
+    assert frontier.pop() == ("https://ex.com/b", 1)
+    assert not frontier
+    assert frontier.seen_count == 2
+
+
+def test_priority_order_ties_fifo():
+    frontier = CrawlFrontier(priority=True)
+    for url, score in (("https://ex.com/low", 0.1), ("https://ex.com/hi1", 0.9), ("https://ex.com/hi2", 0.9)):
+        frontier.add(url, 1, score)
+    assert [frontier.pop()[0] for _ in range(3)] == ["https://ex.com/hi1", "https://ex.com/hi2", "https://ex.com/low"]
+
+
+def test_rescore_only_raises():
+    frontier = CrawlFrontier(priority=True)
+    frontier.add("https://ex.com/a", 1, 0.5)
+    frontier.add("https://ex.com/b", 1, 0.4)
+    assert not frontier.rescore("https://ex.com/b", 0.1)
+    assert frontier.rescore("https://ex.com/b", 0.8)
+    assert not frontier.rescore("https://ex.com/missing", 1.0)
+    assert len(frontier) == 2
+    assert frontier.pop() == ("https://ex.com/b", 1)
+    assert frontier.pop() == ("https://ex.com/a", 1)
+    assert not frontier.rescore("https://ex.com/a", 1.0)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(10000, 0.01)
+    urls = [f"https://ex.com/page/{i}" for i in range(10000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://other.com/{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_frontier_dedups():
+    frontier = CrawlFrontier(bloom_capacity=1000)
+    assert frontier.add("https://ex.com/a", 0)
+    assert not frontier.add("https://ex.com/a", 0)
+    assert frontier.seen("https://ex.com/a")
+
+
+def test_best_first_raises_link_found_on_relevant_page():
+    # The start page links to a page about pricing only through an unhelpful anchor;
+    # the pricing page links to it again with a relevant anchor
+    pages = {
+        "https://ex.com/": html_page("Home", "<a href='/blog'>blog</a><a href='/team'>team</a>"
+                                             "<a href='/x'>more</a><a href='/pricing'>Pricing plans</a>"),
+        "https://ex.com/pricing": html_page("Pricing plans", "<a href='/x'>Enterprise pricing plans</a>"),
+    }
+    for name in ("x", "blog", "team"):
+        pages[f"https://ex.com/{name}"] = html_page(name)
+    site = FakeSite(pages)
+    result = asyncio.run(site.client().scrape_async("https://ex.com/", "pricing plans", depth=2,
+                                                    strategy="best_first"))
+    order = [page["url"] for page in result["pages"]]
+    assert order.index("https://ex.com/x") < order.index("https://ex.com/blog")
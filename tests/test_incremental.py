@@ -0,0 +1,90 @@
+# tests/test_incremental.py
+
+import asyncio
+import threading
+
+from conftest import FakeSite, html_page
+from crawler.incremental import CrawlStateStore, IncrementalCrawl
+
+START = "https://ex.com/"
+
+
+def home(*pages) -> str:
+    return html_page("Home", "".join(f"<a href='/{page}'>{page}</a>" for page in pages))
+
+
+def crawl(site: FakeSite, store: CrawlStateStore, max_pages: int):
+    client = site.client(state_store=store)
+    result = asyncio.run(client.scrape_async(START, depth=1, max_pages=max_pages, incremental=True))
+    return result["meta"]["changes"]
+
+
+def site_with(*links, gone=()) -> FakeSite:
+    pages = {START: home(*links)}
+    for name in ("p0", "p1", "p2", "p3", "p8", "p9"):
+        if name not in gone:
+            pages[f"https://ex.com/{name}"] = html_page(name.upper())
+    return FakeSite(pages)
+
+
+def test_unchanged_pages_are_reused(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+    first = crawl(site_with("p0", "p1"), store, max_pages=10)
+    assert sorted(first["added"]) == [START, "https://ex.com/p0", "https://ex.com/p1"]
+    second = crawl(site_with("p0", "p1"), store, max_pages=10)
+    assert second == {"added": [], "changed": [], "removed": [], "unchanged": 3}
+
+
+def test_pages_not_reached_because_of_max_pages_are_kept(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+    crawl(site_with("p0", "p1", "p2"), store, max_pages=3)
+    # The start page now links elsewhere first; p0 and p1 are not reached within the budget
+    changes = crawl(site_with("p9", "p8", "p0", "p1"), store, max_pages=3)
+    assert changes["removed"] == []
+
+
+def test_gone_pages_are_removed_even_when_the_budget_runs_out(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+    crawl(site_with("p0", "p1", "p2"), store, max_pages=3)
+    changes = crawl(site_with("p0", "p1", "p2", gone=("p0",)), store, max_pages=3)
+    assert changes["removed"] == ["https://ex.com/p0"]
+
+
+def test_complete_crawl_removes_pages_no_longer_linked(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+    crawl(site_with("p0", "p1", "p2"), store, max_pages=10)
+    changes = crawl(site_with("p0", "p1"), store, max_pages=10)
+    assert changes["removed"] == ["https://ex.com/p2"]
+
+
+def test_finish_without_complete_only_removes_gone_pages(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+    for url in ("https://ex.com/a", "https://ex.com/b"):
+        store.put("key", url, "hash", {"url": url})
+    tracker = IncrementalCrawl(store, "key")
+    tracker.mark_gone("https://ex.com/a")
+    assert tracker.finish(complete=False)["removed"] == ["https://ex.com/a"]
+    assert store.get("key", "https://ex.com/b") is not None
+
+
+class ThreadRecordingStore(CrawlStateStore):
+    """Records which threads read and write page states."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, crawl_key, url):
+        self.threads.add(threading.current_thread().name)
+        return super().get(crawl_key, url)
+
+    def put(self, crawl_key, url, content_hash, result):
+        self.threads.add(threading.current_thread().name)
+        super().put(crawl_key, url, content_hash, result)
+
+
+def test_state_lookups_and_saves_run_off_the_event_loop(tmp_path):
+    store = ThreadRecordingStore(str(tmp_path / "state.sqlite"))
+    crawl(site_with("p0", "p1"), store, max_pages=10)
+    crawl(site_with("p0", "p1"), store, max_pages=10)
+    assert store.threads and threading.current_thread().name not in store.threads
@@ -0,0 +1,32 @@
+# tests/test_link_scoring.py
+
+from crawler.link_scoring import LinkScorer, link_priority, stem, tokenize
+
+
+def test_tokenize_drops_stopwords_and_stem_folds_plurals():
+    assert "the" not in tokenize("The pricing of the plans")
+    assert stem("benefits") == stem("benefit")
+
+
+def test_links_matching_the_instructions_score_highest():
+    scorer = LinkScorer("Find pricing plans and billing details")
+    ranked = scorer.rank(
+        ["https://ex.com/blog", "https://ex.com/pricing", "https://ex.com/docs/billing"],
+        {"https://ex.com/pricing": "Pricing plans", "https://ex.com/blog": "Blog"}
+    )
+    assert ranked[0][0] == "https://ex.com/pricing"
+    assert dict(ranked)["https://ex.com/blog"] == 0.0
+    assert 0.0 < dict(ranked)["https://ex.com/docs/billing"] < ranked[0][1]
+
+
+def test_utility_and_binary_links_are_discounted():
+    scorer = LinkScorer("pricing plans")
+    assert scorer.score("https://ex.com/pricing.zip", "Pricing plans") == 0.0
+    assert scorer.score("https://ex.com/login?next=pricing", "Pricing plans") < scorer.score(
+        "https://ex.com/pricing", "Pricing plans")
+    assert LinkScorer(None).score("https://ex.com/pricing", "Pricing") == 0.0
+
+
+def test_link_priority_blends_in_the_parent_relevance():
+    assert link_priority(1.0, 0.0) == 0.7
+    assert link_priority(0.5, 1.0) > link_priority(0.5, 0.0)
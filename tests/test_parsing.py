@@ -0,0 +1,43 @@
+# tests/test_parsing.py
+
+import asyncio
+import time
+
+from conftest import FakeSite, html_page
+from crawler.parsing import ParserPool
+
+
+def test_thread_pool_parses_and_restarts_after_shutdown():
+    pool = ParserPool("thread", max_workers=2)
+
+    async def parse():
+        return await pool.parse(html_page("Guide", '<a href="intro.html">Intro</a>'), url="https://a.example/docs/")
+
+    document = asyncio.run(parse())
+    pool.shutdown()
+    assert document.title == "Guide"
+    assert document.links == ["https://a.example/docs/intro.html"]
+    assert asyncio.run(parse()).title == "Guide"
+    pool.shutdown()
+    assert pool.stats()["parsed"] == 2
+
+
+def test_client_close_waits_for_the_parser_pool_off_the_event_loop():
+    client = FakeSite({}).client(parse_executor="thread")
+    client.parser.shutdown = lambda: time.sleep(0.3)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await client.close()
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
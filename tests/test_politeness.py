@@ -0,0 +1,55 @@
+# tests/test_politeness.py
+
+import asyncio
+
+import pytest
+
+from conftest import FakeSite, html_page
+from crawler.politeness import parse_retry_after
+
+URL = "https://ex.com/"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep delays instead of waiting."""
+    recorded = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        recorded.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_without_scheduler_honours_retry_after(sleeps):
+    site = FakeSite({URL: html_page("Home")}, responses={URL: [(429, {"Retry-After": "7"})]})
+    client = site.client(polite=False)
+    page = asyncio.run(client.scrape_page(URL))
+    assert "error" not in page
+    assert sleeps == [7.0]
+
+
+def test_backoff_without_scheduler_is_exponential(sleeps):
+    site = FakeSite({URL: html_page("Home")}, responses={URL: [(503, {}), (429, {}), (429, {})]})
+    client = site.client(polite=False)
+    page = asyncio.run(client.scrape_page(URL))
+    assert "error" not in page
+    assert sleeps == [2.0, 4.0, 8.0]
+    assert site.requests.count(URL) == 4
+
+
+def test_backoff_gives_up_after_max_retries(sleeps):
+    site = FakeSite({URL: html_page("Home")}, responses={URL: [(429, {})] * 4})
+    client = site.client(polite=False)
+    page = asyncio.run(client.scrape_page(URL))
+    assert "Rate limit exceeded" in page["error"]
@@ -0,0 +1,44 @@
+# tests/test_prefilter.py
+
+from crawler.prefilter import ACCEPT, AMBIGUOUS, REJECT, RelevancePrefilter
+
+INSTRUCTIONS = "pricing plans discounts invoices refunds subscriptions"
+RELEVANT = "Our pricing plans include discounts. Invoices and refunds for subscriptions are handled monthly."
+UNRELATED = "The team went hiking in the mountains and shared photos of the lake at sunset."
+
+
+def test_one_keyword_of_six_scores_low_on_first_page():
+    prefilter = RelevancePrefilter(INSTRUCTIONS)
+    score = prefilter.score("Pricing", "We changed the pricing page layout last week.")
+    assert score < 0.3
+
+
+def test_score_does_not_depend_on_unseen_keywords_being_dropped():
+    first = RelevancePrefilter(INSTRUCTIONS)
+    early = first.score("Pricing", "Pricing pricing pricing.")
+    second = RelevancePrefilter(INSTRUCTIONS)
+    second.score("Plans", RELEVANT)
+    later = second.score("Pricing", "Pricing pricing pricing.")
+    # The same page scores about the same whether or not other keywords were seen before
+    assert abs(early - later) < 0.15
+
+
+def test_no_decision_before_min_corpus():
+    prefilter = RelevancePrefilter(INSTRUCTIONS, min_corpus=5)
+    decisions = [prefilter.classify("Pricing plans", RELEVANT)[0] for _ in range(5)]
+    assert decisions == [AMBIGUOUS] * 5
+
+
+def test_accepts_and_rejects_once_corpus_is_large_enough():
+    prefilter = RelevancePrefilter(INSTRUCTIONS, min_corpus=4)
+    for _ in range(2):
+        prefilter.classify("Pricing plans", RELEVANT)
+        prefilter.classify("Hiking", UNRELATED)
+    assert prefilter.classify("Pricing plans", RELEVANT)[0] == ACCEPT
+    assert prefilter.classify("Hiking", UNRELATED)[0] == REJECT
+    assert prefilter.stats()["sent_to_llm"] == 4
+
+
+def test_instructions_without_keywords_are_always_ambiguous():
+    prefilter = RelevancePrefilter("the and of", min_corpus=0)
+    assert prefilter.classify("Title", RELEVANT)[0] == AMBIGUOUS
@@ -0,0 +1,104 @@
+# tests/test_sharding.py
+
+import asyncio
+
+import pytest
+
+from conftest import FakeSite, html_page
+from crawler.exceptions import ConfigurationError
+from crawler.sharding import ABANDONED, ALIAS, RESULTS_TABLE, SharedCrawlStore, ShardCoordinator, ShardedCrawler, shard_for
+from crawler.sinks import SqliteSink
+
+
+def shard_params(**overrides):
+    params = {"url": "", "instructions": None, "depth": 1, "follow_external_links": False, "max_pages": 10}
+    params.update(overrides)
+    return params
+
+
+def test_shard_for_is_stable_per_host():
+    assert shard_for("https://a.example/x", 8) == shard_for("https://A.example/y?q=1", 8)
+    assert 0 <= shard_for("https://b.example/", 8) < 8
+
+
+def test_abandoned_urls_do_not_use_the_budget(tmp_path):
+    store = SharedCrawlStore(str(tmp_path / "store.sqlite"))
+    store.add("https://a.example/", 0, "a.example", 0)
+    store.add("https://b.example/", 0, "b.example", 1)
+    store.add("https://b.example/2", 0, "b.example", 1)
+
+    assert store.claim(1, max_pages=2) is not None
+    assert store.abandon(1) == 2
+    assert store.counts()[ABANDONED] == 2
+    assert store.claim(0, max_pages=2) == ("https://a.example/", 0, "a.example")
+    store.finish("https://a.example/")
+    assert not store.active(max_pages=2)
+    store.close()
+
+
+def test_aliases_are_never_added_or_claimed(tmp_path):
+    store = SharedCrawlStore(str(tmp_path / "store.sqlite"))
+    coordinator = ShardCoordinator(store, 0, 1, shard_params(url="https://a.example/"))
+    coordinator.mark_seen("c1", ["https://a.example/new"])
+    assert not coordinator.add("c1", "https://a.example/new", 1)
+    assert store.counts() == {ALIAS: 1}
+    assert store.claim(0, max_pages=10) is None and not store.active(max_pages=10)
+    coordinator.close()
+    store.close()
+
+
+def test_results_are_stored_once_after_a_restart(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    store = SharedCrawlStore(path)
+    store.add("https://a.example/", 0, "a.example", 0)
+    coordinator = ShardCoordinator(store, 0, 1, shard_params())
+
+    lease = coordinator.lease("shard-0", 300.0, 10)
+    coordinator._results.write({"url": lease.url, "title": "first"})
+    # The process died before marking the URL done; the parent releases it
+    assert store.release(0) == 1
+    lease = coordinator.lease("shard-0", 300.0, 10)
+    coordinator.complete("shard-0", lease, {"url": lease.url, "title": "again"})
+    coordinator.close()
+    store.close()
+
+    assert [page["title"] for page in SqliteSink(path, table=RESULTS_TABLE)] == ["first"]
+
+
+def test_shard_worker_uses_the_client_canonicalizer_and_start_domains(tmp_path):
+    site = FakeSite({
+        "https://a.example/": html_page("A", '<a href="/docs?utm_source=x">D</a><a href="/docs">D</a>'
+                                             '<a href="https://b.example/">B</a>'),
+        "https://a.example/docs": html_page("Docs"),
+        "https://b.example/": html_page("B", '<a href="https://a.example/docs">A docs</a>'
+                                             '<a href="https://c.example/">C</a>'),
+    })
+    path = str(tmp_path / "store.sqlite")
+    client = site.client()
+    store = SharedCrawlStore(path, key_func=client.canonicalizer)
+    for url in ("https://a.example/", "https://b.example/"):
+        store.add(url, 0, url.split("/")[2], 0)
+    params = shard_params(follow_external_links=True)
+    coordinator = ShardCoordinator(store, 0, 1, params)
+
+    async def run():
+        try:
+            return [page["url"] async for page in client.scrape_stream(
+                "", depth=1, follow_external_links=True, max_pages=10,
+                coordinator=coordinator, crawl_id="shard-0", poll_interval=0.01)]
+        finally:
+            await client.close()
+
+    urls = asyncio.run(run())
+    coordinator.close()
+    store.close()
+
+    # One fetch for both spellings of /docs; b.example's link to c.example is external
+    assert sorted(urls) == ["https://a.example/", "https://a.example/docs?utm_source=x", "https://b.example/"]
+    assert "https://c.example/" not in site.requests
+
+
+def test_crawl_rejects_options_shards_cannot_honour(tmp_path):
+    crawler = ShardedCrawler(processes=1, store_path=str(tmp_path / "store.sqlite"))
+    with pytest.raises(ConfigurationError):
+        crawler.crawl(["https://a.example/"], strategy="best_first")
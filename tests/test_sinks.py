@@ -0,0 +1,47 @@
+# tests/test_sinks.py
+
+import asyncio
+import sqlite3
+
+from conftest import FakeSite, html_page
+from crawler.sinks import SqliteSink
+
+START = "https://ex.com/"
+
+
+def stored_rows(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_sqlite_sink_commits_in_batches(tmp_path):
+    path = str(tmp_path / "pages.db")
+    sink = SqliteSink(path, commit_every=3, commit_interval=60)
+    for number in range(4):
+        sink.write({"url": f"https://ex.com/p{number}"})
+    # Three pages went out in one commit; the fourth is still buffered
+    assert stored_rows(path) == 3
+    assert len(sink) == 4 and stored_rows(path) == 4
+    sink.write({"url": "https://ex.com/p4"})
+    sink.close()
+    assert [page["url"] for page in sink] == [f"https://ex.com/p{number}" for number in range(5)]
+
+
+def test_sqlite_sink_keeps_the_first_result_per_url(tmp_path):
+    sink = SqliteSink(str(tmp_path / "pages.db"), unique_urls=True)
+    sink.write({"url": START, "title": "first"})
+    sink.write({"url": START, "title": "again"})
+    sink.close()
+    assert list(sink) == [{"url": START, "title": "first"}]
+
+
+def test_crawl_results_are_readable_when_scrape_async_returns(tmp_path):
+    path = str(tmp_path / "pages.db")
+    pages = {START: html_page("Home", "<a href='/a'>a</a>"), "https://ex.com/a": html_page("A")}
+    sink = SqliteSink(path)
+    result = asyncio.run(FakeSite(pages).client().scrape_async(START, depth=1, sink=sink))
+    assert result["pages"] is sink
+    assert stored_rows(path) == 2
@@ -0,0 +1,137 @@
+# tests/test_sitemaps.py
+
+import asyncio
+import gzip
+
+from conftest import FakeSite, html_page
+from crawler.incremental import CrawlStateStore
+from crawler.politeness import PolitenessScheduler
+from crawler.sitemaps import SitemapParser, SitemapReader, parse_lastmod
+
+START = "https://ex.com/"
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*entries) -> str:
+    urls = "".join(f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in entries)
+    return f'<?xml version="1.0"?><urlset {NS}>{urls}</urlset>'
+
+
+def test_parse_lastmod_accepts_w3c_datetimes():
+    assert parse_lastmod("2024-05-01") == parse_lastmod("2024-05-01T00:00:00Z")
+    assert parse_lastmod("2024-05-01T02:00:00+02:00") == parse_lastmod("2024-05-01T00:00:00Z")
+    assert parse_lastmod("yesterday") is None and parse_lastmod(None) is None
+
+
+def test_parser_inflates_gzip_fed_in_small_chunks():
+    data = gzip.compress(urlset(("https://ex.com/a", "2024-05-01"), ("https://ex.com/b", "2024-06-01")).encode())
+    parser = SitemapParser()
+    entries = []
+    for start in range(0, len(data), 7):
+        entries.extend(parser.feed(data[start:start + 7]))
+    entries.extend(parser.close())
+    assert [(kind, entry.url) for kind, entry in entries] == [("url", "https://ex.com/a"), ("url", "https://ex.com/b")]
+    assert entries[1][1].lastmod == parse_lastmod("2024-06-01")
+
+
+def test_reader_follows_indexes_and_skips_old_sitemaps():
+    index = (f'<sitemapindex {NS}><sitemap><loc>https://ex.com/new.xml</loc><lastmod>2024-06-01</lastmod></sitemap>'
+             f'<sitemap><loc>https://ex.com/old.xml</loc><lastmod>2020-01-01</lastmod></sitemap></sitemapindex>')
+    site = FakeSite({
+        "https://ex.com/robots.txt": "User-agent: *\nSitemap: https://ex.com/index.xml\n",
+        "https://ex.com/index.xml": index,
+        "https://ex.com/new.xml": urlset(("https://ex.com/a", "2024-06-01"), ("https://ex.com/b", "2019-01-01")),
+        "https://ex.com/old.xml": urlset(("https://ex.com/c", "2020-01-01")),
+    })
+    client = site.client()
+    reader = SitemapReader(client._get_http_client)
+
+    async def read():
+        try:
+            return [entry.url async for entry in reader.entries(await reader.discover(START),
+                                                                 modified_since=parse_lastmod("2023-01-01"))]
+        finally:
+            await client.close()
+
+    assert asyncio.run(read()) == ["https://ex.com/a"]
+    assert "https://ex.com/old.xml" not in site.requests
+    assert reader.stats() == {"sitemaps_fetched": 2, "sitemaps_skipped": 1, "urls_listed": 2, "urls_skipped": 1}
+
+
+def sitemap_site(*entries) -> FakeSite:
+    pages = {
+        START: html_page("Home"),
+        "https://ex.com/robots.txt": "User-agent: *\nSitemap: https://ex.com/sitemap.xml\n",
+        "https://ex.com/sitemap.xml": urlset(*entries),
+    }
+    for name in ("p1", "p2", "p3"):
+        pages[f"https://ex.com/{name}"] = html_page(name.upper())
+    return FakeSite(pages)
+
+
+def test_robots_txt_is_fetched_once_per_host():
+    site = sitemap_site(("https://ex.com/p1", "2024-01-01"))
+    client = site.client(politeness=PolitenessScheduler(initial_rate=100.0, burst=100.0))
+    result = asyncio.run(client.scrape_async(START, depth=1, max_pages=5, seed_from_sitemaps=True))
+    assert site.requests.count("https://ex.com/robots.txt") == 1
+    assert len(result["pages"]) == 2
+
+
+def test_reused_sitemap_pages_do_not_use_the_page_budget(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+
+    def crawl(site):
+        client = site.client(state_store=store)
+        return asyncio.run(client.scrape_async(START, depth=1, max_pages=3, incremental=True,
+                                               seed_from_sitemaps=True))
+
+    crawl(sitemap_site(("https://ex.com/p1", "2020-01-01"), ("https://ex.com/p2", "2020-01-01")))
+    site = sitemap_site(("https://ex.com/p1", "2020-01-01"), ("https://ex.com/p2", "2020-01-01"),
+                        ("https://ex.com/p3", "2024-01-01"))
+    result = crawl(site)
+
+    # p1 and p2 are reused unfetched, leaving the budget for the start page and p3
+    assert "https://ex.com/p1" not in site.requests and "https://ex.com/p2" not in site.requests
+    assert "https://ex.com/p3" in site.requests
+    assert sorted(page["url"] for page in result["pages"]) == [
+        START, "https://ex.com/p1", "https://ex.com/p2", "https://ex.com/p3"
+    ]
+
+
+def test_unfetched_and_failed_sitemaps_count_as_skipped():
+    index = f'<sitemapindex {NS}>' + "".join(
+        f"<sitemap><loc>https://ex.com/{name}.xml</loc></sitemap>" for name in ("a", "b", "c", "gone", "broken")
+    ) + "</sitemapindex>"
+    site = FakeSite({
+        "https://ex.com/index.xml": index,
+        "https://ex.com/a.xml": urlset(("https://ex.com/p1", "2024-01-01")),
+    }, responses={"https://ex.com/b.xml": [(503, {})]})
+    client = site.client()
+
+    async def read(max_sitemaps):
+        reader = SitemapReader(client._get_http_client, max_sitemaps=max_sitemaps)
+        urls = [entry.url async for entry in reader.entries(["https://ex.com/index.xml"])]
+        return urls, reader.stats()["sitemaps_skipped"]
+
+    # index, a and b (503) are fetched; c, gone and broken are left unfetched
+    assert asyncio.run(read(3)) == (["https://ex.com/p1"], 4)
+    # gone.xml answers 404 and lists nothing; broken.xml is not XML
+    site.pages["https://ex.com/broken.xml"] = "<urlset><url>"
+    site.responses["https://ex.com/b.xml"] = [(503, {})]
+    assert asyncio.run(read(10)) == (["https://ex.com/p1"], 2)
+
+
+def test_incremental_crawl_keeps_pages_when_a_sitemap_fails(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.sqlite"))
+
+    def crawl(site):
+        client = site.client(state_store=store)
+        result = asyncio.run(client.scrape_async(START, depth=1, max_pages=10, incremental=True,
+                                                 seed_from_sitemaps=True))
+        return result["meta"]["changes"]
+
+    crawl(sitemap_site(("https://ex.com/p1", "2024-01-01")))
+    site = sitemap_site(("https://ex.com/p1", "2024-01-01"))
+    site.responses["https://ex.com/sitemap.xml"] = [(500, {})]
+    # p1 is only listed in the sitemap, which could not be read this time
+    assert crawl(site)["removed"] == []
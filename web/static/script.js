@@ -78,47 +78,77 @@ document.addEventListener('DOMContentLoaded', function() {
         };
 
         try {
-            const response = await fetch('/api/scrape', {
+            // Results arrive as NDJSON, one page per line, as soon as each page is scraped
+            const response = await fetch('/api/scrape/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                    'Accept': 'application/json'
+                    'Accept': 'application/x-ndjson'
                 },
                 body: JSON.stringify(requestBody)
             });
 
-            // Hide loading, restore button
-            loadingDiv.style.display = 'none';
-            submitBtn.disabled = false;
-            submitBtn.textContent = 'Start Scraping';
-
-            const result = await response.json();
-
             if (!response.ok) {
+                const result = await response.json();
                 const errorMsg = result.detail || `HTTP error! Status: ${response.status}`;
                 showError(errorMsg);
                 console.error('API Error:', result);
             } else {
-                // Save results for download
-                currentResults = result.data;
-                
-                // Display successful results
-                displayResults(result);
-                
-                // Show download options
-                resultsContainer.style.display = 'block';
+                // Save results for download as they stream in
+                currentResults = [];
+                startResults();
+                await readPageStream(response, handleStreamMessage);
+
+                if (currentResults.length === 0) {
+                    resultsDiv.innerHTML = '<div class="no-results">No results found</div>';
+                    resultsContainer.style.display = 'block';
+                }
             }
 
         } catch (error) {
-            // Handle network errors
+            showError(`Network or script error: ${error.message}`);
+            console.error('Fetch Error:', error);
+        } finally {
+            // Hide loading, restore button
             loadingDiv.style.display = 'none';
             submitBtn.disabled = false;
             submitBtn.textContent = 'Start Scraping';
-            
-            showError(`Network or script error: ${error.message}`);
-            console.error('Fetch Error:', error);
         }
     });
+
+    // Read an NDJSON response line by line, calling onMessage for each parsed object
+    async function readPageStream(response, onMessage) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let newline;
+            while ((newline = buffer.indexOf('\n')) !== -1) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) onMessage(JSON.parse(line));
+            }
+        }
+        if (buffer.trim()) onMessage(JSON.parse(buffer));
+    }
+
+    // Render each streamed message: pages are appended immediately
+    function handleStreamMessage(message) {
+        if (message.type === 'page') {
+            currentResults.push(message.data);
+            appendPage(message.data);
+            updateSummary(currentResults.length);
+            // Show download options and results as soon as the first page arrives
+            resultsContainer.style.display = 'block';
+        } else if (message.type === 'error') {
+            showError(message.detail);
+        }
+    }
     
     // Handle JSON download
     downloadJsonBtn.addEventListener('click', function() {
@@ -204,151 +234,153 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Display results function
-    function displayResults(result) {
+    // Clear the results area and add the summary element
+    function startResults() {
         resultsDiv.innerHTML = '';
         
-        if (!result.data || result.data.length === 0) {
-            resultsDiv.innerHTML = '<div class="no-results">No results found</div>';
-            return;
-        }
-        
-        // Create a summary element
         const summary = document.createElement('div');
         summary.className = 'results-summary';
+        summary.id = 'results-summary';
+        resultsDiv.appendChild(summary);
+        updateSummary(0);
+    }
+
+    // Update the page count in the summary element
+    function updateSummary(pageCount) {
+        const summary = document.getElementById('results-summary');
+        if (!summary) return;
         summary.innerHTML = `
-            <p><strong>Pages Crawled:</strong> ${result.data.length}</p>
+            <p><strong>Pages Crawled:</strong> ${pageCount}</p>
             <p><strong>Max Pages Setting:</strong> ${currentRequest.max_pages || 20}</p>
         `;
-        resultsDiv.appendChild(summary);
+    }
         
-        // Display each page's results
-        result.data.forEach((page, index) => {
-            const pageElement = document.createElement('div');
-            pageElement.className = 'page-result';
-            
-            // Page header
-            const pageHeader = document.createElement('div');
-            pageHeader.className = 'page-header';
-            pageHeader.innerHTML = `
-                <h3>${page.title || 'Untitled Page'}</h3>
-                <div class="page-url">${page.url}</div>
+    // Render a single page's results and append it to the results area
+    function appendPage(page) {
+        const pageElement = document.createElement('div');
+        pageElement.className = 'page-result';
+        
+        // Page header
+        const pageHeader = document.createElement('div');
+        pageHeader.className = 'page-header';
+        pageHeader.innerHTML = `
+            <h3>${page.title || 'Untitled Page'}</h3>
+            <div class="page-url">${page.url}</div>
+        `;
+        pageElement.appendChild(pageHeader);
+        
+        // Page content
+        const pageContent = document.createElement('div');
+        pageContent.className = 'page-content';
+        
+        // Check for errors
+        if (page.error) {
+            pageContent.innerHTML = `
+                <div class="error-message">
+                    Error: ${escapeHtml(page.error)}
+                </div>
             `;
-            pageElement.appendChild(pageHeader);
+        } else if (page.ai_extracted_content) {
+            // Display AI-extracted content
+            const aiContent = page.ai_extracted_content;
+            let aiHtml = '';
             
-            // Page content
-            const pageContent = document.createElement('div');
-            pageContent.className = 'page-content';
-            
-            // Check for errors
-            if (page.error) {
-                pageContent.innerHTML = `
-                    <div class="error-message">
-                        Error: ${escapeHtml(page.error)}
+            // Add summary if available
+            if (aiContent.summary) {
+                aiHtml += `
+                    <div class="ai-summary">
+                        <h4>AI Summary</h4>
+                        <p>${escapeHtml(aiContent.summary)}</p>
                     </div>
                 `;
-            } else if (page.ai_extracted_content) {
-                // Display AI-extracted content
-                const aiContent = page.ai_extracted_content;
-                let aiHtml = '';
-                
-                // Add summary if available
-                if (aiContent.summary) {
+            }
+            
+            // Add key points if available
+            if (aiContent.key_points && aiContent.key_points.length > 0) {
+                aiHtml += `<h4>Key Points</h4><ul class="ai-points">`;
+                aiContent.key_points.forEach(point => {
+                    aiHtml += `<li>${escapeHtml(point)}</li>`;
+                });
+                aiHtml += `</ul>`;
+            }
+            
+            // Add extracted data if available
+            if (aiContent.extracted_data && Object.keys(aiContent.extracted_data).length > 0) {
+                aiHtml += `<h4>Extracted Data</h4><dl class="ai-data">`;
+                for (const [key, value] of Object.entries(aiContent.extracted_data)) {
                     aiHtml += `
-                        <div class="ai-summary">
-                            <h4>AI Summary</h4>
-                            <p>${escapeHtml(aiContent.summary)}</p>
-                        </div>
+                        <dt>${escapeHtml(key)}</dt>
+                        <dd>${escapeHtml(String(value))}</dd>
                     `;
                 }
-                
-                // Add key points if available
-                if (aiContent.key_points && aiContent.key_points.length > 0) {
-                    aiHtml += `<h4>Key Points</h4><ul class="ai-points">`;
-                    aiContent.key_points.forEach(point => {
-                        aiHtml += `<li>${escapeHtml(point)}</li>`;
-                    });
-                    aiHtml += `</ul>`;
-                }
-                
-                // Add extracted data if available
-                if (aiContent.extracted_data && Object.keys(aiContent.extracted_data).length > 0) {
-                    aiHtml += `<h4>Extracted Data</h4><dl class="ai-data">`;
-                    for (const [key, value] of Object.entries(aiContent.extracted_data)) {
-                        aiHtml += `
-                            <dt>${escapeHtml(key)}</dt>
-                            <dd>${escapeHtml(String(value))}</dd>
-                        `;
-                    }
-                    aiHtml += `</dl>`;
-                }
-                
-                // Add relevance info
-                if (page.relevance) {
-                    const relevancePercentage = Math.round(page.relevance.score * 100);
-                    aiHtml += `
-                        <div class="relevance-info">
-                            <div class="relevance-score">
-                                <div class="score-bar">
-                                    <div class="score-fill" style="width: ${relevancePercentage}%"></div>
-                                </div>
-                                <div class="score-value">${relevancePercentage}% Relevant</div>
+                aiHtml += `</dl>`;
+            }
+            
+            // Add relevance info
+            if (page.relevance) {
+                const relevancePercentage = Math.round(page.relevance.score * 100);
+                aiHtml += `
+                    <div class="relevance-info">
+                        <div class="relevance-score">
+                            <div class="score-bar">
+                                <div class="score-fill" style="width: ${relevancePercentage}%"></div>
                             </div>
-                            <div class="relevance-reason">${escapeHtml(page.relevance.reason || '')}</div>
+                            <div class="score-value">${relevancePercentage}% Relevant</div>
                         </div>
-                    `;
-                }
-                
-                pageContent.innerHTML = aiHtml;
-            } else if (page.paragraphs && page.paragraphs.length > 0) {
-                // Display paragraphs if AI content is not available
-                const paragraphsHtml = page.paragraphs
-                    .map(p => `<p>${escapeHtml(p)}</p>`)
-                    .join('');
-                
-                pageContent.innerHTML = `<div class="content-paragraphs">${paragraphsHtml}</div>`;
-            } else {
-                pageContent.innerHTML = `<div class="no-content">No content extracted</div>`;
+                        <div class="relevance-reason">${escapeHtml(page.relevance.reason || '')}</div>
+                    </div>
+                `;
             }
             
-            pageElement.appendChild(pageContent);
+            pageContent.innerHTML = aiHtml;
+        } else if (page.paragraphs && page.paragraphs.length > 0) {
+            // Display paragraphs if AI content is not available
+            const paragraphsHtml = page.paragraphs
+                .map(p => `<p>${escapeHtml(p)}</p>`)
+                .join('');
             
-            // Add links section (collapsed by default)
-            if (page.links && page.links.length > 0) {
-                const linksContainer = document.createElement('div');
-                linksContainer.className = 'links-container';
-                
-                const linksToggle = document.createElement('button');
-                linksToggle.className = 'links-toggle';
-                linksToggle.textContent = `Show ${page.links.length} Links`;
-                linksToggle.onclick = function() {
-                    const linksList = this.nextElementSibling;
-                    if (linksList.style.display === 'none' || !linksList.style.display) {
-                        linksList.style.display = 'block';
-                        this.textContent = 'Hide Links';
-                    } else {
-                        linksList.style.display = 'none';
-                        this.textContent = `Show ${page.links.length} Links`;
-                    }
-                };
-                
-                const linksList = document.createElement('ul');
-                linksList.className = 'links-list';
-                linksList.style.display = 'none';
-                
-                page.links.forEach(link => {
-                    const li = document.createElement('li');
-                    li.innerHTML = `<a href="${escapeHtml(link)}" target="_blank" rel="noopener noreferrer">${escapeHtml(link)}</a>`;
-                    linksList.appendChild(li);
-                });
-                
-                linksContainer.appendChild(linksToggle);
-                linksContainer.appendChild(linksList);
-                pageElement.appendChild(linksContainer);
-            }
+            pageContent.innerHTML = `<div class="content-paragraphs">${paragraphsHtml}</div>`;
+        } else {
+            pageContent.innerHTML = `<div class="no-content">No content extracted</div>`;
+        }
+        
+        pageElement.appendChild(pageContent);
+        
+        // Add links section (collapsed by default)
+        if (page.links && page.links.length > 0) {
+            const linksContainer = document.createElement('div');
+            linksContainer.className = 'links-container';
             
-            resultsDiv.appendChild(pageElement);
-        });
+            const linksToggle = document.createElement('button');
+            linksToggle.className = 'links-toggle';
+            linksToggle.textContent = `Show ${page.links.length} Links`;
+            linksToggle.onclick = function() {
+                const linksList = this.nextElementSibling;
+                if (linksList.style.display === 'none' || !linksList.style.display) {
+                    linksList.style.display = 'block';
+                    this.textContent = 'Hide Links';
+                } else {
+                    linksList.style.display = 'none';
+                    this.textContent = `Show ${page.links.length} Links`;
+                }
+            };
+            
+            const linksList = document.createElement('ul');
+            linksList.className = 'links-list';
+            linksList.style.display = 'none';
+            
+            page.links.forEach(link => {
+                const li = document.createElement('li');
+                li.innerHTML = `<a href="${escapeHtml(link)}" target="_blank" rel="noopener noreferrer">${escapeHtml(link)}</a>`;
+                linksList.appendChild(li);
+            });
+            
+            linksContainer.appendChild(linksToggle);
+            linksContainer.appendChild(linksList);
+            pageElement.appendChild(linksContainer);
+        }
+        
+        resultsDiv.appendChild(pageElement);
     }
     
     // Show error message